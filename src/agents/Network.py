@@ -0,0 +1,118 @@
+import numpy as np
+
+from src.agents.nn_utils import sigmoid, sigmoid_gradient, hyperbolic_tangent, h_tangent_gradient, relu, relu_gradient
+
+ACTIVATIONS = {"sigmoid": (sigmoid, sigmoid_gradient),
+               "hyperbolic tangent": (hyperbolic_tangent, h_tangent_gradient),
+               "ReLU": (relu, relu_gradient)}
+
+
+class Network:
+    """
+        Multi-layer perceptron estimating the victory probability of the first player from numeric representations of
+        game states. Weights are a list of arrays (the format in which networks are stored, cf. dbmanager): one
+        (n_out, n_in) matrix per hidden layer, then the vector of the output neuron (sigmoid activation).
+        The arrays of the list are converted to float32 in place, and training updates them in place, so that all the
+        agents sharing a list of weights share the training.
+    """
+
+    def __init__(self, weights: list[np.ndarray], act_f: str):
+        for i, w in enumerate(weights):
+            if w.dtype != np.float32:
+                weights[i] = w.astype(np.float32)
+
+        self.weights = weights
+        self.act_f, self.grad = ACTIVATIONS[act_f]
+
+    def forward(self, states: np.ndarray) -> list[np.ndarray]:
+        """
+        :param states: one state per line
+        :return: activations of each layer (inputs included), the last one being the output (one value per state)
+        """
+
+        activations = [np.asarray(states, dtype=np.float32)]
+        with np.errstate(over="ignore"):  # saturated sigmoid (exp overflows sooner in float32)
+            for w in self.weights[:-1]:
+                activations.append(self.act_f(activations[-1] @ w.T))
+            activations.append(sigmoid(activations[-1] @ self.weights[-1]))
+        return activations
+
+    def predict(self, states: np.ndarray) -> np.ndarray:
+        """ Output of the network for each state (one state per line) """
+
+        out = np.asarray(states, dtype=np.float32)
+        with np.errstate(over="ignore"):
+            for w in self.weights[:-1]:
+                out = self.act_f(out @ w.T)
+            return sigmoid(out @ self.weights[-1])
+
+    def backward(self, activations: list[np.ndarray], errors: np.ndarray, lr: float) -> None:
+        """
+        Gradient descent step on a minibatch, weights being updated in place
+
+        :param activations: result of forward on the states of the minibatch
+        :param errors: derivative of the loss with respect to the output, for each state (e.g., output - target)
+        :param lr: learning rate (gradients are averaged over the minibatch)
+        """
+
+        n = len(errors)
+        delta = np.asarray(errors, dtype=np.float32) * sigmoid_gradient(activations[-1])
+        grads = [delta @ activations[-2] / n]
+        delta = delta[:, None] * self.weights[-1] * self.grad(activations[-2])
+        for i in range(len(self.weights) - 2, -1, -1):
+            grads.append(delta.T @ activations[i] / n)
+            if i:
+                delta = (delta @ self.weights[i]) * self.grad(activations[i])
+
+        for w, g in zip(self.weights[::-1], grads):
+            w -= lr * g
+
+
+class PopulationNetwork:
+    """
+        Networks of a population of individuals (e.g., of a genetic algorithm) sharing the same shape, the weights of
+        each layer being stacked in a single float32 array whose first dimension is the individual: (pop, n_out, n_in)
+        for the hidden layers, (pop, n_in) for the output neuron. States of all the individuals go through the network
+        with one batched matrix product per layer.
+    """
+
+    def __init__(self, weights: list[np.ndarray], act_f: str):
+        for i, w in enumerate(weights):
+            if w.dtype != np.float32:
+                weights[i] = w.astype(np.float32)
+
+        self.weights = weights
+        self.act_f = ACTIVATIONS[act_f][0]
+
+    def __len__(self):
+        return len(self.weights[0])
+
+    def individual(self, i: int) -> list[np.ndarray]:
+        """ Weights of an individual, in the format of Network (views on the population) """
+
+        return [w[i] for w in self.weights]
+
+    def predict(self, states: np.ndarray, individuals: np.ndarray) -> np.ndarray:
+        """
+        :param states: one state per line
+        :param individuals: individual evaluating each state
+        :return: output of the network of the individual for each state
+        """
+
+        states, individuals = np.asarray(states, dtype=np.float32), np.asarray(individuals)
+        order = np.argsort(individuals, kind="stable")
+        ind = individuals[order]
+        counts = np.bincount(ind, minlength=len(self))
+        pos = np.arange(len(ind)) - (np.cumsum(counts) - counts)[ind]  # rank of each state among the ones of its individual
+
+        # states of each individual padded to the same number
+        out = np.zeros((len(self), counts.max(initial=0), states.shape[1]), dtype=np.float32)
+        out[ind, pos] = states[order]
+        with np.errstate(over="ignore"):
+            for w in self.weights[:-1]:
+                out = self.act_f(out @ w.transpose(0, 2, 1))
+            out = sigmoid(np.einsum("prh,ph->pr", out, self.weights[-1]))
+
+        ret = np.empty(len(ind), dtype=np.float32)
+        ret[order] = out[ind, pos]
+        return ret
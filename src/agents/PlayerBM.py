@@ -1,6 +1,9 @@
 import random
 
+import numpy as np
+
 from src.agents.AbstractPlayer import AbstractPlayer
+from src.game.BatchedPokeGame import BatchedPokeGame, NO_ACTION
 from src.game.PokeGame import PokeGame
 from src.game.constants import TYPE_CHART
 
@@ -53,10 +56,44 @@ class PlayerBM(AbstractPlayer):
 
             # Unknown opponent moves, player can hit stronger, safest switch is current Pokémon: use strongest move
             if not len(opp_moves_final_pow) or max(opp_moves_final_pow) <= max(own_moves_final_pow) or safest_switch_idx == 0:
-                ret = own_of.moves[max(enumerate(own_moves_final_pow), key=lambda x: x[1])[0]].name
+                ret = max(enumerate(own_moves_final_pow), key=lambda x: x[1])[0]
 
             # Defense is more rewarding than attack
             else:
-                ret = "switch " + own_team[safest_switch_idx].name
+                ret = view.n_moves + safest_switch_idx
 
         return ret
+
+    def make_moves(self, game: BatchedPokeGame) -> np.ndarray:
+        """ Batched version of make_move: action of the player in each game of the batch """
+
+        side = 0 if self.role == "p1" else 1
+        gs, rows = game.game_state, np.arange(len(game))
+        of, opp_of = gs.on_field[:, side], gs.on_field[:, 1 - side]
+        own_type, opp_type = gs.poke_type[rows, side, of], gs.poke_type[rows, 1 - side, opp_of]
+
+        # Player offensive possibilities
+        own_moves_final_pow = game.moves_final_pow(gs.move_type[rows, side, of], gs.move_pow[rows, side, of],
+                                                   own_type[:, None], opp_type[:, None])
+
+        # Opponent offensive possibilities (moves revealed only)
+        opp_move_type, opp_move_pow = gs.move_type[rows, 1 - side, opp_of], gs.move_pow[rows, 1 - side, opp_of]
+        known = gs.revealed[rows, 1 - side, opp_of]
+        opp_moves_final_pow = np.where(known, game.moves_final_pow(opp_move_type, opp_move_pow, opp_type[:, None],
+                                                                   own_type[:, None]), -np.inf)
+
+        # Player defensive possibilities
+        own_def_ops = np.where(known[:, None], game.moves_final_pow(opp_move_type[:, None], opp_move_pow[:, None],
+                                                                    opp_type[:, None, None],
+                                                                    gs.poke_type[:, side, :, None]), -np.inf)
+        safest_switch_idx = np.argmin(own_def_ops.max(axis=2), axis=1)
+
+        # Unknown opponent moves, player can hit stronger, safest switch is current Pokémon: use strongest move
+        attack = ~known.any(axis=1) | (opp_moves_final_pow.max(axis=1) <= own_moves_final_pow.max(axis=1)) | \
+            (safest_switch_idx == 0)
+        ret = np.where(attack, np.argmax(own_moves_final_pow, axis=1), gs.n_moves + safest_switch_idx)
+
+        ret = np.where(gs.cur_hp[rows, 1 - side, opp_of] > 0, ret, NO_ACTION)
+        ret = np.where(gs.cur_hp[rows, side, of] > 0, ret, game.random_actions(game.legal_actions(side)))
+
+        return np.where(game.needs_action(side), ret, NO_ACTION)
@@ -1,16 +1,92 @@
+import multiprocessing
+import queue
 import random
+from concurrent.futures import Executor, as_completed
 from typing import Callable
 
 import numpy as np
 
+from src.agents.Network import PopulationNetwork
 from src.agents.PlayerNN import PlayerNN
+from src.agents.TranspositionTable import TranspositionTable
+from src.game.EvalStatistics import wilson_interval
 from src.game.PokeGame import PokeGame
-from src.agents.nn_utils import initialize_nn, init_mutation_nn
+from src.agents.nn_utils import initialize_population, init_mutation_nn
+
+
+def pack_network(network: list[np.ndarray]) -> tuple[np.ndarray, list[tuple]]:
+    """ Weights of a network as a single flat array (one buffer to serialize to send it to another process) and the
+    shapes of its layers """
+
+    return np.concatenate([w.ravel() for w in network]), [w.shape for w in network]
+
+
+def unpack_network(flat: np.ndarray, shapes: list[tuple]) -> list[np.ndarray]:
+    """ Inverse of pack_network """
+
+    network, start = list(), 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        network.append(flat[start:start + size].reshape(shape))
+        start += size
+    return network
+
+
+def run_fitness(fitness_f: Callable, flat: np.ndarray, shapes: list[tuple], fitness_f_args: tuple) -> float:
+    """ Fitness of a packed network (executed by the workers of PlayerGA.evolution) """
+
+    return fitness_f(unpack_network(flat, shapes), *fitness_f_args)
+
+
+def island_neighbors(n_islands: int, topology: str | list[list[int]]) -> list[list[int]]:
+    """
+    :param topology: "ring" (each island sends its migrants to the next one), "complete" (to all the other ones) or
+        the list of the islands each island sends its migrants to
+    :return: islands each island sends its migrants to
+    """
+
+    if topology == "ring":
+        return [[(i + 1) % n_islands] for i in range(n_islands)]
+    elif topology == "complete":
+        return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+    return topology
+
+
+POLL_INTERVAL = 1.0  # seconds between two checks of the other processes of the island model while waiting for them
+
+
+def run_island(agent, island: int, seed: int, evolution_args: tuple, evolution_kwargs: dict, migration: tuple,
+               results) -> None:
+    """ Evolution of one population of the island model (executed by the processes of PlayerGA.island_evolution).
+    Sends (island, best network, its score, None) to results, or (island, None, None, exception) if the evolution
+    failed. """
+
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        network, score = agent.evolution(*evolution_args, migration=migration, **evolution_kwargs)
+    except Exception as e:
+        results.put((island, None, None, e))
+    else:
+        results.put((island, pack_network(network), score, None))
+
+
+def receive(inbox):
+    """ Next message of inbox, raising a RuntimeError if the process is an island whose parent (cf.
+    PlayerGA.island_evolution) stopped while waiting """
+
+    while True:
+        try:
+            return inbox.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            parent = multiprocessing.parent_process()
+            if parent is not None and not parent.is_alive():
+                raise RuntimeError("Island model stopped while waiting for migrants")
 
 
 class PlayerGA(PlayerNN):
-    def __init__(self, role, network: tuple[np.array] | list[np.array], act_f: str):
-        super().__init__(role, network, act_f)
+    def __init__(self, role, network: tuple[np.array] | list[np.array], act_f: str, tt: TranspositionTable = None):
+        super().__init__(role, network, act_f, tt)
 
     # Communication with game loop #
 
@@ -26,9 +102,13 @@ class PlayerGA(PlayerNN):
 
     def evolution(self, pop_size: int, init_mode: str, net_shape: list[int], n_gen: int, elite_prop: float,
                   fitness_f: Callable, fitness_f_args: tuple, mu_mean: float = 0, mu_std: float = 0.00001,
-                  display: bool = False, comm: list = None) -> list[list[np.array], float]:
+                  display: bool = False, comm: list = None, executor: Executor = None,
+                  population_fitness: bool = False, racing: tuple[int, int] = None,
+                  confidence: float = 0.95, migration: tuple = None) -> list[list[np.array], float]:
         """
-            Train the neural network with a genetic algorithm
+            Train the neural network with a genetic algorithm. The population is stored as stacked weights (cf.
+            PopulationNetwork), so that mutation is one random draw per layer for the whole generation and selection
+            an array of indices.
 
             :param pop_size: Size of the population
             :param init_mode: Algorithm for individuals initialization
@@ -42,40 +122,232 @@ class PlayerGA(PlayerNN):
             :param mu_std: Standard deviation of normal random distribution used for mutation term
             :param display: Display of progression
             :param comm: If provided, store intermediary results every 10 generations
+            :param executor: If provided (e.g., a ProcessPoolExecutor), fitness evaluations of a generation are run
+                concurrently by its workers, fitness_f and fitness_f_args being then sent to them (hence must be
+                picklable for a process pool)
+            :param population_fitness: If True, fitness_f evaluates the individuals of a generation at once: it receives
+                their stacked weights and returns their victory rates (e.g., GameEngine.population_test_mode)
+            :param racing: If provided, (games of the first round, maximum number of games of an individual): the elite
+                is selected by successive halving (cf. race) and fitness_f receives the number of games to play after
+                the network(s) and returns the number(s) of victories
+            :param confidence: Confidence with which the elite is identified in racing
+            :param migration: In the island model (cf. island_evolution), (migration interval in generations, number of
+                migrants, queue of the incoming migrants, queues of the islands migrants are sent to, number of islands
+                sending migrants to this one)
             :return: Network having achieved the best performance on the fitness function during the training and the
                 performance
         """
 
         # init population
-        population = list()
-        for _ in range(pop_size):
-            population.append([initialize_nn(net_shape, init_mode), -1.0])
+        population = initialize_population(pop_size, net_shape, init_mode)
+        scores = np.full(pop_size, -1.0)
+        wins, games = np.zeros(pop_size), np.zeros(pop_size, dtype=int)  # accumulated over generations in racing
+        elite_idx = max(round(pop_size * elite_prop), 1)
 
         # evolution phase
         c = int()
         while c < n_gen:
             # fitness computation and selection
-            for indiv in population:
-                if indiv[-1] < 0:
-                    indiv[1] = fitness_f(indiv[0], *fitness_f_args)
+            if racing is not None:
+                elite = self.race(population, wins, games, elite_idx, fitness_f, fitness_f_args, *racing, confidence,
+                                  executor, population_fitness)
+                scores = wins / np.maximum(games, 1)
+            else:
+                unscored = np.flatnonzero(scores < 0)
+                scores[unscored] = self.evaluate_fitness(population, unscored, fitness_f, fitness_f_args, executor,
+                                                         population_fitness)
+                elite = np.argsort(-scores, kind="stable")[:elite_idx]
 
-            elite_idx = max(round(len(population) * elite_prop), 1)
-            population = sorted(population, key=lambda x: x[1], reverse=True)[:elite_idx]
+            population, scores = [w[elite] for w in population], scores[elite]
+            wins, games = wins[elite], games[elite]
+            if migration is not None and not (c + 1) % migration[0]:
+                population, scores, wins, games = self.migrate(population, scores, wins, games, *migration[1:])
             if not c % max((n_gen // 10), 1) and display:
-                print("gen {}, score: {}".format(c, population[0][1]))
+                print("gen {}, score: {}".format(c, scores[0]))
 
             # store intermediary results
             if isinstance(comm, list) and not c % 10:
-                comm.append(population[0][1])
+                comm.append(scores[0])
 
             # mutation
-            softmax_vals = [np.exp(ind1[1]) / sum([np.exp(ind2[1]) for ind2 in population]) for ind1 in population]
-            for indiv in random.choices(population[:elite_idx], softmax_vals, k=(pop_size - elite_idx)):
-                new = list()
-                for l1, l2 in zip([np.copy(indiv[0][0]), np.copy(indiv[0][1])], init_mutation_nn(net_shape, mu_mean, mu_std)):
-                    new.append(l1 + l2)
-                population.append([new, -1])
+            softmax_vals = np.exp(scores) / np.exp(scores).sum()
+            parents = np.array(random.choices(range(elite_idx), softmax_vals, k=pop_size - elite_idx), dtype=int)
+            mutation = init_mutation_nn(net_shape, mu_mean, mu_std, len(parents))
+            population = [np.concatenate((w, w[parents] + m)) for w, m in zip(population, mutation)]
+            scores = np.concatenate((scores, np.full(len(parents), -1.0)))
+            wins = np.concatenate((wins, np.zeros(len(parents))))
+            games = np.concatenate((games, np.zeros(len(parents), dtype=int)))
             c += 1
 
-        self.network = population[0][0]
-        return population[0]
+        self.network = [np.copy(w[0]) for w in population]
+        return [self.network, float(scores[0])]
+
+    @staticmethod
+    def migrate(population: list[np.ndarray], scores: np.ndarray, wins: np.ndarray, games: np.ndarray, n_migrants: int,
+                inbox, outboxes: list, n_inbound: int) -> tuple[list[np.ndarray], np.ndarray, np.ndarray, np.ndarray]:
+        """
+            Sends the n_migrants best individuals of the elite (best first) to the islands of outboxes, then waits for
+            the migrants of the n_inbound islands sending theirs to this one, and keeps the best individuals among the
+            elite and the migrants (with their fitness and, in racing, their games)
+
+            :return: population, scores, wins and games of the new elite
+        """
+
+        migrants = [(*pack_network([w[i] for w in population]), scores[i], wins[i], games[i])
+                    for i in range(min(n_migrants, len(scores)))]
+        for outbox in outboxes:
+            outbox.put(migrants)
+
+        received = [m for _ in range(n_inbound) for m in receive(inbox)]
+        if not received:
+            return population, scores, wins, games
+
+        networks = [unpack_network(flat, shapes) for flat, shapes, *_ in received]
+        population = [np.concatenate((w, np.stack(layer))) for w, layer in zip(population, zip(*networks))]
+        scores, wins, games = [np.concatenate((a, [m[i] for m in received]))
+                               for i, a in enumerate((scores, wins, games), 2)]
+        best = np.argsort(-scores, kind="stable")[:len(scores) - len(received)]
+        return [w[best] for w in population], scores[best], wins[best], games[best].astype(int)
+
+    def island_evolution(self, n_islands: int, migration_interval: int, n_migrants: int, pop_size: int,
+                         init_mode: str, net_shape: list[int], n_gen: int, elite_prop: float, fitness_f: Callable,
+                         fitness_f_args: tuple, mu_mean: float = 0, mu_std: float = 0.00001,
+                         topology: str | list[list[int]] = "ring", seed: int = None,
+                         **evolution_kwargs) -> list[list[np.array], float]:
+        """
+            Island model: n_islands populations evolve in separate processes (cf. evolution), the best individuals of
+            each one migrating to the neighbour islands every migration_interval generations
+
+            :param n_migrants: Number of individuals sent by an island at each migration (at most the elite size)
+            :param topology: Islands each island sends its migrants to (cf. island_neighbors)
+            :param seed: Seed from which the seeds of the islands are derived (drawn at random if None)
+            :param evolution_kwargs: Other parameters of evolution (e.g., racing)
+            :return: Best network over all the islands and its performance. If an island fails, the other ones are
+                terminated and its exception is raised (RuntimeError if its process died without reporting)
+        """
+
+        seed = random.getrandbits(32) if seed is None else seed
+        neighbors = island_neighbors(n_islands, topology)
+        inboxes, results = [multiprocessing.Queue() for _ in range(n_islands)], multiprocessing.Queue()
+        evolution_args = (pop_size, init_mode, net_shape, n_gen, elite_prop, fitness_f, fitness_f_args, mu_mean, mu_std)
+
+        ps = list()
+        for i in range(n_islands):
+            migration = (migration_interval, n_migrants, inboxes[i], [inboxes[j] for j in neighbors[i]],
+                         sum(i in n for n in neighbors))
+            island_seed = int(np.random.SeedSequence([seed, i]).generate_state(1)[0])
+            ps.append(multiprocessing.Process(target=run_island, args=(self, i, island_seed, evolution_args,
+                                                                       evolution_kwargs, migration, results)))
+        for p in ps:
+            p.start()
+
+        done = list()
+        try:
+            while len(done) < n_islands:
+                try:
+                    island, packed, score, error = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    reported = {island for island, *_ in done}
+                    dead = [i for i, p in enumerate(ps) if i not in reported and p.exitcode is not None]
+                    if dead and results.empty():
+                        raise RuntimeError("Island {} exited with code {} without result".format(
+                            dead[0], ps[dead[0]].exitcode))
+                    continue
+                if error is not None:
+                    raise error
+                done.append((island, packed, score))
+        finally:
+            for p in ps:
+                if p.is_alive():
+                    p.terminate()
+            for p in ps:
+                p.join()
+
+        island, packed, score = max(done, key=lambda x: (x[2], -x[0]))
+        self.network = [np.copy(w) for w in unpack_network(*packed)]
+        return [self.network, score]
+
+    @staticmethod
+    def evaluate_fitness(population: list[np.ndarray], indices: np.ndarray, fitness_f: Callable, fitness_f_args: tuple,
+                         executor: Executor = None, population_fitness: bool = False) -> np.ndarray:
+        """ Results of fitness_f for the individuals of population at indices (cf. evolution for the parameters) """
+
+        if population_fitness:
+            return np.asarray(fitness_f([w[indices] for w in population], *fitness_f_args), dtype=float)
+
+        if executor is None:
+            return np.array([fitness_f([w[i] for w in population], *fitness_f_args) for i in indices], dtype=float)
+
+        ret = np.empty(len(indices))
+        futures = {executor.submit(run_fitness, fitness_f, *pack_network([w[i] for w in population]),
+                                   fitness_f_args): j for j, i in enumerate(indices)}
+        for future in as_completed(futures):
+            ret[futures[future]] = future.result()
+        return ret
+
+    def race(self, population: list[np.ndarray], wins: np.ndarray, games: np.ndarray, n_elite: int, fitness_f: Callable,
+             fitness_f_args: tuple, min_games: int, max_games: int, confidence: float = 0.95,
+             executor: Executor = None, population_fitness: bool = False) -> np.ndarray:
+        """
+            Successive halving: all the individuals play until they have min_games games, then the worse half of them is
+            eliminated and the others play until they have twice as many games, and so on until n_elite individuals
+            remain, the Wilson intervals of the victory rates of the n_elite best ones are above the ones of the
+            others, or the survivors have played max_games games. Individuals already having played games (e.g., elite
+            of the previous generation) only play the missing ones.
+
+            :param wins: victories of each individual, updated in place
+            :param games: games played by each individual, updated in place
+            :return: indices of the n_elite best individuals, best first
+        """
+
+        if not 1 <= min_games <= max_games:
+            raise ValueError("Racing requires 1 <= min_games <= max_games (got {} and {})".format(min_games, max_games))
+
+        survivors, target = np.arange(len(games)), min_games
+        while True:
+            need = np.maximum(target - games[survivors], 0)
+            for n in np.unique(need[need > 0]):
+                idx = survivors[need == n]
+                wins[idx] += self.evaluate_fitness(population, idx, fitness_f, (int(n), *fitness_f_args), executor,
+                                                   population_fitness)
+                games[idx] += n
+
+            rates = wins[survivors] / games[survivors]
+            survivors = survivors[np.argsort(-rates, kind="stable")]
+            if len(survivors) <= n_elite or target >= max_games:
+                return survivors[:n_elite]
+
+            intervals = [wilson_interval(int(wins[i]), int(games[i]), confidence) for i in survivors]
+            if min(low for low, _ in intervals[:n_elite]) > max(high for _, high in intervals[n_elite:]):
+                return survivors[:n_elite]
+
+            survivors = survivors[:max(len(survivors) // 2, n_elite)]
+            target = min(2 * target, max_games)
+
+
+class PlayerGAPopulation(PlayerNN):
+    """
+        Population of individuals of a genetic algorithm playing a batch of games (cf. BatchedPokeGame), each game being
+        played by one of them with the greedy selection of PlayerNN. The states of all the games are evaluated at once
+        (cf. PopulationNetwork). Only plays with the batched engine.
+    """
+
+    def __init__(self, role, population: list[np.ndarray], act_f: str, individuals: np.ndarray):
+        """
+        :param population: stacked weights of the individuals (cf. PopulationNetwork)
+        :param individuals: individual playing each game of the batch
+        """
+
+        super().__init__(role, population, act_f)
+        self.individuals = individuals
+
+    @property
+    def network(self) -> list[np.ndarray]:
+        return self.net.weights
+
+    @network.setter
+    def network(self, network: list[np.ndarray]):
+        self.net = PopulationNetwork(network, self.act_f_name)
+
+    def forward_pass_batch(self, states: np.ndarray, games: np.ndarray = None) -> np.ndarray:
+        return self.net.predict(states, self.individuals[games])
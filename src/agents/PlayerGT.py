@@ -4,9 +4,10 @@ from statistics import stdev
 from copy import deepcopy
 
 import numpy as np
-import nashpy as nash
 
 from src.agents.AbstractPlayer import AbstractPlayer
+from src.agents.nash_solvers import solve
+from src.agents.TranspositionTable import TranspositionTable
 from src.game.GameEstimation import fill_game_with_estimation
 from src.game.PokeGame import PokeGame
 
@@ -22,9 +23,23 @@ class PlayerGT(AbstractPlayer):
         Nash equilibrium of the game
     """
 
-    def __init__(self, role: str):
+    def __init__(self, role: str, force_dmg: float | str = 0.95, tt: TranspositionTable = None,
+                 solver: str = "enumeration"):
+        """
+        :param role: "p1" or "p2"
+        :param force_dmg: damage random factor used to compute payoffs (cf. PokeGame.damage_formula), the default value
+            gives a pessimistic estimation, "expected" uses expected damage
+        :param tt: transposition table storing payoff matrices of already seen states (possibly shared with other
+            agents). Only used if payoffs are deterministic (force_dmg not random)
+        :param solver: algorithm searching the Nash equilibria (cf. nash_solvers.solve): "enumeration" (all of them),
+            "lemke-howson" or "lp" (one of them, polynomial)
+        """
+
         super().__init__(role)
         self.role = role
+        self.force_dmg = force_dmg
+        self.tt = tt
+        self.solver = solver
         self.game = None
         self.payoff_mat = None
 
@@ -50,10 +65,15 @@ class PlayerGT(AbstractPlayer):
         """
 
         p1_view, p2_view = self.game.player1_view, self.game.player2_view
-        if self.role == "p1":
-            p2_view_p1_of, p2_view_p2_of = p2_view.on_field1, p2_view.on_field2
-        else:
-            p1_view_p1_of, p1_view_p2_of = p1_view.on_field1, p1_view.on_field2
+
+        key = None
+        deterministic = self.force_dmg == "expected" or 0.85 <= self.force_dmg <= 1
+        if self.tt is not None and deterministic:
+            key = ("gt", self.role, self.force_dmg, p1_view.zobrist, p2_view.zobrist)
+            payoff_mat = self.tt.get(key)
+            if payoff_mat is not None:
+                self.payoff_mat = {p1_mv: dict(line) for p1_mv, line in payoff_mat.items()}
+                return
 
         force_order = self.role != "p1"
         self.payoff_mat = dict()
@@ -61,29 +81,144 @@ class PlayerGT(AbstractPlayer):
         p1_ops = [m for m in self.game.get_moves_from_state("p1", p1_view) if m is not None]
         p2_ops = [m for m in self.game.get_moves_from_state("p2", p2_view) if m is not None]
 
-        for p1_mv in p1_ops:
-            if p1_mv not in self.payoff_mat.keys():
-                self.payoff_mat[p1_mv] = dict()
+        # our actions in the view of the opponent
+        if self.role == "p1":
+            for_opp = {m: self.translate_action(m, p1_view.team1, p1_view.on_field1, p2_view.team1,
+                                                p2_view.on_field1) for m in p1_ops}
+        else:
+            for_opp = {m: self.translate_action(m, p2_view.team2, p2_view.on_field2, p1_view.team2,
+                                                p1_view.on_field2) for m in p2_ops}
+
+        if deterministic:
+            p1_po, p2_po = self.payoff_arrays(p1_ops, p2_ops, for_opp, force_order)
+        else:
+            p1_po, p2_po = self.simulated_payoff_arrays(p1_ops, p2_ops, for_opp, force_order)
+
+        for p1_mv, p1_line, p2_line in zip(p1_ops, p1_po.tolist(), p2_po.tolist()):
+            self.payoff_mat[p1_mv] = {p2_mv: (round(po1, 3), round(po2, 3))
+                                      for p2_mv, po1, po2 in zip(p2_ops, p1_line, p2_line)}
+
+        if key is not None:
+            self.tt.put(key, {p1_mv: dict(line) for p1_mv, line in self.payoff_mat.items()})
+
+    def payoff_arrays(self, p1_ops: list[int], p2_ops: list[int], for_opp: dict,
+                      force_order: bool) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Payoffs of both players for all the pairs of actions at once, with deterministic damage (force_dmg)
+
+            :param for_opp: actions of the player in the view of the opponent (cf. translate_action)
+            :param force_order: order of the attacks in case of speed tie in the view of p1 (reversed in the view of p2)
+            :return: payoffs of p1 (in its view) and p2 (in its view), one line per action of p1 and one column per
+                action of p2
+        """
 
-            for p2_mv in p2_ops:
+        # actions of both players in the view of each of them
+        p1_opp, p2_opp = p1_ops, p2_ops
+        if self.role == "p1":
+            p1_opp = [for_opp[m] for m in p1_ops]
+        else:
+            p2_opp = [for_opp[m] for m in p2_ops]
+
+        return (self.view_payoffs(self.game.player1_view, np.array(p1_ops, dtype=int), np.array(p2_opp, dtype=int),
+                                  force_order, "p1"),
+                self.view_payoffs(self.game.player2_view, np.array(p1_opp, dtype=int), np.array(p2_ops, dtype=int),
+                                  not force_order, "p2"))
+
+    def view_payoffs(self, view: PokeGame.GameStruct, p1_actions: np.ndarray, p2_actions: np.ndarray,
+                     force_order: bool, player: str) -> np.ndarray:
+        """
+            Payoffs of player (cf. compute_player_payoff) in the states reached from view by each pair of actions. The
+            damage of each move of the Pokémon on field against each Pokémon of the opposing team is computed once, the
+            hp of the Pokémon on field after the moves being then derived for all the pairs with broadcasting (only
+            these Pokémon can lose hp, and only the Pokémon on field attack).
+
+            :return: one line per action of p1 and one column per action of p2
+        """
+
+        n_moves = len(view.on_field1.moves)
+        hp1, hp2 = np.array([p.cur_hp for p in view.team1]), np.array([p.cur_hp for p in view.team2])
+        o1, o2 = [p.name for p in view.team1].index(view.on_field1.name), \
+            [p.name for p in view.team2].index(view.on_field2.name)
+
+        # Pokémon on field after the switches and moves used (n_moves: no move) for each action
+        switch1, switch2 = p1_actions >= n_moves, p2_actions >= n_moves
+        post1, post2 = np.where(switch1, p1_actions - n_moves, o1), np.where(switch2, p2_actions - n_moves, o2)
+        move1, move2 = np.where(switch1, n_moves, p1_actions), np.where(switch2, n_moves, p2_actions)
+
+        # dmg_x[m, t]: damage of move m of Pokémon on field x against Pokémon t of the opposing team, only for the moves
+        # used and the Pokémon that can be on field after the moves (others may be unknown)
+        dmg_1, dmg_2 = np.zeros((n_moves + 1, len(view.team2))), np.zeros((n_moves + 1, len(view.team1)))
+        for dmg, attacker, team, moves, targets in ((dmg_1, view.on_field1, view.team2, move1, post2),
+                                                    (dmg_2, view.on_field2, view.team1, move2, post1)):
+            targets = set(targets.tolist())
+            for m in set(moves.tolist()) - {n_moves}:
+                for t in targets:
+                    dmg[m, t] = self.game.damage_formula(attacker.moves[m], attacker, team[t], self.force_dmg)
+
+        # hp of the Pokémon on field after the moves, lines: p1 actions, columns: p2 actions
+        pre_hp1, pre_hp2 = hp1[post1][:, None], hp2[post2][None, :]
+        post_hp1 = np.maximum(pre_hp1 - dmg_2[move2[None, :], post1[:, None]], 0)
+        post_hp2 = np.maximum(pre_hp2 - dmg_1[move1[:, None], post2[None, :]], 0)
+
+        # second attacker must be alive to attack (if the first one does not attack, it is not affected)
+        spe1, spe2 = view.on_field1.spe, view.on_field2.spe
+        if spe1 > spe2 or spe1 == spe2 and force_order:
+            post_hp1 = np.where(post_hp2 > 0, post_hp1, pre_hp1)
+        else:
+            post_hp2 = np.where(post_hp1 > 0, post_hp2, pre_hp2)
+
+        p1_hp, p2_hp = hp1.sum() - pre_hp1 + post_hp1, hp2.sum() - pre_hp2 + post_hp2
+        p1_alive = (hp1 > 0).sum() - (pre_hp1 > 0) + (post_hp1 > 0)
+        p2_alive = (hp2 > 0).sum() - (pre_hp2 > 0) + (post_hp2 > 0)
+        p1_max, p2_max = sum([p.hp for p in view.team1]), sum([p.hp for p in view.team2])
+
+        return (-1) ** (player == "p2") * ((5 * p1_hp / p1_max) + (5 * p1_alive / len(view.team1))) + \
+            (-1) ** (player == "p1") * ((5 * p2_hp / p2_max) + (5 * p2_alive / len(view.team2)))
+
+    def simulated_payoff_arrays(self, p1_ops: list[int], p2_ops: list[int], for_opp: dict,
+                                force_order: bool) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Same as payoff_arrays, each pair of actions being applied to the views (random damage being drawn for each
+            pair)
+        """
+
+        p1_view, p2_view = self.game.player1_view, self.game.player2_view
+        p1_po, p2_po = np.empty((len(p1_ops), len(p2_ops))), np.empty((len(p1_ops), len(p2_ops)))
+
+        for i, p1_mv in enumerate(p1_ops):
+            for j, p2_mv in enumerate(p2_ops):
 
-                # our moves that opponent doesn't know are considered generic moves ("notype") for them
                 if self.role == "p1":
-                    m1_for_p1, m2_for_p1, m2_for_p2 = p1_mv, p2_mv, p2_mv
-                    m1_for_p2 = p1_mv if "switch" in p1_mv or p1_mv in (m.name for m in
-                                                                        p2_view_p1_of.moves) else "light_notype"
+                    m1_for_p1, m2_for_p1, m2_for_p2, m1_for_p2 = p1_mv, p2_mv, p2_mv, for_opp[p1_mv]
                 else:
-                    m1_for_p2, m2_for_p2, m1_for_p1 = p1_mv, p2_mv, p1_mv
-                    m2_for_p1 = p2_mv if "switch" in p2_mv or p2_mv in (m.name for m in
-                                                                        p1_view_p2_of.moves) else "light_notype"
+                    m1_for_p2, m2_for_p2, m1_for_p1, m2_for_p1 = p1_mv, p2_mv, p1_mv, for_opp[p2_mv]
+
+                # force_order: pessimistic estimation for both sides (views are restored after evaluation)
+                undo = self.game.apply_player_moves_undoable(p1_view, m1_for_p1, m2_for_p1, self.force_dmg, force_order)
+                p1_po[i, j] = self.compute_player_payoff(p1_view, "p1")
+                self.game.undo_player_moves(p1_view, undo)
+                undo = self.game.apply_player_moves_undoable(p2_view, m1_for_p2, m2_for_p2, self.force_dmg,
+                                                             not force_order)
+                p2_po[i, j] = self.compute_player_payoff(p2_view, "p2")
+                self.game.undo_player_moves(p2_view, undo)
+
+        return p1_po, p2_po
+
+    @staticmethod
+    def translate_action(action: int, own_team: list, own_of, opp_view_team: list, opp_view_of) -> int:
+        """
+            Convert an action of the player to the corresponding action in the view of the opponent, where Pokémon and
+            moves may be stored in other slots. A switch targets the slot of the same Pokémon and our moves that the
+            opponent doesn't know are considered generic moves ("notype") for them.
+        """
 
-                # force_order: pessimistic estimation for both sides
-                p1_po = self.compute_player_payoff(self.game.apply_player_moves(deepcopy(p1_view), m1_for_p1,
-                                                                                m2_for_p1, 0.95, force_order), "p1")
-                p2_po = self.compute_player_payoff(self.game.apply_player_moves(deepcopy(p2_view), m1_for_p2,
-                                                                                m2_for_p2, 0.95, not force_order), "p2")
+        n_moves = len(own_of.moves)
+        if action >= n_moves:
+            return n_moves + [p.name for p in opp_view_team].index(own_team[action - n_moves].name)
 
-                self.payoff_mat[p1_mv][p2_mv] = (round(p1_po, 3), round(p2_po, 3))
+        opp_view_names = [m.name for m in opp_view_of.moves]
+        name = own_of.moves[action].name
+        return opp_view_names.index(name if name in opp_view_names else "light_notype")
 
     def remove_strictly_dominated_strategies(self):
         """
@@ -174,6 +309,7 @@ class PlayerGT(AbstractPlayer):
             (1, 0), (0, 1), (0.5, 0.5), they all have same arithmetic mean but only the last one has null stdev,
             and it is reasonable to consider that last choice as a good compromise between the individually best and
             worst possible outcomes. Finally, if several NE still remain, a random selection is performed.
+            Equilibria are searched with the solver of the agent (a closed form is used for 1xN and 2x2 games).
 
             :return: probability distribution over the choices of each player corresponding to the NE and the related
                 expected payoffs
@@ -183,17 +319,15 @@ class PlayerGT(AbstractPlayer):
         mat = self.payoff_mat
         p1_poffs = np.array([[mat[k1][k2][0] for k2 in mat[k1].keys()] for k1 in mat.keys()])
         p2_poffs = np.array([[mat[k1][k2][1] for k2 in mat[k1].keys()] for k1 in mat.keys()])
-        game = nash.Game(p1_poffs, p2_poffs)
-        neq = list(game.support_enumeration())
+        neq = solve(p1_poffs, p2_poffs, self.solver)
 
         if not len(neq) % 2:  # if game is degenerate, remove dominated strategies
             self.remove_dominated_strategies()
             mat = self.payoff_mat
             p1_poffs = np.array([[mat[k1][k2][0] for k2 in mat[k1].keys()] for k1 in mat.keys()])
             p2_poffs = np.array([[mat[k1][k2][1] for k2 in mat[k1].keys()] for k1 in mat.keys()])
-            game = nash.Game(p1_poffs, p2_poffs)
-            neq = list(game.support_enumeration())
-        exp_payoffs = [game[p1_po, p2_po] for p1_po, p2_po in neq]
+            neq = solve(p1_poffs, p2_poffs, self.solver)
+        exp_payoffs = [np.array([p1_po @ p1_poffs @ p2_po, p1_po @ p2_poffs @ p2_po]) for p1_po, p2_po in neq]
 
         # If no NE returned, rest of this function will consider all pure strategies in place of equilibria
         if not neq:
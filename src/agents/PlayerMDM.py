@@ -1,6 +1,9 @@
 import random
 
+import numpy as np
+
 from src.agents.AbstractPlayer import AbstractPlayer
+from src.game.BatchedPokeGame import BatchedPokeGame, NO_ACTION
 from src.game.PokeGame import PokeGame
 from src.game.constants import TYPE_CHART
 
@@ -29,6 +32,23 @@ class PlayerMDM(AbstractPlayer):
             for m in own_of.moves:
                 moves_final_pow += [m.base_pow * TYPE_CHART[
                     m.move_type][other_of.poke_type] * (1 + 0.5 * (m.move_type == own_of.poke_type))]
-            ret = own_of.moves[max(enumerate(moves_final_pow), key=lambda x: x[1])[0]].name
+            ret = max(enumerate(moves_final_pow), key=lambda x: x[1])[0]
 
         return ret
+
+    def make_moves(self, game: BatchedPokeGame) -> np.ndarray:
+        """ Batched version of make_move: action of the player in each game of the batch """
+
+        side = 0 if self.role == "p1" else 1
+        gs, rows = game.game_state, np.arange(len(game))
+        of, opp_of = gs.on_field[:, side], gs.on_field[:, 1 - side]
+        own_type, opp_type = gs.poke_type[rows, side, of], gs.poke_type[rows, 1 - side, opp_of]
+
+        moves_final_pow = game.moves_final_pow(gs.move_type[rows, side, of], gs.move_pow[rows, side, of],
+                                               own_type[:, None], opp_type[:, None])
+        ret = np.where(gs.cur_hp[rows, 1 - side, opp_of] > 0, np.argmax(moves_final_pow, axis=1), NO_ACTION)
+
+        # must switch
+        ret = np.where(gs.cur_hp[rows, side, of] > 0, ret, game.random_actions(game.legal_actions(side)))
+
+        return np.where(game.needs_action(side), ret, NO_ACTION)
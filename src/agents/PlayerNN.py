@@ -1,7 +1,9 @@
 import numpy as np
 
 from src.agents.AbstractPlayer import AbstractPlayer
-from src.agents.nn_utils import sigmoid, sigmoid_gradient, hyperbolic_tangent, h_tangent_gradient, relu, relu_gradient
+from src.agents.Network import Network
+from src.agents.TranspositionTable import TranspositionTable
+from src.game.BatchedPokeGame import BatchedPokeGame, NO_ACTION
 from src.game.PokeGame import PokeGame
 
 
@@ -11,16 +13,30 @@ class PlayerNN(AbstractPlayer):
         implements a greedy move selection algorithm.
     """
 
-    def __init__(self, role, network: tuple[np.array] | list[np.array], act_f: str):
+    def __init__(self, role, network: tuple[np.array] | list[np.array], act_f: str, tt: TranspositionTable = None):
+        """
+        :param tt: transposition table storing evaluations of states (possibly shared with other agents). If None,
+            states are always evaluated
+        """
+
         super().__init__(role)
 
+        self.act_f_name = act_f
         self.network = network
-        self.act_f, self.grad = {"sigmoid": (sigmoid, sigmoid_gradient),
-                                 "hyperbolic tangent": (hyperbolic_tangent, h_tangent_gradient),
-                                 "ReLU": (relu, relu_gradient)}[act_f]
+        self.tt = tt
+
+    @property
+    def network(self) -> list[np.ndarray]:
+        """ Weights of the network (cf. Network) """
+
+        return self.net.weights
+
+    @network.setter
+    def network(self, network: list[np.ndarray]):
+        self.net = Network(network, self.act_f_name)
 
     # Communication with game loop #
-    def make_move(self, game: PokeGame) -> str | None:
+    def make_move(self, game: PokeGame) -> int | None:
         """
             Use knowledge of the network to select a move in a greedy strategy.
         """
@@ -41,32 +57,107 @@ class PlayerNN(AbstractPlayer):
         """ Use the knowledge of the network to make an estimation of the victory probability of the first player
         for a provided game state. """
 
-        w_int = self.network[0]
-        w_out = self.network[1]
-        p_int = self.act_f(np.dot(w_int, state))
-        p_out = sigmoid(p_int.dot(w_out))
+        return self.net.predict(state)
+
+    def forward_pass_batch(self, states: np.ndarray, games: np.ndarray = None) -> np.ndarray:
+        """ forward_pass for several states at once (one state per line)
+
+        :param games: index in the batched game of the game of each state (only used by agents whose network depends on
+            the game, cf. PlayerGAPopulation) """
+
+        return self.net.predict(states)
+
+    def evaluate_options(self, game: PokeGame, view: PokeGame.GameStruct, own_options: list,
+                         opp_options: list) -> np.ndarray:
+        """
+            Evaluates the states reached from view by each pair of options of the player and the opponent, all the states
+            missing from the transposition table being evaluated with a single forward_pass_batch
 
-        return p_out
+            :return: array of the evaluations, one line per option of the player and one column per option of the
+                opponent
+        """
 
-    def move_selector(self, game: PokeGame) -> str:
-        """ Returns the move evaluated as most promising
+        p = np.empty(len(own_options) * len(opp_options))
+        states, missing, keys = list(), list(), list()
+        for i, (pmv, omv) in enumerate((pmv, omv) for pmv in own_options for omv in opp_options):
+            p1mv, p2mv = (pmv, omv) if self.role == "p1" else (omv, pmv)
+            # moves are applied then undone on the same copy of the view
+            undo = game.apply_player_moves_undoable(view, p1mv, p2mv)
+            if self.tt is not None:
+                # entries hold a reference to the network, so that its id cannot be reused by another one while they
+                # exist
+                key = (id(self.network), view.zobrist)
+                entry = self.tt.get(key)
+                if entry is not None and entry[0] is self.network:
+                    p[i] = entry[1]
+                else:
+                    states.append(game.get_numeric_repr(view))
+                    missing.append(i)
+                    keys.append(key)
+            else:
+                states.append(game.get_numeric_repr(view))
+                missing.append(i)
+            game.undo_player_moves(view, undo)
+
+        if states:
+            p[missing] = self.forward_pass_batch(np.array(states))
+            if self.tt is not None:
+                for key, v in zip(keys, p[missing]):
+                    self.tt.put(key, (self.network, v), tag=id(self.network))
+
+        return p.reshape(len(own_options), len(opp_options))
+
+    def move_selector(self, game: PokeGame) -> int:
+        """ Returns the move evaluated as most promising: the one with the "least bad" worst outcome (depending on
+        opponent options)
 
         :returns: action of the player """
 
-        min_lines = list()  # worst outcome for each player option (depending on opponent options)
         pl, opp = ["p1", "p2"][::(-1) ** (self.role == "p2")]
-        view = game.player1_view if self.role == "p1" else game.player2_view
+        view = game.get_player_view(self.role)
+        if self.tt is not None:
+            view.zobrist  # computed once, then updated incrementally by the moves
+
+        own_options = game.get_moves_from_state(pl, view)
+        p = self.evaluate_options(game, view, own_options, game.get_moves_from_state(opp, view))
+
+        return own_options[int(np.argmax(p.min(axis=1)))]
+
+    def make_moves(self, game: BatchedPokeGame) -> np.ndarray:
+        """
+            Batched version of make_move: same greedy selection, all the (player, opponent) options of all the games of
+            the batch being simulated and evaluated at once. The simulation uses the player view of the batched game.
+        """
+
+        side = 0 if self.role == "p1" else 1
+        idx = np.flatnonzero(game.needs_action(side))
+        ret = np.full(len(game), NO_ACTION)
+        if not len(idx):
+            return ret
+
+        ret[idx] = self.moves_selector(game, game.get_player_view(side).take(idx), idx)
+        return ret
+
+    def moves_selector(self, game: BatchedPokeGame, view, games: np.ndarray) -> np.ndarray:
+        """ Batched version of move_selector, for the games of the provided views
+
+        :param games: indices in game of the games of view
+        :returns: actions of the player """
+
+        side, n_actions = 0 if self.role == "p1" else 1, game.n_actions
+        own_legal, opp_legal = game.legal_actions(side, view), game.legal_actions(1 - side, view)
 
-        # iterate through possible options for the player and keep the "least bad"
-        for pmv in game.get_moves_from_state(pl, view):
-            min_lines += [(None, 1)]
-            for omv in game.get_moves_from_state(opp, view):
-                p1mv, p2mv = (pmv, omv) if self.role == "p1" else (omv, pmv)
-                s = game.get_numeric_repr(game.apply_player_moves(game.get_player_view(self.role), p1mv, p2mv))
-                p = self.forward_pass(s)
-                if p < min_lines[-1][1]:
-                    min_lines[-1] = (pmv, p)
+        # one simulated state per game and pair of options
+        g, own_opt, opp_opt = np.nonzero(own_legal[:, :, None] & opp_legal[:, None, :])
+        sim = view.take(g)
+        actions = np.empty((len(g), 2), dtype=np.intp)
+        actions[:, side] = game.action_codes(own_opt, n_actions)
+        actions[:, 1 - side] = game.action_codes(opp_opt, n_actions)
+        game.apply_actions(sim, actions, game.rng)
 
-        best_move = max(min_lines, key=lambda x: x[1])[0]
+        p = np.full(own_legal.shape + opp_legal.shape[1:], np.inf)
+        p[g, own_opt, opp_opt] = self.forward_pass_batch(game.get_numeric_repr(sim), games[g])
 
-        return best_move
+        # worst outcome for each player option, then "least bad" option
+        min_lines = np.where(own_legal, p.min(axis=2), -np.inf)
+        return game.action_codes(np.argmax(min_lines, axis=1), n_actions)
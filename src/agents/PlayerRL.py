@@ -1,13 +1,16 @@
 import random
 import numpy as np
 from src.agents.PlayerNN import PlayerNN
-from src.agents.nn_utils import sigmoid_gradient
+from src.agents.ReplayBuffer import ReplayBuffer
+from src.agents.TranspositionTable import TranspositionTable
+from src.game.BatchedPokeGame import BatchedPokeGame
 from src.game.PokeGame import PokeGame
 
 
 class PlayerRL(PlayerNN):
 
-    def __init__(self, role: str, mode: str, network: tuple, ls: str, act_f: str, eps: float, lr: float):
+    def __init__(self, role: str, mode: str, network: tuple, ls: str, act_f: str, eps: float, lr: float,
+                 tt: TranspositionTable = None, replay: ReplayBuffer = None, batch_size: int = 32, train_every: int = 1):
         """
         ML agent for the game, using ML methods to play and learn the game.
 
@@ -18,9 +21,15 @@ class PlayerRL(PlayerNN):
         :param act_f: activation function for the network
         :param eps: random factor
         :param lr: learning rate
+        :param tt: transposition table (entries of the network invalidated at each update of the weights, the ones of
+            the other agents sharing it being kept)
+        :param replay: in train mode, buffer the transitions are stored in (possibly shared with other agents). If None,
+            weights are updated online with each transition
+        :param batch_size: number of transitions sampled from replay for each update
+        :param train_every: number of transitions stored in replay between two updates
         """
 
-        super().__init__(role, network, act_f)
+        super().__init__(role, network, act_f, tt)
 
         self.eps = eps
         self.move_selection = self.move_selector
@@ -30,13 +39,17 @@ class PlayerRL(PlayerNN):
             self.backpropagation = {"SARSA": self.sarsa_backpropagation}[ls]
             # save computed information to reuse for backtracking after receiving new state
             self.cur_state = None
+            self.replay = replay
+            self.batch_size = batch_size
+            self.train_every = train_every
+            self.n_transitions = 0
 
         else:  # test or match
             self.ls = self.lr = None
 
     # Communication with game loop #
 
-    def make_move(self, game: PokeGame) -> str | None:
+    def make_move(self, game: PokeGame) -> int | None:
         """ Generate all states reachable from current state and convert in numeric representation to choose a move
 
         :returns: Selected move """
@@ -54,7 +67,7 @@ class PlayerRL(PlayerNN):
 
     # Moves ranking #
 
-    def move_selector(self, game: PokeGame) -> str:
+    def move_selector(self, game: PokeGame) -> int:
         """ Returns the move evaluated as most promising or a random one at a frequency of self.eps (epsilon-greedy)
 
         :returns: action of the player """
@@ -74,6 +87,19 @@ class PlayerRL(PlayerNN):
 
         return move
 
+    def moves_selector(self, game: BatchedPokeGame, view, games: np.ndarray) -> np.ndarray:
+        """ Batched version of move_selector (epsilon-greedy)
+
+        :returns: actions of the player """
+
+        moves = super().moves_selector(game, view, games)
+
+        # random move (options of the opponent do not depend on the player option, so a random pair of options
+        # amounts to a random player option)
+        explore = game.rng.random(len(moves)) < self.eps
+        legal = game.legal_actions(0 if self.role == "p1" else 1, view)
+        return np.where(explore, game.random_actions(legal), moves)
+
     # Learning algorithms #
 
     def sarsa_backpropagation(self, game_state: list[int], game_finished: bool, p1_victory: bool):
@@ -85,16 +111,34 @@ class PlayerRL(PlayerNN):
         :param p1_victory: if game_state is an end state, indicates the victory of player 1
         """
 
-        cur_prob = self.forward_pass(self.cur_state)
-        cmp_prob = self.forward_pass(game_state) if not game_finished else p1_victory
-        delta = cur_prob - cmp_prob
-        w_int = self.network[0]
-        w_out = self.network[1]
-        p_int = self.act_f(np.dot(w_int, self.cur_state))
-        p_out = self.act_f(p_int.dot(w_out))
-        grad_out = sigmoid_gradient(p_out)
-        grad_int = self.grad(p_int)
-        delta_int = grad_out * w_out * grad_int
-
-        w_int -= self.lr * delta * np.outer(delta_int, self.cur_state)
-        w_out -= self.lr * delta * grad_out * p_int
+        if self.replay is not None:
+            self.replay.add(self.cur_state, game_state, game_finished, p1_victory)
+            self.n_transitions += 1
+            if not self.n_transitions % self.train_every and len(self.replay) >= self.batch_size:
+                self.replay_update()
+            return
+
+        if game_finished:
+            activations = self.net.forward([self.cur_state])
+            cmp_prob = p1_victory
+        else:
+            # current and next states go through the network together, the activations of the next state being only
+            # needed for its estimation
+            activations = self.net.forward([self.cur_state, game_state])
+            cmp_prob = activations[-1][1]
+            activations = [a[:1] for a in activations]
+        self.net.backward(activations, activations[-1] - cmp_prob, self.lr)
+        if self.tt is not None:
+            self.tt.invalidate(id(self.network))
+
+    def replay_update(self):
+        """ SARSA update on a minibatch of transitions sampled from the replay buffer (the estimations of the next states
+        being the ones of the network before the update) """
+
+        states, next_states, terminal, rewards = self.replay.sample(self.batch_size)
+        activations = self.net.forward(np.concatenate((states, next_states)))
+        cmp_prob = np.where(terminal, rewards, activations[-1][self.batch_size:])
+        activations = [a[:self.batch_size] for a in activations]
+        self.net.backward(activations, activations[-1] - cmp_prob, self.lr)
+        if self.tt is not None:
+            self.tt.invalidate(id(self.network))
@@ -1,6 +1,9 @@
 import random
 
+import numpy as np
+
 from src.agents.AbstractPlayer import AbstractPlayer
+from src.game.BatchedPokeGame import BatchedPokeGame, NO_ACTION
 
 
 class PlayerRandom(AbstractPlayer):
@@ -14,3 +17,9 @@ class PlayerRandom(AbstractPlayer):
     def make_move(self, game):
 
         return random.choice(game.get_moves_from_state(self.role, game.get_cur_state()))
+
+    def make_moves(self, game: BatchedPokeGame) -> np.ndarray:
+        """ Batched version of make_move: action of the player in each game of the batch """
+
+        side = 0 if self.role == "p1" else 1
+        return np.where(game.needs_action(side), game.random_actions(game.legal_actions(side)), NO_ACTION)
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+        Ring buffer of the transitions (state, next state, terminal, reward) experienced by reinforcement learning
+        agents, stored in preallocated float32 arrays (one line per transition) so that minibatches can be sampled and
+        sent through the network at once. When full, the oldest transition is replaced.
+    """
+
+    def __init__(self, capacity: int = 10000, n_input: int = 66):
+        """
+        :param n_input: size of the numeric representations of the states (input layer of the networks)
+        """
+
+        self.capacity = capacity
+        self.states = np.zeros((capacity, n_input), dtype=np.float32)
+        self.next_states = np.zeros((capacity, n_input), dtype=np.float32)
+        self.terminal = np.zeros(capacity, dtype=bool)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.pos = 0  # index of the next transition to be written
+        self.size = 0
+
+    def add(self, state, next_state, terminal: bool, reward: float) -> None:
+        """
+        :param reward: outcome of the game if next_state is an end state (1 for a victory of the first player), ignored
+            otherwise
+        """
+
+        self.states[self.pos] = state
+        self.next_states[self.pos] = next_state
+        self.terminal[self.pos] = terminal
+        self.rewards[self.pos] = reward if terminal else 0.0
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: states, next states, terminal flags and rewards of n transitions drawn uniformly (with replacement)
+        """
+
+        idx = np.random.randint(0, self.size, n)
+        return self.states[idx], self.next_states[idx], self.terminal[idx], self.rewards[idx]
+
+    def __len__(self):
+        return self.size
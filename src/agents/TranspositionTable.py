@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    """
+        Bounded cache of evaluations of game states, meant to be shared by search agents so that states reached several
+        times (e.g. both sides switching back and forth) are evaluated once. Keys are built by the agents from the
+        Zobrist hash of the state (cf. PokeGame.GameStruct.zobrist) and whatever the evaluation depends on. When full,
+        the least recently used entry is replaced. Entries can be tagged (e.g., with the network they were computed
+        with) so that the ones of a tag are removed together while the others are kept.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.tagged = dict()  # keys of the entries of each tag
+        self.tags = dict()  # tag of each tagged entry
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """ Returns the value stored for key (default if absent) """
+
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, tag=None) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if tag is not None:
+            self.tagged.setdefault(tag, set()).add(key)
+            self.tags[key] = tag
+        if len(self.entries) > self.capacity:
+            self.untag(self.entries.popitem(last=False)[0])
+
+    def untag(self, key) -> None:
+        tag = self.tags.pop(key, None)
+        if tag is not None:
+            self.tagged[tag].discard(key)
+
+    def invalidate(self, tag) -> None:
+        """ Remove the entries of a tag (e.g., when the evaluation function of an agent has changed) """
+
+        for key in self.tagged.pop(tag, ()):
+            self.entries.pop(key, None)
+            self.tags.pop(key, None)
+
+    def clear(self) -> None:
+        """ Remove all entries """
+
+        self.entries.clear()
+        self.tagged.clear()
+        self.tags.clear()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,114 @@
+"""
+    Solvers of the bimatrix games of PlayerGT, given by the payoff matrices of both players (one line per action of
+    player 1, one column per action of player 2). Each solver returns a list of Nash equilibria (strategy of player 1,
+    strategy of player 2).
+"""
+
+import nashpy as nash
+import numpy as np
+from scipy.optimize import linprog
+
+
+def support_enumeration(p1_poffs: np.ndarray, p2_poffs: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+    """ All the equilibria of non-degenerate games (exponential in the size of the matrices) """
+
+    return list(nash.Game(p1_poffs, p2_poffs).support_enumeration())
+
+
+def lemke_howson(p1_poffs: np.ndarray, p2_poffs: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+    """ One equilibrium, with the Lemke-Howson algorithm (support enumeration if the path fails, e.g., in degenerate
+    games) """
+
+    try:
+        with np.errstate(all="ignore"):
+            eq = nash.Game(p1_poffs, p2_poffs).lemke_howson(initial_dropped_label=0)
+    except (ValueError, IndexError, np.linalg.LinAlgError):
+        eq = None
+
+    if eq is not None and is_equilibrium(p1_poffs, p2_poffs, *eq):
+        return [eq]
+    return support_enumeration(p1_poffs, p2_poffs)
+
+
+def maximin_strategy(mat: np.ndarray) -> np.ndarray:
+    """ Strategy of the line player of the zero-sum game mat maximizing its worst expected payoff (linear program) """
+
+    n_lin, n_col = mat.shape
+    # variables: strategy, value of the game. Maximize the value, lower than the expected payoff of each column
+    res = linprog(np.concatenate((np.zeros(n_lin), [-1])),
+                  A_ub=np.hstack((-mat.T, np.ones((n_col, 1)))), b_ub=np.zeros(n_col),
+                  A_eq=np.concatenate((np.ones(n_lin), [0]))[None, :], b_eq=[1],
+                  bounds=[(0, None)] * n_lin + [(None, None)], method="highs")
+    strategy = np.maximum(res.x[:n_lin], 0)
+    return strategy / strategy.sum()
+
+
+def zero_sum_lp(p1_poffs: np.ndarray, p2_poffs: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+    """ Equilibrium of the zero-sum game closest to the provided one (payoffs (p1_poffs - p2_poffs) / 2 for player 1),
+    the payoffs of PlayerGT being close to antisymmetric. Polynomial (one linear program per player). """
+
+    mat = (p1_poffs - p2_poffs) / 2
+    return [(maximin_strategy(mat), maximin_strategy(-mat.T))]
+
+
+def small_game(p1_poffs: np.ndarray, p2_poffs: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]] | None:
+    """
+        Closed-form equilibria of 1xN and Nx1 games (best responses) and of non-degenerate 2x2 games (pure equilibria
+        and mixed one from the indifference conditions), the ones support enumeration returns
+
+        :return: None if the game is not one of these
+    """
+
+    n_lin, n_col = p1_poffs.shape
+    if n_lin == 1 or n_col == 1:
+        if n_lin == 1:
+            best = np.flatnonzero(p2_poffs[0] == p2_poffs[0].max())
+        else:
+            best = np.flatnonzero(p1_poffs[:, 0] == p1_poffs[:, 0].max())
+        return [(np.eye(n_lin)[i if n_col == 1 else 0], np.eye(n_col)[i if n_lin == 1 else 0]) for i in best]
+
+    a, b = p1_poffs, p2_poffs
+    if (n_lin, n_col) != (2, 2) or (a[0] == a[1]).any() or (b[:, 0] == b[:, 1]).any():
+        return None
+
+    eqs = [(np.eye(2)[i], np.eye(2)[j]) for i in range(2) for j in range(2)
+           if a[i, j] > a[1 - i, j] and b[i, j] > b[i, 1 - j]]
+    a_den, b_den = a[0, 0] - a[0, 1] - a[1, 0] + a[1, 1], b[0, 0] - b[1, 0] - b[0, 1] + b[1, 1]
+    if not a_den or not b_den:  # a strategy dominates by a constant margin: no mixed equilibrium
+        return eqs
+
+    q = (a[1, 1] - a[0, 1]) / a_den  # column 0 making lines indifferent
+    p = (b[1, 1] - b[1, 0]) / b_den  # line 0 making columns indifferent
+    if 0 < p < 1 and 0 < q < 1:
+        eqs.append((np.array([p, 1 - p]), np.array([q, 1 - q])))
+    return eqs
+
+
+def is_equilibrium(p1_poffs: np.ndarray, p2_poffs: np.ndarray, p1_strategy: np.ndarray, p2_strategy: np.ndarray,
+                   tol: float = 1e-6) -> bool:
+    """ Tells whether the strategies are a Nash equilibrium (no player can gain more than tol by deviating) """
+
+    if p1_strategy.shape != (len(p1_poffs),) or p2_strategy.shape != (len(p1_poffs[0]),):
+        return False
+    if not (np.isfinite(p1_strategy).all() and np.isfinite(p2_strategy).all() and (p1_strategy >= -tol).all() and
+            (p2_strategy >= -tol).all() and abs(p1_strategy.sum() - 1) <= tol and abs(p2_strategy.sum() - 1) <= tol):
+        return False
+
+    return (p1_strategy @ p1_poffs @ p2_strategy >= (p1_poffs @ p2_strategy).max() - tol and
+            p1_strategy @ p2_poffs @ p2_strategy >= (p1_strategy @ p2_poffs).max() - tol)
+
+
+SOLVERS = {"enumeration": support_enumeration, "lemke-howson": lemke_howson, "lp": zero_sum_lp}
+
+
+def solve(p1_poffs: np.ndarray, p2_poffs: np.ndarray,
+          method: str = "enumeration") -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+        Nash equilibria of the game, from the closed forms of small games when possible
+
+        :param method: "enumeration" (all the equilibria, cf. support_enumeration), "lemke-howson" (one equilibrium of
+            the bimatrix game) or "lp" (one equilibrium of the zero-sum approximation of the game)
+    """
+
+    eqs = small_game(p1_poffs, p2_poffs)
+    return SOLVERS[method](p1_poffs, p2_poffs) if eqs is None else eqs
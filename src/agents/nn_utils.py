@@ -21,15 +21,13 @@ def init_he(n_lin: int, n_col: int):
 
 def initialize_nn(shape: list[int], init_mode: str):
     """
-    :param shape: list of integers indicating size of intermediate layers (input and output included). As an indication,
-        the size of the different inputs are: 66 (full integer), 492 (type ont-hot), 678 (full one-hot)
+    :param shape: list of integers indicating size of layers (input and output included, any number of hidden
+        layers). As an indication, the size of the different inputs are: 66 (full integer), 492 (type ont-hot), 678
+        (full one-hot)
     :param init_mode: weights initialization algorithm
-    :return: tuple of numpy nd-arrays initialized with specified algorithm
+    :return: list of float32 numpy nd-arrays initialized with specified algorithm (cf. Network)
     """
 
-    if len(shape) != 3:
-        print("NN init may have received incorrect shapes: {}".format(shape))
-
     weights = list()
 
     init = {"normal": init_normal,
@@ -41,21 +39,33 @@ def initialize_nn(shape: list[int], init_mode: str):
         weights.append(init(shape[i+1], shape[i]))
     weights.append(init(shape[-2], shape[-1])[:, 0])  # last layer considered as a vector to speed up computations
 
-    return weights
+    return [w.astype(np.float32) for w in weights]
 
 
-def init_mutation_nn(shape: list[int], mean: float, std: float):
+def initialize_population(pop_size: int, shape: list[int], init_mode: str):
+    """
+    :return: weights of pop_size networks initialized with initialize_nn, stacked layer by layer (first dimension: the
+        individual, cf. PopulationNetwork)
+    """
+
+    return [np.stack(layer) for layer in zip(*(initialize_nn(shape, init_mode) for _ in range(pop_size)))]
+
+
+def init_mutation_nn(shape: list[int], mean: float, std: float, n: int = None):
     """
         Create a neural network with small values, used to represent the mutation of a genetic algorithm.
+
+        :param n: if provided, create n networks at once, stacked layer by layer (cf. initialize_population)
     """
 
     weights = list()
+    size = tuple() if n is None else (n, )
 
     for i in range(len(shape) - 2):
-        weights.append(np.random.normal(mean, std, (shape[i+1], shape[i])))
-    weights.append(np.random.normal(mean, std, (shape[-2], shape[-1]))[:, 0])
+        weights.append(np.random.normal(mean, std, (*size, shape[i+1], shape[i])))
+    weights.append(np.random.normal(mean, std, (*size, shape[-2], shape[-1]))[..., 0])
 
-    return weights
+    return [w.astype(np.float32) for w in weights]
 
 
 # Activation functions #
@@ -3,6 +3,7 @@ from threading import Thread
 
 from src.game.GameEngine import GameEngine
 from src.game.GameEngineParams import FightParams
+from src.game.PokeGame import PokeGame
 from src.view.FightMenu import FightMenu
 from src.view.FightView import FightView
 
@@ -48,6 +49,18 @@ class FightController:
         t_ge.join()
         t_fl.join()
 
+    @staticmethod
+    def action_name(state: PokeGame.GameStruct, player: str, action: int | None) -> str | None:
+        """ Name of an action displayed to the user: name of the attack or 'switch {name}' """
+
+        if action is None:
+            return None
+
+        team, on_field = (state.team1, state.on_field1) if player == "p1" else (state.team2, state.on_field2)
+        if state.is_switch(action):
+            return "switch " + team[action - state.n_moves].name
+        return on_field.moves[action].name
+
     def fight_loop(self, from_backend, to_backend):
 
         # wait for player1 type
@@ -64,17 +77,22 @@ class FightController:
             playable_moves = from_backend.get()
             turn_nb = from_backend.get()
 
+            # actions are only named for the user (view is the one of player 1, whose team order is the actual one)
+            playable_names = {self.action_name(game_state, "p1", a): a for a in playable_moves}
+
             # send to view and wait for answer (user move)
             if player1_human:
-                user_move = self.fight_view.display_game(game_state, player1_human, playable_moves, last_moves,
+                user_move = self.fight_view.display_game(game_state, player1_human, list(playable_names), last_moves,
                                                          turn_res, turn_nb, False)
-                to_backend.put(user_move)
+                to_backend.put(playable_names[user_move])
             else:  # no input required, only send for display purposes
-                _ = self.fight_view.display_game(game_state, player1_human, playable_moves, last_moves, turn_res,
-                                                 turn_nb, False)
+                _ = self.fight_view.display_game(game_state, player1_human, list(playable_names), last_moves,
+                                                 turn_res, turn_nb, False)
 
-            # outcome of turn
-            last_moves = from_backend.get()
+            # outcome of turn (named from the complete state of the beginning of the round)
+            last_actions = from_backend.get()
+            round_state = from_backend.get()
+            last_moves = [str(self.action_name(round_state, p, a)) for p, a in zip(("p1", "p2"), last_actions)]
             turn_res = from_backend.get()
             game_finished = from_backend.get()
 
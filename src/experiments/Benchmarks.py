@@ -0,0 +1,198 @@
+import os, sys
+
+sys.path.append(os.getcwd() + '/..')
+
+import argparse
+import copy
+import json
+import random
+import time
+
+import numpy as np
+
+from src.agents.PlayerGA import PlayerGA
+from src.agents.PlayerGT import PlayerGT
+from src.agents.PlayerNN import PlayerNN
+from src.agents.nn_utils import initialize_nn
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TestParams, TrainParams
+from src.game.GameEstimation import fill_game_with_estimation
+from src.game.PokeGame import PokeGame, gen_random_specs
+from src.game.Profiler import Profiler
+from src.game.constants import NB_POKEMON, NB_MOVES
+
+SEED = 19
+BASELINE_FILE = "benchmarks_baseline.json"
+REGRESSION_THRESHOLD = 0.15  # relative loss of throughput flagged as a regression
+NET_SHAPE = [66, 77, 1]
+AGENTS = ["random", "mdm", "bm", "gt", "ga", "rl"]
+
+
+class Benchmarks:
+    """
+        Performance benchmarks of the game engine and of the agents. All results are throughputs (operations per
+        second, higher is better), measured with fixed seeds so that runs do the same work and can be compared to a
+        baseline.
+    """
+
+    def __init__(self, quick: bool = False):
+        """
+        :param quick: Run benchmarks with small repetitions (to check if everything goes right)
+        """
+
+        self.scale = 0.1 if quick else 1.0
+        random.seed(SEED)
+        np.random.seed(SEED)
+        self.network = initialize_nn(NET_SHAPE, "xavier")
+        self.game = PokeGame([gen_random_specs(NB_POKEMON, NB_MOVES), gen_random_specs(NB_POKEMON, NB_MOVES)])
+        self.game.play_round(0, 0)
+        self.filled_game = copy.deepcopy(self.game)
+        fill_game_with_estimation("p1", self.filled_game)
+
+    def n(self, number: int) -> int:
+        return max(int(number * self.scale), 1)
+
+    @staticmethod
+    def throughput(f, number: int, repeat: int = 3) -> float:
+        """ Best number of calls of f per second over repeat runs of number calls """
+
+        best = float("inf")
+        for _ in range(repeat):
+            random.seed(SEED)
+            np.random.seed(SEED)
+            start = time.perf_counter()
+            for _ in range(number):
+                f()
+            best = min(best, time.perf_counter() - start)
+        return number / best
+
+    # Micro-benchmarks #
+
+    def micro_benchmarks(self) -> dict:
+        game, state = self.game, self.game.game_state
+        of1, of2 = state.on_field1, state.on_field2
+        nn = PlayerNN("p1", self.network, "sigmoid")
+        num_state = game.get_numeric_repr(player="p1")
+
+        gt = PlayerGT("p1")
+        gt.game = copy.deepcopy(self.filled_game)
+        gt.build_payoff_matrix()
+        payoff_mat = gt.payoff_mat
+
+        def nash(solver: str):
+            def f():
+                gt.payoff_mat = {k: dict(v) for k, v in payoff_mat.items()}
+                gt.nash_equilibrium_for_move()
+
+            gt.solver = solver
+            return f
+
+        return {
+            "damage_formula": self.throughput(lambda: PokeGame.damage_formula(of1.moves[0], of1, of2), self.n(50000)),
+            "GameStruct.__copy__": self.throughput(lambda: copy.copy(state), self.n(20000)),
+            "PokeGame.__deepcopy__": self.throughput(lambda: copy.deepcopy(game), self.n(10000)),
+            "get_numeric_repr": self.throughput(lambda: game.get_numeric_repr(player="p1"), self.n(20000)),
+            "get_moves_from_state": self.throughput(lambda: game.get_moves_from_state("p1", state), self.n(50000)),
+            "PlayerNN.forward_pass": self.throughput(lambda: nn.forward_pass(num_state), self.n(20000)),
+            "PlayerGT.build_payoff_matrix": self.throughput(gt.build_payoff_matrix, self.n(2000)),
+            "PlayerGT.nash_equilibrium_for_move": self.throughput(nash("enumeration"), self.n(200)),
+            "PlayerGT.nash_equilibrium_for_move[lemke-howson]": self.throughput(nash("lemke-howson"), self.n(200)),
+            "PlayerGT.nash_equilibrium_for_move[lp]": self.throughput(nash("lp"), self.n(200))
+        }
+
+    # Macro-benchmarks #
+
+    def agent_params(self, agent: str):
+        return {"ga": (self.network, "sigmoid"), "rl": (self.network, "sigmoid", "SARSA")}.get(agent)
+
+    def games_per_second(self, agent1: str, agent2: str) -> float:
+        nb = self.n(20 if "gt" in (agent1, agent2) else 200)
+        pars = TestParams("test", agent1, agent2, 0.0, self.agent_params(agent1), self.agent_params(agent2), nb=nb,
+                          seed=SEED)
+        start = time.perf_counter()
+        GameEngine(pars).test_mode()
+        return nb / (time.perf_counter() - start)
+
+    def rl_training_steps_per_second(self) -> float:
+        random.seed(SEED)
+        network = [np.copy(w) for w in self.network]
+        pars = TrainParams("train", 0.0015, "rl", "rl", 0.1, (network, "sigmoid", "SARSA"),
+                           (network, "sigmoid", "SARSA"), nb=self.n(100))
+        profiler = Profiler()
+        start = time.perf_counter()
+        GameEngine(pars, profiler=profiler).train_mode()
+        elapsed = time.perf_counter() - start
+        return sum(s["calls"] for phase, s in profiler.report().items() if phase.startswith("backpropagation")) / elapsed
+
+    def ga_generations_per_minute(self) -> float:
+        random.seed(SEED)
+        np.random.seed(SEED)
+
+        def fitness(network, act_f):
+            return GameEngine(TestParams("test", "ga", "random", 0.0, (network, act_f), None, nb=self.n(50),
+                                         seed=SEED)).test_mode()
+
+        n_gen = 3
+        start = time.perf_counter()
+        PlayerGA("p1", self.network, "sigmoid").evolution(4, "xavier", NET_SHAPE, n_gen, 0.5, fitness, ("sigmoid",))
+        return 60 * n_gen / (time.perf_counter() - start)
+
+    def macro_benchmarks(self) -> dict:
+        out = dict()
+        for i, agent1 in enumerate(AGENTS):
+            for agent2 in AGENTS[i:]:
+                out["games/s {} vs {}".format(agent1, agent2)] = self.games_per_second(agent1, agent2)
+        out["RL training steps/s"] = self.rl_training_steps_per_second()
+        out["GA generations/min"] = self.ga_generations_per_minute()
+        return out
+
+    # Baseline #
+
+    def run(self) -> dict:
+        return {**self.micro_benchmarks(), **self.macro_benchmarks()}
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+        """
+        :return: names of the benchmarks whose throughput is lower than the one of the baseline by more than threshold
+        """
+
+        return [name for name, value in results.items()
+                if name in baseline and value < (1 - threshold) * baseline[name]]
+
+    @staticmethod
+    def report(results: dict, baseline: dict, regressions: list[str]) -> str:
+        out = "{:<50}{:>14}{:>14}{:>10}".format("benchmark", "result", "baseline", "ratio")
+        for name, value in results.items():
+            base = baseline.get(name)
+            ratio = "{:>10.2f}".format(value / base) if base else "{:>10}".format("-")
+            out += "\n{:<50}{:>14.1f}{:>14}{}{}".format(name, value, "{:.1f}".format(base) if base else "-", ratio,
+                                                       "  REGRESSION" if name in regressions else "")
+        return out
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Performance benchmarks (throughputs, higher is better)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="file of the baseline results")
+    parser.add_argument("--save", action="store_true", help="save the results as new baseline")
+    parser.add_argument("--quick", action="store_true", help="small repetitions, to check the benchmarks run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative loss of throughput flagged as a regression")
+    args = parser.parse_args()
+
+    results = Benchmarks(args.quick).run()
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = Benchmarks.compare(results, baseline, args.threshold)
+    print(Benchmarks.report(results, baseline, regressions))
+
+    if args.save or not baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("\nbaseline saved in {}".format(args.baseline))
+
+    sys.exit(1 if regressions else 0)
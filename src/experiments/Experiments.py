@@ -26,6 +26,7 @@ if SHORT:
     RL_N_TRAIN = 10
     RL_N_TEST = 10
     GA_N_TEST = 10
+    GA_TEST_PRECISION = 0.25
     GA_POP_SIZE = 2
     GA_N_GEN = 2
     GA_STATE_VEC_TEST = 10
@@ -40,6 +41,7 @@ else:
     RL_N_TRAIN = 10000
     RL_N_TEST = 1000
     GA_N_TEST = 1000
+    GA_TEST_PRECISION = 0.03  # fitness evaluation stops once victory rate is known within this margin
     GA_POP_SIZE = 10
     GA_N_GEN = 10
     GA_STATE_VEC_TEST = 1000
@@ -229,7 +231,7 @@ class Experiments:
             """
             pars = TestParams("test", "ga", "random", 0.0, (network, act_f), None, ts_p1, ts_p2, GA_N_TEST)
             ge = GameEngine(pars)
-            ret = ge.test_mode()
+            ret = ge.sequential_test_mode(GA_TEST_PRECISION)[0]
             return ret
 
         def simple_game():
@@ -444,7 +446,7 @@ class Experiments:
             """
             pars = TestParams("test", "ga", "random", 0.0, (network, act_f), None, ts_p1, ts_p2, GA_N_TEST)
             ge = GameEngine(pars)
-            ret = ge.test_mode()
+            ret = ge.sequential_test_mode(GA_TEST_PRECISION)[0]
             return ret
 
         # Base parameters
@@ -511,12 +513,23 @@ class Experiments:
                 out += "mu/std ({}, {}), score: {}\n".format(mu, std, res[1])
             print(out)
 
+        def exp_islands():
+            out = "\nExperiment: training parameters for GA\n\n"
+            out += "Island model (same total population)\n"
+            agent = PlayerGA("p1", initialize_nn([18, 60, 1], "normal"), "sigmoid")
+            for n_islands, interval in [(2, 2), (2, 5), (5, 2), (5, 5)]:
+                res = agent.island_evolution(n_islands, interval, 1, max(pop_size // n_islands, 2), init_mode,
+                                             net_shape, n_gen, elite_pro, fitness_f, fitness_f_args, mu_mean, mu_std)
+                out += "islands {}, migration interval {}, score: {}\n".format(n_islands, interval, res[1])
+            print(out)
+
         ps = [multiprocessing.Process(target=exp_hidden_layer_size, args=()),
               multiprocessing.Process(target=exp_pop_size, args=()),
               multiprocessing.Process(target=exp_init_mode, args=()),
               multiprocessing.Process(target=exp_nb_gens, args=()),
               multiprocessing.Process(target=exp_elite_prop, args=()),
-              multiprocessing.Process(target=exp_mu_pars, args=())
+              multiprocessing.Process(target=exp_mu_pars, args=()),
+              multiprocessing.Process(target=exp_islands, args=())
               ]
 
         for p in ps:
@@ -596,7 +609,7 @@ class Experiments:
             """
             pars = TestParams("test", "ga", "random", 0.0, (network, act_f), None, ts_p1, ts_p2, GA_N_TEST)
             ge = GameEngine(pars)
-            ret = ge.test_mode()
+            ret = ge.sequential_test_mode(GA_TEST_PRECISION)[0]
             return ret
 
         out = "\nExperiment: GA training\n\n"
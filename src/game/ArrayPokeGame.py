@@ -0,0 +1,456 @@
+import random
+
+import numpy as np
+
+from src.game.DamageTable import compute_damage, table_damage
+from src.game.Pokemon import MOVE_REGISTRY, UNKNOWN_MOVE
+from src.game.constants import TYPES_INDEX, TYPE_CHART, MOVES
+
+# numeric counterparts of the tables in constants (indices follow TYPES_INDEX)
+TYPE_NAMES = tuple(t for t, _ in sorted(TYPES_INDEX.items(), key=lambda x: x[1]))
+TYPE_CHART_ARRAY = np.array([[TYPE_CHART[off][dfd] for dfd in TYPE_NAMES] for off in TYPE_NAMES])
+MOVE_NAMES = tuple(MOVES)
+MOVES_INDEX = {name: i for i, name in enumerate(MOVE_NAMES)}
+
+UNKNOWN = -1  # id of unknown type/move in buffers
+
+# (name, number of values per Pokémon) of the fields stored in the state buffer, in buffer order
+POKEMON_FIELDS = ("poke_type", "cur_hp", "hp", "atk", "des", "spe")
+MOVE_FIELDS = ("move_id", "move_type", "move_pow", "revealed")
+
+
+class ArrayPokemon:
+    """
+        Lightweight accessor exposing one slot of an ArrayGameStruct with the attributes of a Pokemon object, so that
+        game loops and simple agents can use both engines interchangeably. No data is stored in this object.
+    """
+
+    __slots__ = ("state", "side", "slot")
+
+    def __init__(self, state, side: int, slot: int):
+        self.state = state
+        self.side = side
+        self.slot = slot
+
+    @property
+    def name(self):
+        return self.state.names[self.side][self.slot]
+
+    @property
+    def poke_type(self):
+        return TYPE_NAMES[self.state.poke_type[self.side, self.slot]]
+
+    @property
+    def cur_hp(self):
+        return int(self.state.cur_hp[self.side, self.slot])
+
+    @cur_hp.setter
+    def cur_hp(self, value):
+        self.state.cur_hp[self.side, self.slot] = value
+
+    @property
+    def hp(self):
+        return int(self.state.hp[self.side, self.slot])
+
+    @property
+    def atk(self):
+        return int(self.state.atk[self.side, self.slot])
+
+    @property
+    def des(self):
+        return int(self.state.des[self.side, self.slot])
+
+    @property
+    def spe(self):
+        return int(self.state.spe[self.side, self.slot])
+
+    @property
+    def moves(self):
+        """ Moves of the opponent not revealed yet are hidden when the struct is a player view """
+
+        hidden = self.state.viewer is not None and self.state.viewer != self.side
+        moves = list()
+        for m_id, revealed in zip(self.state.move_id[self.side, self.slot], self.state.revealed[self.side, self.slot]):
+            if m_id == UNKNOWN or hidden and not revealed:
+                moves.append(UNKNOWN_MOVE)
+            else:
+                moves.append(MOVE_REGISTRY[MOVE_NAMES[m_id]])
+        return moves
+
+    def is_alive(self):
+        return self.state.cur_hp[self.side, self.slot] > 0
+
+    def __repr__(self):
+        mvs = " - ".join(["({})".format(str(m)) for m in self.moves])
+        return "{} @ {} ({}/{}, {}, {}, {}) [{}]".format(self.name, self.poke_type, self.cur_hp, self.hp,
+                                                         self.atk, self.des, self.spe, mvs)
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class ArrayGameStruct:
+    """
+        Contains all information needed to represent a game state, stored as a single int16 buffer. Fields are exposed
+        as numpy views on slices of this buffer (struct-of-arrays layout), indexed by [side, slot(, move slot)], so
+        copying a state is a single buffer copy.
+    """
+
+    __slots__ = ("buf", "names", "n_pokemon", "n_moves", "viewer", "on_field") + POKEMON_FIELDS + MOVE_FIELDS
+
+    def __init__(self, teams_specs=None, buf: np.ndarray = None, names: tuple = None, n_pokemon: int = None,
+                 n_moves: int = None):
+        """
+        :param teams_specs: team specifications (cf. PokeGame for the shape). If None, the state is rebuilt from buf
+        :param buf: buffer of an existing state (not copied)
+        :param names: names of the Pokémon of both teams, tuple of two tuples (shared between copies)
+        :param n_pokemon: number of Pokémon per team
+        :param n_moves: number of moves per Pokémon
+        """
+
+        self.viewer = None  # None for complete state, 0 or 1 for a player view
+
+        if teams_specs is not None:
+            n_pokemon, n_moves = len(teams_specs[0]), len(teams_specs[0][0][1])
+            names = tuple(tuple(p[0][0] for p in spec) for spec in teams_specs)
+            buf = np.zeros(self.buffer_size(n_pokemon, n_moves), dtype=np.int16)
+
+        self.buf, self.names, self.n_pokemon, self.n_moves = buf, names, n_pokemon, n_moves
+        self.bind()
+
+        if teams_specs is not None:
+            for side, spec in enumerate(teams_specs):
+                for slot, p in enumerate(spec):
+                    self.poke_type[side, slot] = TYPES_INDEX[p[0][1]]
+                    self.cur_hp[side, slot] = self.hp[side, slot] = p[0][2]
+                    self.atk[side, slot], self.des[side, slot], self.spe[side, slot] = p[0][3:6]
+                    for m_slot, (m_name, m_type, m_pow) in enumerate(p[1]):
+                        self.move_id[side, slot, m_slot] = MOVES_INDEX[m_name]
+                        self.move_type[side, slot, m_slot] = TYPES_INDEX[m_type]
+                        self.move_pow[side, slot, m_slot] = m_pow
+
+    @staticmethod
+    def buffer_size(n_pokemon: int, n_moves: int) -> int:
+        return 2 * n_pokemon * (len(POKEMON_FIELDS) + n_moves * len(MOVE_FIELDS)) + 2
+
+    def bind(self):
+        """ (Re)create the field views on the buffer """
+
+        n_p, n_m, start = self.n_pokemon, self.n_moves, 0
+        for field in POKEMON_FIELDS:
+            setattr(self, field, self.buf[start:start + 2 * n_p].reshape(2, n_p))
+            start += 2 * n_p
+        for field in MOVE_FIELDS:
+            setattr(self, field, self.buf[start:start + 2 * n_p * n_m].reshape(2, n_p, n_m))
+            start += 2 * n_p * n_m
+        self.on_field = self.buf[start:start + 2]
+
+    # Pokemon-like accessors (compatibility with PokeGame.GameStruct)
+
+    @property
+    def team1(self):
+        return [ArrayPokemon(self, 0, i) for i in range(self.n_pokemon)]
+
+    @property
+    def team2(self):
+        return [ArrayPokemon(self, 1, i) for i in range(self.n_pokemon)]
+
+    @property
+    def on_field1(self):
+        return ArrayPokemon(self, 0, int(self.on_field[0]))
+
+    @property
+    def on_field2(self):
+        return ArrayPokemon(self, 1, int(self.on_field[1]))
+
+    def is_switch(self, action: int | None) -> bool:
+        """ Actions are encoded as in PokeGame (cf. PokeGame.GameStruct.n_moves) """
+
+        return action is not None and action >= self.n_moves
+
+    def __eq__(self, other):
+        return self.names == other.names and np.array_equal(self.buf, other.buf)
+
+    def __copy__(self):
+        cp = ArrayGameStruct(None, self.buf.copy(), self.names, self.n_pokemon, self.n_moves)
+        cp.viewer = self.viewer
+        return cp
+
+    def __deepcopy__(self, memodict={}):
+        return self.__copy__()
+
+    def __str__(self):
+        out = "~team1~\nof1: {}\n\n".format(self.on_field1)
+        for i, p in enumerate(self.team1):
+            out += "{}. {}\n".format(i, p)
+
+        out += "\n~team2~\nof2: {}\n\n".format(self.on_field2)
+        for i, p in enumerate(self.team2):
+            out += "{}. {}\n".format(i, p)
+
+        return out
+
+
+class ArrayPokeGame:
+    """
+        Alternative game engine working on ArrayGameStruct states. It exposes the same interface as PokeGame for the
+        game loop (play_round, get_moves_from_state, is_end_state, match_result...) and follows the same rules, drawing
+        random numbers in the same order, so that games seeded identically have the same outcome with both engines.
+
+        Player views are not maintained by this engine (only the moves revealed by each player are tracked), therefore
+        it is meant for agents that do not rely on statistic estimations (random, mdm and bm).
+    """
+
+    def __init__(self, teams_specs):
+        self.game_state: ArrayGameStruct = ArrayGameStruct(teams_specs)
+
+    def __eq__(self, other):
+        return self.game_state == other.game_state
+
+    @staticmethod
+    def cp(obj):
+        cp = obj.__new__(type(obj))
+        cp.game_state = obj.game_state.__copy__()
+        return cp
+
+    def __copy__(self):
+        return ArrayPokeGame.cp(self)
+
+    def __deepcopy__(self, memodict={}):
+        return ArrayPokeGame.cp(self)
+
+    def __str__(self):
+        return " complete view:\n{}".format(self.game_state)
+
+    def get_numeric_repr(self, state: ArrayGameStruct = None, player: str = None) -> list[int]:
+        """ Converts the provided state in numeric vector, with the same layout as PokeGame.get_numeric_repr
+
+        :param state: ArrayGameStruct object to be converted. If None, use self.game_state
+        :param player: unused, kept for interface compatibility (no player view in this engine)
+        :return: list of int representing schematically the state
+        """
+
+        state = state if state is not None else self.game_state
+        num_state = list()
+        for side in range(2):
+            of = int(state.on_field[side])
+            for slot in [of] + [i for i in range(state.n_pokemon) if i != of]:
+                num_state += [int(state.poke_type[side, slot]), int(state.cur_hp[side, slot]),
+                              int(state.atk[side, slot]), int(state.des[side, slot]), int(state.spe[side, slot])]
+                for m_type, m_pow in zip(state.move_type[side, slot], state.move_pow[side, slot]):
+                    num_state += [int(m_type), int(m_pow)]
+
+        return num_state
+
+    def get_cur_state(self) -> ArrayGameStruct:
+        """
+        Returns a copy of the complete game (self.game_state)
+        """
+
+        return self.game_state.__copy__()
+
+    def get_player_view(self, player: str) -> ArrayGameStruct:
+        """
+        Returns a copy of the game state where opponent moves not revealed yet are hidden
+
+        :param player: "p1" or "p2" to indicate which player's view must be returned
+        """
+
+        view = self.game_state.__copy__()
+        view.viewer = 0 if player == "p1" else 1
+        return view
+
+    def get_moves_from_state(self, player: str, state: ArrayGameStruct) -> list[int | None]:
+        """
+        Return possible moves for the specified player from the specified state
+
+        :param player: "p1" or "p2" to indicate which player moves must be listed
+        :param state: ArrayGameStruct object where moves must be searched
+        :return: List of actions playable (cf. PokeGame.GameStruct.n_moves for the encoding).
+        """
+
+        side = 0 if player == "p1" else 1
+        of, opp_of = state.on_field[side], state.on_field[1 - side]
+        alive, opp_alive = state.cur_hp[side, of] > 0, state.cur_hp[1 - side, opp_of] > 0
+
+        if not opp_alive and alive:
+            # opponent faint but player not: only opponent moves (choosing replacement)
+            return [None]
+
+        switches = [state.n_moves + i for i in range(state.n_pokemon) if state.cur_hp[side, i] > 0 and i != of]
+
+        if not alive:
+            moves = switches
+        else:
+            moves = [i for i, m in enumerate(state.move_id[side, of]) if m != UNKNOWN] + switches
+        return moves
+
+    def is_end_state(self, state: ArrayGameStruct = None) -> bool:
+        """
+        Test if the provided or current state is an end state, meaning one of the players have all Pokémon with 0 cur_hp
+
+        :param state: ArrayGameStruct object to test
+        :return: bool value
+        """
+
+        state = state if state is not None else self.game_state
+        return not bool((state.cur_hp > 0).any(axis=1).all())
+
+    def match_result(self, state: ArrayGameStruct = None) -> (bool, bool):
+        """
+        Returns two booleans indicating the result of the match (cf. PokeGame.match_result)
+
+        :param state: ArrayGameStruct object to test
+        :return: result of match
+        """
+
+        state = state if state is not None else self.game_state
+        alive = (state.cur_hp > 0).any(axis=1)
+        return not bool(alive[1]), not bool(alive[0])
+
+    def swap_states(self, game_state: ArrayGameStruct):
+        self.game_state = game_state
+
+    def play_round(self, p1_move: int | None, p2_move: int | None, force_dmg: float = 0.0, force_order: bool = None):
+        """
+        Apply the moves to the inner state and return information about what happened (cf. PokeGame.play_round).
+        Moves used by a player are marked as revealed to the opponent.
+
+        :param p1_move: action selected by player 1
+        :param p2_move: action selected by player 2
+        :param force_dmg: parameter for apply_player_moves
+        :param force_order: parameter for apply_player_moves
+        :return: Python dict indicating which side has played a move and which side has fainted
+        """
+
+        gs = self.game_state
+        pre_spe = [int(gs.spe[0, gs.on_field[0]]), int(gs.spe[1, gs.on_field[1]])]
+
+        # (move order is determined here to keep track of who moved first)
+        order = random.choice([True, False]) if force_order is None else force_order
+        p1_switch, p2_switch = gs.is_switch(p1_move), gs.is_switch(p2_move)
+
+        # post faint switch or same priority level moves
+        if None in (p1_move, p2_move) or p1_switch == p2_switch:
+            self.apply_player_moves(gs, p1_move, p2_move, force_dmg=force_dmg, force_order=force_order)
+
+        # attack and switch
+        elif p1_switch:
+            self.apply_player_moves(gs, p1_move, None, force_dmg=force_dmg, force_order=None)
+            self.apply_player_moves(gs, None, p2_move, force_dmg=force_dmg, force_order=None)
+        else:
+            self.apply_player_moves(gs, None, p2_move, force_dmg=force_dmg, force_order=None)
+            self.apply_player_moves(gs, p1_move, None, force_dmg=force_dmg, force_order=None)
+
+        of1, of2 = int(gs.on_field[0]), int(gs.on_field[1])
+        hp1, hp2, spe1, spe2 = gs.cur_hp[0, of1], gs.cur_hp[1, of2], gs.spe[0, of1], gs.spe[1, of2]
+
+        p1_moved = False
+        if p1_move is not None:
+            p1_moved |= not p1_switch and (hp1 > 0 or spe1 > spe2 or spe1 == spe2 and order)
+            p1_moved |= p2_move is None or p1_switch or p2_switch
+
+        p2_moved = False
+        if p2_move is not None:
+            p2_moved |= not p2_switch and (hp2 > 0 or spe2 > spe1 or spe1 == spe2 and not order)
+            p2_moved |= p1_move is None or p1_switch or p2_switch
+
+        p1_first, p2_first = False, False
+        # As switch and attacks have different priorities, no first mover will be considered in case of mix choice
+        if None not in (p1_move, p2_move) and p1_switch == p2_switch:
+            p1_first = pre_spe[0] > pre_spe[1] or pre_spe[0] == pre_spe[1] and order
+            p2_first = not p1_first
+
+        # moves used are now known to the opponent (attacker is still on field)
+        for side, move, moved, switch in ((0, p1_move, p1_moved, p1_switch), (1, p2_move, p2_moved, p2_switch)):
+            if moved and not switch:
+                gs.revealed[side, gs.on_field[side], move] = True
+
+        return {'p1_moved': bool(p1_moved), 'p1_fainted': not hp1 > 0, 'p1_first': bool(p1_first),
+                'p2_moved': bool(p2_moved), 'p2_fainted': not hp2 > 0, 'p2_first': bool(p2_first)}
+
+    @staticmethod
+    def damage_formula(state: ArrayGameStruct, side: int, move_slot: int, force_dmg: float = 0.0) -> int:
+        """
+        Compute the amount of damage caused by a move of the on-field Pokémon of side on the opposite on-field Pokémon
+        (same formula as PokeGame.damage_formula).
+
+        :param state: ArrayGameStruct object
+        :param side: 0 or 1, side of the attacker
+        :param move_slot: index of the move in the attacker moves
+        :param force_dmg: if between 0.85 and 1: used as substitution of random parameter
+        :return: Number of damage caused, as an integer
+        """
+
+        atk_slot, tgt_slot = state.on_field[side], state.on_field[1 - side]
+        base_pow = int(state.move_pow[side, atk_slot, move_slot])
+        move_type = state.move_type[side, atk_slot, move_slot]
+
+        atk, des = int(state.atk[side, atk_slot]), int(state.des[1 - side, tgt_slot])
+
+        # modifiers
+        roll = round(force_dmg * 100) if 0.85 <= force_dmg <= 1 else random.randint(85, 100)
+        stab = 1.5 if move_type == state.poke_type[side, atk_slot] else 1
+        type_aff = float(TYPE_CHART_ARRAY[move_type, state.poke_type[1 - side, tgt_slot]])
+
+        if roll / 100 != force_dmg and 0.85 <= force_dmg <= 1:
+            return compute_damage(base_pow, atk, des, stab, type_aff, force_dmg)
+
+        return table_damage(base_pow, atk, des, stab, type_aff, roll)
+
+    def attack(self, state: ArrayGameStruct, side: int, move: int, force_dmg: float):
+        """ Apply move (slot) of the on-field Pokémon of side on the opposite on-field Pokémon """
+
+        tgt = state.on_field[1 - side]
+        dmg = self.damage_formula(state, side, move, force_dmg)
+        state.cur_hp[1 - side, tgt] = max(0, int(state.cur_hp[1 - side, tgt]) - dmg)
+
+    def apply_player_moves(self, game_state: ArrayGameStruct, p1_move: int | None, p2_move: int | None,
+                           force_dmg: float = 0.0, force_order: bool = None):
+        """
+        Execute player choices with regard to game rules to the game_state passed as parameter (cf.
+        PokeGame.apply_player_moves for the description of the parameters).
+
+        :return: provided game_state with players action applied
+        """
+
+        gs = game_state
+        p1_switch, p2_switch = gs.is_switch(p1_move), gs.is_switch(p2_move)
+
+        if p1_switch:
+            gs.on_field[0] = p1_move - gs.n_moves
+        if p2_switch:
+            gs.on_field[1] = p2_move - gs.n_moves
+
+        # p1/p2 attacks after a switch of the other or in post faint switch
+        if p1_switch and p2_move is not None and not p2_switch:
+            self.attack(gs, 1, p2_move, force_dmg)
+        elif p2_switch and p1_move is not None and not p1_switch:
+            self.attack(gs, 0, p1_move, force_dmg)
+        elif p1_switch or p2_switch:
+            pass
+
+        # both attack (nb: should never be both None at same time)
+        elif None not in (p1_move, p2_move):
+            # first, determine attack order
+            attack_order = [(0, p1_move), (1, p2_move)]
+            spe1, spe2 = gs.spe[0, gs.on_field[0]], gs.spe[1, gs.on_field[1]]
+            if spe1 < spe2:
+                attack_order.reverse()
+            elif spe1 == spe2:
+                if force_order is None:
+                    random.shuffle(attack_order)
+                elif not force_order:
+                    attack_order.reverse()
+
+            self.attack(gs, *attack_order[0], force_dmg)
+            # second attacker must be alive to attack
+            second = attack_order[1][0]
+            if gs.cur_hp[second, gs.on_field[second]] > 0:
+                self.attack(gs, *attack_order[1], force_dmg)
+
+        else:
+            side, move = (0, p1_move) if p1_move is not None else (1, p2_move)
+            self.attack(gs, side, move, force_dmg)
+
+        return gs
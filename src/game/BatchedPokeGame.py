@@ -0,0 +1,316 @@
+import random
+
+import numpy as np
+
+from src.game import DamageTable
+from src.game.ArrayPokeGame import TYPE_CHART_ARRAY
+from src.game.constants import TYPES_INDEX, MIN_HP, MAX_HP, MIN_STAT, MAX_STAT, MIN_POW, MAX_POW, MAX_ROUNDS
+
+NO_ACTION = -1  # action of a player that must not move (or of a finished game)
+
+# (name, dtype) of the fields of the batched state, indexed by [game, side, slot(, move slot)]
+POKEMON_FIELDS = ("poke_type", "cur_hp", "hp", "atk", "des", "spe")
+MOVE_FIELDS = ("move_type", "move_pow", "revealed")
+
+# index of the type affinities of the type chart in the axis of the damage table
+TYPE_AFF_INDEX_ARRAY = np.vectorize(DamageTable.TYPE_AFF_INDEX.get)(TYPE_CHART_ARRAY)
+
+
+class BatchedGameStruct:
+    """
+        State of N games stored field by field in arrays with a leading game axis. Unknown moves (in player views) have
+        a power of 0.
+    """
+
+    __slots__ = ("on_field",) + POKEMON_FIELDS + MOVE_FIELDS
+
+    def __init__(self, n_games: int, n_pokemon: int, n_moves: int):
+        for field in POKEMON_FIELDS:
+            setattr(self, field, np.zeros((n_games, 2, n_pokemon), dtype=np.int16))
+        for field in MOVE_FIELDS:
+            setattr(self, field, np.zeros((n_games, 2, n_pokemon, n_moves), dtype=np.int16))
+        self.revealed = self.revealed.astype(bool)
+        self.on_field = np.zeros((n_games, 2), dtype=np.intp)
+
+    @staticmethod
+    def from_specs(games_specs: list) -> "BatchedGameStruct":
+        """
+        :param games_specs: list of the team specifications of each game (cf. PokeGame for the shape)
+        """
+
+        n_pokemon, n_moves = len(games_specs[0][0]), len(games_specs[0][0][0][1])
+        state = BatchedGameStruct(len(games_specs), n_pokemon, n_moves)
+        for g, teams_specs in enumerate(games_specs):
+            for side, spec in enumerate(teams_specs):
+                for slot, p in enumerate(spec):
+                    state.poke_type[g, side, slot] = TYPES_INDEX[p[0][1]]
+                    state.cur_hp[g, side, slot] = state.hp[g, side, slot] = p[0][2]
+                    state.atk[g, side, slot], state.des[g, side, slot], state.spe[g, side, slot] = p[0][3:6]
+                    for m_slot, (_, m_type, m_pow) in enumerate(p[1]):
+                        state.move_type[g, side, slot, m_slot] = TYPES_INDEX[m_type]
+                        state.move_pow[g, side, slot, m_slot] = m_pow
+
+        if (state.atk < MIN_STAT).any() or (state.atk > MAX_STAT).any() or (state.des < MIN_STAT).any() or \
+                (state.des > MAX_STAT).any() or not np.isin(state.move_pow, DamageTable.POWS).all():
+            raise ValueError("Batched engine only supports statistics and powers within the damage table domain")
+
+        return state
+
+    def __len__(self):
+        return len(self.on_field)
+
+    @property
+    def n_pokemon(self):
+        return self.cur_hp.shape[2]
+
+    @property
+    def n_moves(self):
+        return self.move_pow.shape[3]
+
+    def take(self, idx: np.ndarray) -> "BatchedGameStruct":
+        """ Returns a new struct with the games at indices idx (indices may be repeated) """
+
+        out = BatchedGameStruct.__new__(BatchedGameStruct)
+        for field in self.__slots__:
+            setattr(out, field, getattr(self, field)[idx])
+        return out
+
+    def copy(self) -> "BatchedGameStruct":
+        return self.take(np.arange(len(self)))
+
+
+class BatchedPokeGame:
+    """
+        Plays N games in lockstep: all the games are advanced by one round per call of play_round, with vectorized
+        operations over the games. Actions are integers, as in PokeGame: move slot (0 to n_moves - 1), switch to slot k
+        (n_moves + k) or NO_ACTION. Rules are the ones of PokeGame, but random numbers are drawn from self.rng in a
+        different order, so games are not identical to the ones of the other engines for the same seed.
+    """
+
+    def __init__(self, games_specs: list, seed: int = None):
+        """
+        :param games_specs: list of the team specifications of each game (cf. PokeGame for the shape)
+        :param seed: seed of the random generator of the batch. If None, drawn from the random module
+        """
+
+        self.game_state: BatchedGameStruct = BatchedGameStruct.from_specs(games_specs)
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        n_games = len(self.game_state)
+        self.finished = np.zeros(n_games, dtype=bool)
+        self.turns = np.ones(n_games, dtype=np.int16)
+        # Pokémon that have been on field (known to the opponent)
+        self.seen = np.zeros(self.game_state.cur_hp.shape, dtype=bool)
+        self.seen[:, :, 0] = True
+
+    def __len__(self):
+        return len(self.game_state)
+
+    @property
+    def n_actions(self):
+        return self.game_state.n_moves + self.game_state.n_pokemon
+
+    # Game state information
+
+    def get_numeric_repr(self, state: BatchedGameStruct = None) -> np.ndarray:
+        """ Converts the provided states in numeric vectors (same layout as PokeGame.get_numeric_repr)
+
+        :param state: BatchedGameStruct object to be converted. If None, use self.game_state
+        :return: array of shape (number of games, size of numeric representation)
+        """
+
+        state = state if state is not None else self.game_state
+        n_games, n_pokemon = len(state), state.n_pokemon
+
+        # on field Pokémon first, then the others in team order
+        order = np.argsort(np.arange(n_pokemon) != state.on_field[:, :, None], axis=2, kind="stable")
+        pokemon = np.stack([state.poke_type, state.cur_hp, state.atk, state.des, state.spe], axis=-1)
+        moves = np.stack([state.move_type * (state.move_pow > 0), state.move_pow], axis=-1).reshape(
+            n_games, 2, n_pokemon, -1)
+        num_state = np.concatenate([pokemon, moves], axis=-1)
+
+        return np.take_along_axis(num_state, order[..., None], axis=2).reshape(n_games, -1)
+
+    def needs_action(self, side: int) -> np.ndarray:
+        """ Games where the player of side must choose an action (cf. game loop of GameEngine.test_mode) """
+
+        gs, rows = self.game_state, np.arange(len(self))
+        own_alive = gs.cur_hp[rows, side, gs.on_field[:, side]] > 0
+        opp_alive = gs.cur_hp[rows, 1 - side, gs.on_field[:, 1 - side]] > 0
+
+        return ~self.finished & (own_alive & opp_alive | ~own_alive)
+
+    def legal_actions(self, side: int, state: BatchedGameStruct = None) -> np.ndarray:
+        """
+        Mask of the playable actions of a player (cf. PokeGame.get_moves_from_state)
+
+        :param side: 0 or 1, side of the player
+        :param state: BatchedGameStruct object. If None, use self.game_state
+        :return: bool array of shape (number of games, n_actions + 1), last column being NO_ACTION
+        """
+
+        state = state if state is not None else self.game_state
+        rows = np.arange(len(state))
+        of = state.on_field[:, side]
+        own_alive = state.cur_hp[rows, side, of] > 0
+        opp_alive = state.cur_hp[rows, 1 - side, state.on_field[:, 1 - side]] > 0
+
+        moves = (state.move_pow[rows, side, of] > 0) & (own_alive & opp_alive)[:, None]
+        switches = (state.cur_hp[:, side] > 0) & (np.arange(state.n_pokemon) != of[:, None]) & \
+            (own_alive & opp_alive | ~own_alive)[:, None]
+        no_action = own_alive & ~opp_alive
+
+        return np.concatenate([moves, switches, no_action[:, None]], axis=1)
+
+    @staticmethod
+    def action_codes(columns: np.ndarray, n_actions: int) -> np.ndarray:
+        """ Converts columns of the mask of legal_actions in actions """
+
+        return np.where(columns == n_actions, NO_ACTION, columns)
+
+    def random_actions(self, legal: np.ndarray) -> np.ndarray:
+        """
+        Uniform choice among the legal actions of each game (NO_ACTION for games without legal action)
+
+        :param legal: bool array of shape (number of games, n_actions + 1), cf. legal_actions
+        """
+
+        columns = np.argmax(self.rng.random(legal.shape) * legal, axis=1)
+        return np.where(legal.any(axis=1), self.action_codes(columns, self.n_actions), NO_ACTION)
+
+    @staticmethod
+    def moves_final_pow(move_type: np.ndarray, move_pow: np.ndarray, attacker_type: np.ndarray,
+                        target_type: np.ndarray) -> np.ndarray:
+        """ Power of moves considering target weakness and STAB (arrays are broadcast together) """
+
+        return move_pow * TYPE_CHART_ARRAY[move_type, target_type] * (1 + 0.5 * (move_type == attacker_type))
+
+    def get_player_view(self, side: int) -> BatchedGameStruct:
+        """
+        Returns a copy of the game states where information unknown to the player is replaced with the default values
+        of GameEstimation.fill_game_with_estimation: opponent Pokémon not seen yet are "NOTYPE" with average
+        statistics and unrevealed moves are completed with a STAB and a neutral move of minimal power. Statistics of
+        opponent Pokémon already seen are their actual values (statistic estimation converges towards them).
+
+        :param side: 0 or 1, side of the player
+        """
+
+        view = self.game_state.copy()
+        opp, unseen = 1 - side, ~self.seen[:, 1 - side]
+
+        view.poke_type[:, opp][unseen] = TYPES_INDEX["NOTYPE"]
+        view.cur_hp[:, opp][unseen] = view.hp[:, opp][unseen] = (MIN_HP + MAX_HP) // 2
+        for field in (view.atk, view.des, view.spe):
+            field[:, opp][unseen] = (MIN_STAT + MAX_STAT) // 2
+
+        known = view.revealed[:, opp]
+        move_type, move_pow = view.move_type[:, opp], view.move_pow[:, opp]
+        move_type[~known], move_pow[~known] = 0, 0
+
+        # at least 1 STAB of MIN_POW, then 1 neutral move, in the first unknown slots
+        for m_type in (view.poke_type[:, opp, :, None], TYPES_INDEX["NOTYPE"]):
+            m_type = np.broadcast_to(m_type, move_type.shape)
+            has_move = ((move_type == m_type) & (move_pow > 0)).any(axis=-1)
+            free = move_pow == 0
+            fill = free & (np.cumsum(free, axis=-1) == 1) & ~has_move[..., None]
+            move_type[fill], move_pow[fill] = m_type[fill], MIN_POW
+
+        return view
+
+    def is_end_state(self, state: BatchedGameStruct = None) -> np.ndarray:
+        """ Games where one of the players has all Pokémon with 0 cur_hp """
+
+        state = state if state is not None else self.game_state
+        return ~(state.cur_hp > 0).any(axis=2).all(axis=1)
+
+    def match_result(self) -> (np.ndarray, np.ndarray):
+        """ Victory of player 1 and player 2 in each game (cf. PokeGame.match_result) """
+
+        alive = (self.game_state.cur_hp > 0).any(axis=2)
+        return ~alive[:, 1], ~alive[:, 0]
+
+    # Game progression
+
+    def play_round(self, actions: np.ndarray) -> None:
+        """
+        Apply the actions of both players in all games not finished yet, then update revealed moves, game ends and
+        turn counters.
+
+        :param actions: int array of shape (number of games, 2), actions of player 1 and player 2
+        """
+
+        actions = np.where(self.finished[:, None], NO_ACTION, actions)
+        gs, rows = self.game_state, np.arange(len(self))
+
+        hits = self.apply_actions(gs, actions, self.rng)
+
+        # moves used are now known to the opponent (attacker is still on field)
+        for side in range(2):
+            g = rows[hits[:, side]]
+            gs.revealed[g, side, gs.on_field[g, side], actions[g, side]] = True
+            self.seen[rows, side, gs.on_field[:, side]] = True
+
+        of_alive = (gs.cur_hp[rows[:, None], [0, 1], gs.on_field] > 0).all(axis=1)
+        ended = self.is_end_state()
+        self.turns += ~self.finished & ~ended & of_alive
+        self.finished |= ended | (self.turns >= MAX_ROUNDS)
+
+    @staticmethod
+    def damage(state: BatchedGameStruct, actions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Damage caused by the move chosen by each side on the opposite on-field Pokémon, read from the damage table
+        (0 for actions that are not moves)
+
+        :return: int array of shape (number of games, 2)
+        """
+
+        rows = np.arange(len(state))[:, None]
+        sides = np.array([0, 1])
+        of, opp_of = state.on_field, state.on_field[:, ::-1]
+        attack = (actions >= 0) & (actions < state.n_moves)
+        move_slot = np.where(attack, actions, 0)
+
+        move_type = state.move_type[rows, sides, of, move_slot]
+        pow_idx = state.move_pow[rows, sides, of, move_slot] == MAX_POW
+        stab_idx = move_type == state.poke_type[rows, sides, of]
+        aff_idx = TYPE_AFF_INDEX_ARRAY[move_type, state.poke_type[rows, 1 - sides, opp_of]]
+        atk_idx = np.where(attack, state.atk[rows, sides, of] - MIN_STAT, 0)
+        des_idx = np.where(attack, state.des[rows, 1 - sides, opp_of] - MIN_STAT, 0)
+
+        dmg = DamageTable.DAMAGE_TABLE[pow_idx.astype(np.intp), atk_idx, des_idx, stab_idx.astype(np.intp), aff_idx,
+                                       rng.integers(0, len(DamageTable.ROLLS), attack.shape)]
+        return np.where(attack, dmg, 0)
+
+    @staticmethod
+    def apply_actions(state: BatchedGameStruct, actions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Execute player choices with regard to game rules (cf. PokeGame.apply_player_moves): switches are applied
+        first, then attacks in speed order, the second attacker attacking only if still alive.
+
+        :param state: BatchedGameStruct object, modified in place
+        :param actions: int array of shape (number of games, 2)
+        :param rng: random generator for damage rolls and speed ties
+        :return: bool array of shape (number of games, 2) indicating which side has attacked
+        """
+
+        rows, n_moves = np.arange(len(state)), state.n_moves
+        for side in range(2):
+            switch = actions[:, side] >= n_moves
+            state.on_field[switch, side] = actions[switch, side] - n_moves
+
+        dmg = BatchedPokeGame.damage(state, actions, rng)
+        attack = (actions >= 0) & (actions < n_moves)
+
+        spe = state.spe[rows[:, None], [0, 1], state.on_field]
+        first = np.where(spe[:, 0] != spe[:, 1], spe[:, 1] > spe[:, 0], rng.integers(0, 2, len(state))).astype(np.intp)
+
+        hits = np.zeros(attack.shape, dtype=bool)
+        for side in (first, 1 - first):
+            own_of, tgt_of = state.on_field[rows, side], state.on_field[rows, 1 - side]
+            hit = attack[rows, side] & (state.cur_hp[rows, side, own_of] > 0)
+            g = rows[hit]
+            state.cur_hp[g, 1 - side[g], tgt_of[g]] = np.maximum(0, state.cur_hp[g, 1 - side[g], tgt_of[g]] -
+                                                                  dmg[g, side[g]])
+            hits[g, side[g]] = True
+
+        return hits
@@ -0,0 +1,138 @@
+"""
+    Precomputed damage of the damage formula over the whole (bounded) domain of the game parameters, so that computing
+    damage is an array lookup. Reverse tables give, for a damage value, the range of attack (resp. defense) statistics
+    producing it, and are used for statistic estimation.
+"""
+
+import os
+from math import floor
+
+import numpy as np
+
+from src.game.constants import MIN_STAT, MAX_STAT, MIN_POW, MAX_POW
+
+# resolved from the module, so that the same file is used whatever the working directory
+DAMAGE_TABLE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "db",
+                                                  "damage-table.npy"))
+
+# table axes: (pow, atk, des, stab, type_aff, roll)
+POWS = (MIN_POW, MAX_POW)
+STABS = (1, 1.5)
+TYPE_AFFS = (0, 0.5, 1, 2)
+ROLLS = tuple(range(85, 101))
+
+POW_INDEX = {p: i for i, p in enumerate(POWS)}
+STAB_INDEX = {s: i for i, s in enumerate(STABS)}
+TYPE_AFF_INDEX = {t: i for i, t in enumerate(TYPE_AFFS)}
+
+
+def compute_damage(base_pow: int, atk: int, des: int, stab: float, type_aff: float, rd: float) -> int:
+    """ Damage formula with all parameters explicit (rd: random factor between 0.85 and 1) """
+
+    dmg = (floor(floor((2 * 100 / 5 + 2) * base_pow * atk / des) / 50) + 2)
+    dmg *= rd * stab * type_aff
+    if 0 < dmg < 1:
+        dmg = 1
+
+    return floor(dmg)
+
+
+def build_damage_table() -> np.ndarray:
+    """
+        Compute damage for every combination of parameters (same floating point operations as compute_damage)
+
+        :return: int16 array of shape (len(POWS), n_stats, n_stats, len(STABS), len(TYPE_AFFS), len(ROLLS))
+    """
+
+    stats = np.arange(MIN_STAT, MAX_STAT + 1, dtype=np.float64)
+    pows = np.array(POWS, dtype=np.float64)[:, None, None, None, None, None]
+    atk, des = stats[None, :, None, None, None, None], stats[None, None, :, None, None, None]
+    stab = np.array(STABS)[None, None, None, :, None, None]
+    type_aff = np.array(TYPE_AFFS)[None, None, None, None, :, None]
+    rd = (np.array(ROLLS) / 100)[None, None, None, None, None, :]
+
+    dmg = (np.floor(np.floor((2 * 100 / 5 + 2) * pows * atk / des) / 50) + 2) * (rd * stab * type_aff)
+    dmg[(0 < dmg) & (dmg < 1)] = 1
+
+    return np.floor(dmg).astype(np.int16)
+
+
+def build_reverse_tables(table: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+        From the damage table, compute the lowest and highest values of attack (resp. defense) statistic producing
+        each damage value for some roll. Impossible damage values have range (-1, -1).
+
+        :return: two int16 arrays of shape (len(POWS), n_stats, len(STABS), len(TYPE_AFFS), max damage + 1, 2), indexed
+            by (pow, des, stab, type_aff, damage) for attack and (pow, atk, stab, type_aff, damage) for defense. Last
+            axis holds the (lowest, highest) statistic.
+    """
+
+    n_pow, n_stats, _, n_stab, n_aff, n_rolls = table.shape
+    p, a, d, s, t, _ = np.indices(table.shape, dtype=np.int16).reshape(6, -1)
+    dmg = table.reshape(-1)
+
+    out = list()
+    for known, searched in ((d, a), (a, d)):
+        rev = np.empty((n_pow, n_stats, n_stab, n_aff, int(table.max()) + 1, 2), dtype=np.int16)
+        rev[..., 0], rev[..., 1] = n_stats, -1
+        np.minimum.at(rev[..., 0], (p, known, s, t, dmg), searched)
+        np.maximum.at(rev[..., 1], (p, known, s, t, dmg), searched)
+        rev[rev[..., 1] < 0] = -1
+        rev[rev >= 0] += MIN_STAT
+        out.append(rev)
+
+    return out[0], out[1]
+
+
+def save_damage_table(path: str = DAMAGE_TABLE_PATH) -> None:
+    np.save(path, DAMAGE_TABLE)
+
+
+def load_damage_table(path: str = DAMAGE_TABLE_PATH) -> None:
+    """ Replace the tables in use by the ones computed from the damage table stored in the file (memory mapped) """
+
+    global DAMAGE_TABLE, REVERSE_ATK_TABLE, REVERSE_DES_TABLE
+    DAMAGE_TABLE = np.load(path, mmap_mode="r")
+    REVERSE_ATK_TABLE, REVERSE_DES_TABLE = build_reverse_tables(np.asarray(DAMAGE_TABLE))
+
+
+def table_damage(base_pow: int, atk: int, des: int, stab: float, type_aff: float, roll: int) -> int:
+    """
+        Damage for the given parameters (roll: integer between 85 and 100), read from the table when parameters are
+        inside its domain (integer statistics and roll) and computed otherwise.
+    """
+
+    try:
+        if MIN_STAT <= atk <= MAX_STAT and MIN_STAT <= des <= MAX_STAT:
+            return DAMAGE_TABLE.item(POW_INDEX[base_pow], atk - MIN_STAT, des - MIN_STAT, STAB_INDEX[stab],
+                                     TYPE_AFF_INDEX[type_aff], roll - 85)
+    except (KeyError, TypeError):  # parameters outside the table (e.g., non-integer statistics)
+        pass
+
+    return compute_damage(base_pow, atk, des, stab, type_aff, roll / 100)
+
+
+def stat_range(reverse_table: np.ndarray, base_pow: int, known_stat: int, stab: float, type_aff: float,
+               dmg: int) -> tuple[int, int] | None:
+    """
+        Range of the unknown statistic (attack or defense depending on reverse_table) producing dmg for some roll, or
+        None when the parameters are outside the domain of the table or no value of the statistic produces dmg.
+    """
+
+    try:
+        if MIN_STAT <= known_stat <= MAX_STAT and 0 <= dmg < reverse_table.shape[-2]:
+            lo, hi = reverse_table[POW_INDEX[base_pow], known_stat - MIN_STAT, STAB_INDEX[stab],
+                                   TYPE_AFF_INDEX[type_aff], dmg]
+            if hi >= 0:
+                return int(lo), int(hi)
+    except KeyError:
+        pass
+
+    return None
+
+
+if os.path.exists(DAMAGE_TABLE_PATH):
+    load_damage_table(DAMAGE_TABLE_PATH)
+else:
+    DAMAGE_TABLE = build_damage_table()
+    REVERSE_ATK_TABLE, REVERSE_DES_TABLE = build_reverse_tables(DAMAGE_TABLE)
@@ -0,0 +1,77 @@
+"""
+    Statistics used to evaluate agents from the outcomes of games (victory rates of player 1)
+"""
+
+from math import log, sqrt
+from statistics import NormalDist
+
+
+def z_value(confidence: float) -> float:
+    """ Quantile of the standard normal distribution for a two-sided interval of the provided confidence """
+
+    return NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+
+def wilson_interval(wins: int, n: int, confidence: float = 0.95) -> tuple[float, float]:
+    """ Wilson score interval of a victory rate (well-behaved for rates close to 0 or 1, unlike the normal one) """
+
+    if not n:
+        return 0.0, 1.0
+
+    z = z_value(confidence)
+    p = wins / n
+    center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half_width = z * sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return max(center - half_width, 0.0), min(center + half_width, 1.0)
+
+
+def hoeffding_interval(wins: int, n: int, confidence: float = 0.95) -> tuple[float, float]:
+    """ Interval of a victory rate from Hoeffding's inequality (distribution free, hence wider than Wilson's) """
+
+    if not n:
+        return 0.0, 1.0
+
+    half_width = sqrt(log(2 / (1 - confidence)) / (2 * n))
+    return max(wins / n - half_width, 0.0), min(wins / n + half_width, 1.0)
+
+
+def sprt_llr(wins: int, n: int, p0: float, p1: float) -> float:
+    """ Log-likelihood ratio of the hypotheses 'victory rate is p1' and 'victory rate is p0' """
+
+    return wins * log(p1 / p0) + (n - wins) * log((1 - p1) / (1 - p0))
+
+
+def sequential_confidence(confidence: float, n_checks: int) -> float:
+    """ Confidence of the intervals of each check of a sequential evaluation, so that all the intervals of the n_checks
+    checks hold together with the provided confidence (Bonferroni correction). Checking an interval of the nominal
+    confidence after each chunk of games would make the error rate grow with the number of checks. """
+
+    return 1 - (1 - confidence) / max(n_checks, 1)
+
+
+def sequential_stop(wins: int, n: int, method: str = "wilson", precision: float = 0.05, confidence: float = 0.95,
+                    threshold: float = None, n_checks: int = 1) -> bool:
+    """
+        Tells whether a sequential evaluation can stop after n games
+
+        :param method: "wilson" or "hoeffding" to stop once the confidence interval of the victory rate is narrower than
+            2 * precision or excludes threshold, "sprt" to stop once Wald's sequential probability ratio test decides
+            between victory rates threshold - precision and threshold + precision (error rates 1 - confidence)
+        :param threshold: victory rate the evaluated agent is compared to (0.5 for sprt if None)
+        :param n_checks: maximum number of checks of the evaluation, the intervals of "wilson" and "hoeffding" being
+            widened accordingly (cf. sequential_confidence). sprt is valid whatever the number of checks.
+    """
+
+    if not n:
+        return False
+
+    if method == "sprt":
+        threshold = 0.5 if threshold is None else threshold
+        p0, p1 = max(threshold - precision, 1e-6), min(threshold + precision, 1 - 1e-6)
+        alpha = beta = 1 - confidence
+        llr = sprt_llr(wins, n, p0, p1)
+        return llr <= log(beta / (1 - alpha)) or llr >= log((1 - beta) / alpha)
+
+    low, high = {"wilson": wilson_interval, "hoeffding": hoeffding_interval}[method](
+        wins, n, sequential_confidence(confidence, n_checks))
+    return high - low <= 2 * precision or threshold is not None and (low > threshold or high < threshold)
@@ -1,35 +1,80 @@
 import copy
+import multiprocessing
 import os
+import random
+from contextlib import contextmanager, nullcontext
+from functools import partial
 from math import ceil
 from queue import Queue
 
+import numpy as np
+
 from src.agents.PlayerBM import PlayerBM
-from src.agents.PlayerGA import PlayerGA
+from src.agents.PlayerGA import PlayerGA, PlayerGAPopulation
 from src.agents.PlayerGT import PlayerGT
 from src.agents.PlayerHuman import PlayerHuman
 from src.agents.PlayerMDM import PlayerMDM
 from src.agents.PlayerNN import PlayerNN
 from src.agents.PlayerRL import PlayerRL
 from src.agents.PlayerRandom import PlayerRandom
+from src.agents.ReplayBuffer import ReplayBuffer
+from src.agents.TranspositionTable import TranspositionTable
 from src.db.dbmanager import load_ml_agent, update_ml_agent
+from src.game.ArrayPokeGame import ArrayPokeGame
+from src.game.BatchedPokeGame import BatchedPokeGame
+from src.game.EvalStatistics import sequential_confidence, sequential_stop, wilson_interval, hoeffding_interval
 from src.game.GameEstimation import fill_game_with_estimation
 from src.game.PokeGame import PokeGame, gen_random_specs
+from src.game.Profiler import Profiler
 from src.game.constants import NB_POKEMON, NB_MOVES, MAX_ROUNDS
 from src.game.GameEngineParams import FightParams, TestParams, TrainParams
 
 
+def game_seed(master_seed: int, game_idx: int) -> int:
+    """ Seed of the random generators for a game of an evaluation. Depends only on the seed of the evaluation and on
+    the index of the game, so that results do not depend on the way games are split between processes. """
+
+    return int(np.random.SeedSequence([master_seed, game_idx]).generate_state(1)[0])
+
+
+@contextmanager
+def global_rng_state():
+    """ Restores the states of the global generators of random and numpy when exiting the context """
+
+    py_state, np_state = random.getstate(), np.random.get_state()
+    try:
+        yield
+    finally:
+        random.setstate(py_state)
+        np.random.set_state(np_state)
+
+
+def run_test_games(ge_params: TestParams, master_seed: int, game_indices: list[int],
+                   profile: bool = False) -> tuple[int, int, dict | None]:
+    """ Entry point of the worker processes of GameEngine.test_mode
+
+    :param profile: Indicates whether the games must be profiled
+    :return: number of victories of player 1, number of games played and timings of the profiler (if any) """
+
+    ge = GameEngine(ge_params, profiler=Profiler() if profile else None)
+    p1_victories = ge.play_test_games(game_indices, master_seed)
+    return p1_victories, len(game_indices), dict(ge.profiler.timings) if profile else None
+
+
 class GameEngine:
     def __init__(self, ge_params: FightParams | TestParams | TrainParams, from_ui: Queue | None = None,
-                 to_ui: Queue | None = None):
+                 to_ui: Queue | None = None, profiler: Profiler | None = None):
         """
         :param ge_params: "Params" object containing parameters required to run game mode
         :param from_ui: Shared object to communicate with UI (set to None if not called from UI)
         :param to_ui: Shared object to communicate with UI
+        :param profiler: If provided, times the phases of the train and test game loops
         """
 
         self.ge_params = ge_params
         self.from_ui = from_ui
         self.to_ui = to_ui
+        self.profiler = profiler
 
     # init team and players
 
@@ -51,17 +96,23 @@ class GameEngine:
         return out
 
     @staticmethod
-    def init_players(ge_params):
+    def init_players(ge_params, roles: tuple[str, ...] = ("p1", "p2")):
         """
         Initialize Player objects that will be used as agents to play the game.
 
         :param ge_params: "Params" object containing information to initialize the game
-        :return: List of two "Player" objects
+        :param roles: Sides whose players are built (e.g., only the opponent of a population, cf.
+            population_test_mode)
+        :return: List of "Player" objects, one per role
         """
 
         players = list()
         pars = ge_params
+        tt = TranspositionTable()  # shared by the search agents of the game mode
+        replays = dict()  # replay buffer of each network in train mode, shared by the rl agents training it
         for p, n in zip([pars.agent1type, pars.agent2type], ["p1", "p2"]):
+            if n not in roles:
+                continue
             if p == "random":
                 players.append(PlayerRandom(n))
 
@@ -75,7 +126,7 @@ class GameEngine:
                 players.append(PlayerBM(n))
 
             elif p == "gt":
-                players.append(PlayerGT(n))
+                players.append(PlayerGT(n, tt=tt, solver=pars.gt_solver))
 
             elif p == "rl":
                 if n == "p1":
@@ -87,21 +138,27 @@ class GameEngine:
                     # train mode, both player in ML and same NN -> share object
                     network = players[0].network
                 lr = pars.lr if pars.mode == "train" else None
-                players.append(PlayerRL(n, pars.mode, network, ls, act_f, pars.eps, lr))
+                if pars.mode == "train" and pars.replay:
+                    if id(network) not in replays:
+                        replays[id(network)] = ReplayBuffer(pars.replay, network[0].shape[1])
+                    players.append(PlayerRL(n, pars.mode, network, ls, act_f, pars.eps, lr, tt, replays[id(network)],
+                                            pars.batch_size, pars.train_every))
+                else:
+                    players.append(PlayerRL(n, pars.mode, network, ls, act_f, pars.eps, lr, tt))
 
             elif p == "ga":
                 if n == "p1":
                     network, act_f = load_ml_agent(pars.ml1)[:2] if type(pars.ml1) == str else pars.ml1
                 elif n == "p2":
                     network, act_f = load_ml_agent(pars.ml2)[:2] if type(pars.ml2) == str else pars.ml2
-                players.append(PlayerGA(n, network, act_f))
+                players.append(PlayerGA(n, network, act_f, tt))
 
             elif p == "ml":
                 if n == "p1":
                     network, act_f, _ = load_ml_agent(pars.ml1) if type(pars.ml1) == str else pars.ml1
                 elif n == "p2":
                     network, act_f, _ = load_ml_agent(pars.ml2) if type(pars.ml2) == str else pars.ml2
-                players.append(PlayerNN(n, network, act_f))
+                players.append(PlayerNN(n, network, act_f, tt))
 
             else:
                 players.append(None)
@@ -157,13 +214,13 @@ class GameEngine:
             # player 2 move
             player2_move = players[1].make_move(game_p2)
 
-            # send to game
+            # send to game (actions are named by the ui from the state in which they were chosen)
+            round_state = game.get_cur_state()
             turn_res = game.play_round(player1_move, player2_move)
             input(turn_res)
-            player1_move = "None" if player1_move is None else player1_move
-            player2_move = "None" if player2_move is None else player2_move
             last_moves = [player1_move, player2_move]
             self.to_ui.put(last_moves)
+            self.to_ui.put(round_state)
             self.to_ui.put(turn_res)
 
             game_finished = game.is_end_state(None)
@@ -186,9 +243,16 @@ class GameEngine:
 
         pars = self.ge_params
         players = self.init_players(pars)
+        deepcopy, estimation = copy.deepcopy, fill_game_with_estimation
+        if self.profiler is not None:
+            self.profiler.instrument_players(players)
+            deepcopy = self.profiler.timed("deepcopy", deepcopy)
+            estimation = self.profiler.timed("fill_game_with_estimation", estimation)
 
         for i in range(pars.nb):
             game = PokeGame([self.get_team_specs(pars.team1), self.get_team_specs(pars.team2)])
+            if self.profiler is not None:
+                self.profiler.instrument_game(game)
             turn_nb = 1
             game_finished = False
 
@@ -197,14 +261,14 @@ class GameEngine:
 
                 # Some agents require None values to be estimated
                 if isinstance(players[0], PlayerNN) or isinstance(players[0], PlayerGT):
-                    game_p1 = copy.deepcopy(game)
-                    fill_game_with_estimation("p1", game_p1)
+                    game_p1 = deepcopy(game)
+                    estimation("p1", game_p1)
                 else:
                     game_p1 = game
 
                 if isinstance(players[1], PlayerNN) or isinstance(players[1], PlayerGT):
-                    game_p2 = copy.deepcopy(game)
-                    fill_game_with_estimation("p2", game_p2)
+                    game_p2 = deepcopy(game)
+                    estimation("p2", game_p2)
                 else:
                     game_p2 = game
 
@@ -242,58 +306,317 @@ class GameEngine:
                 if type(pars.ml2) == str:
                     update_ml_agent(pars.ml2, players[1].network)
 
-    def test_mode(self, display: bool = False) -> float:
+        if display and self.profiler is not None:
+            print(self.profiler)
+
+    def test_mode(self, display: bool = False, workers: int = 1) -> float:
         """
         :param display: Indicates whether a display of the progression is required
+        :param workers: Number of processes the games are split between. Games are seeded from the seed of the test
+            parameters (drawn from the random module if None), so that results do not depend on this number. With
+            the batched engine, the whole batch is seeded from it (cf. batched_game), but games differ from the ones of
+            the other engines.
         :return: Victory rate of player 1
         """
 
         pars = self.ge_params
+        if pars.engine == "batched":
+            return self.batched_test_mode(display)
+
+        master_seed = random.getrandbits(32) if pars.seed is None else pars.seed
+
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                p1_victories = self.pool_test_games(pool, workers, range(pars.nb), master_seed, display)
+        else:
+            p1_victories = self.play_test_games(range(pars.nb), master_seed, display)
+
+        if self.to_ui is not None:
+            self.to_ui.put("testing ended")
+            self.to_ui.put(p1_victories / pars.nb)
+        elif display:
+            print("testing ended\np1 victories: {}".format(p1_victories / pars.nb))
+            if self.profiler is not None:
+                print(self.profiler)
+
+        return round(p1_victories / pars.nb, 4)
+
+    def sequential_test_mode(self, precision: float = 0.05, confidence: float = 0.95, method: str = "wilson",
+                             threshold: float = None, chunk: int = 100, display: bool = False,
+                             workers: int = 1) -> tuple[float, tuple[float, float], int]:
+        """
+        Same as test_mode, games being played by chunks until the victory rate is known with the requested precision
+        (cf. EvalStatistics.sequential_stop for the parameters of the stopping rule) or pars.nb games have been played.
+        Games are seeded as in test_mode, so the result is the one of test_mode with the number of games played.
+
+        :param chunk: Number of games played between two checks of the stopping rule
+        :param display: Indicates whether a display of the progression is required
+        :param workers: Number of processes the games are split between
+        :return: Victory rate of player 1, its confidence interval (Hoeffding's for method "hoeffding", Wilson's
+            otherwise, corrected for the number of checks so that it holds whenever the evaluation stops) and the
+            number of games played
+        """
+
+        pars = self.ge_params
+        master_seed = random.getrandbits(32) if pars.seed is None else pars.seed
+        interval = hoeffding_interval if method == "hoeffding" else wilson_interval
+        n_checks = ceil(pars.nb / chunk)
+        p1_victories = n_played = int()
+
+        with multiprocessing.Pool(workers) if workers > 1 else nullcontext() as pool:
+            players = self.init_test_players(pars) if pool is None else None  # kept from a chunk to the next
+            while n_played < pars.nb and not sequential_stop(p1_victories, n_played, method, precision, confidence,
+                                                             threshold, n_checks):
+                game_indices = range(n_played, min(n_played + chunk, pars.nb))
+                if pool is not None:
+                    p1_victories += self.pool_test_games(pool, workers, game_indices, master_seed, display)
+                else:
+                    p1_victories += self.play_test_games(game_indices, master_seed, display, players)
+                n_played = game_indices.stop
+
+        if self.to_ui is not None:
+            self.to_ui.put("testing ended")
+            self.to_ui.put(p1_victories / n_played)
+        elif display:
+            print("testing ended\np1 victories: {} ({} games)".format(p1_victories / n_played, n_played))
+
+        return (round(p1_victories / n_played, 4),
+                interval(p1_victories, n_played, sequential_confidence(confidence, n_checks)), n_played)
+
+    def pool_test_games(self, pool, workers: int, game_indices, master_seed: int, display: bool = False) -> int:
+        """
+        Plays the games of test_mode with the provided indices, split between the processes of the pool
+
+        :return: Number of victories of player 1
+        """
+
+        p1_victories = n_played = int()
+        chunks = [c.tolist() for c in np.array_split(np.asarray(game_indices), 4 * workers) if len(c)]
+        play = partial(run_test_games, self.ge_params, master_seed, profile=self.profiler is not None)
+        for victories, n, timings in pool.imap_unordered(play, chunks):
+            p1_victories += victories
+            n_played += n
+            if timings is not None:
+                self.profiler.merge(timings)
+            self.test_progress(game_indices[0] + n_played, display)
+
+        return p1_victories
+
+    def paired_test_mode(self, other_params: TestParams, display: bool = False) -> tuple[float, float, int]:
+        """
+        Compares the agent 1 of the test parameters with the agent 1 of other_params (the agents 2 being opponents) on
+        common random numbers: for each of the pars.nb seeds (cf. test_mode), both configurations play the same pair of
+        teams with the same random stream, once as player 1 and once as player 2 with the teams swapped.
+
+        :param other_params: Parameters of the other configuration (team pairs, number of games and seed are the ones of
+            the test parameters)
+        :param display: Indicates whether a display of the progression is required
+        :return: Mean difference of the scores (average of the victories on both sides) of the two configurations, its
+            standard error and the number of team pairs played
+        """
+
+        pars = self.ge_params
+        master_seed = random.getrandbits(32) if pars.seed is None else pars.seed
+
+        # players and game type of each configuration, on each side
+        configs = list()
+        for p in (pars, other_params):
+            sides = list()
+            for side_pars in (p, self.swapped_params(p)):
+                players = self.init_test_players(side_pars)
+                sides.append((players, self.test_game_type(side_pars, players)))
+            configs.append(sides)
+
+        diffs = list()
+        with global_rng_state():  # cf. play_test_games
+            for i in range(pars.nb):
+                seed = game_seed(master_seed, i)
+                random.seed(seed)
+                teams_specs = [self.get_team_specs(pars.team1), self.get_team_specs(pars.team2)]
+
+                scores = list()
+                for (players, game_type), (sw_players, sw_game_type) in configs:
+                    random.seed(seed)
+                    np.random.seed(seed)
+                    score = self.play_test_game(players, game_type, teams_specs, self.profiler)[0]
+                    random.seed(seed)
+                    np.random.seed(seed)
+                    score += self.play_test_game(sw_players, sw_game_type, teams_specs[::-1], self.profiler)[1]
+                    scores.append(score / 2)
+                diffs.append(scores[0] - scores[1])
+
+                if not i % 10:
+                    self.test_progress(i, display)
+
+        diff = float(np.mean(diffs))
+        std_err = float(np.std(diffs, ddof=1) / np.sqrt(len(diffs))) if len(diffs) > 1 else 0.0
+
+        if self.to_ui is not None:
+            self.to_ui.put("testing ended")
+            self.to_ui.put(diff)
+        elif display:
+            print("testing ended\nscore difference: {} (standard error {})".format(diff, std_err))
+
+        return round(diff, 4), std_err, pars.nb
+
+    @staticmethod
+    def swapped_params(pars: TestParams) -> TestParams:
+        """ Copy of the test parameters where the agents (and their teams) exchange their sides """
+
+        swapped = copy.copy(pars)
+        swapped.agent1type, swapped.agent2type = pars.agent2type, pars.agent1type
+        swapped.ml1, swapped.ml2 = pars.ml2, pars.ml1
+        swapped.team1, swapped.team2 = pars.team2, pars.team1
+        return swapped
+
+    @staticmethod
+    def test_game_type(pars: TestParams, players: list) -> type:
+        """ Game engine of the games played one at a time in test mode (cf. TestParams) """
+
+        engine = pars.engine
+        if engine == "array":
+            if any(isinstance(p, PlayerNN) or isinstance(p, PlayerGT) for p in players):
+                raise ValueError("Array engine does not maintain player views required by NN and GT agents")
+            return ArrayPokeGame
+        if engine != "object":
+            raise ValueError("Engine {} is only supported by test_mode".format(engine))
+
+        return PokeGame
+
+    def init_test_players(self, pars: TestParams) -> list:
+        """ Players of the test mode, instrumented by the profiler (if any) """
+
         players = self.init_players(pars)
+        if self.profiler is not None:
+            self.profiler.instrument_players(players)
+        return players
+
+    def play_test_games(self, game_indices, master_seed: int, display: bool = False, players: list = None) -> int:
+        """
+        Plays the games of test_mode with the provided indices (cf. game_seed)
+
+        :param display: Indicates whether a display of the progression is required
+        :param players: Players of the games (cf. init_test_players), built from the test parameters if None
+        :return: Number of victories of player 1
+        """
+
+        pars = self.ge_params
+        players = self.init_test_players(pars) if players is None else players
+        game_type = self.test_game_type(pars, players)
         p1_victories = int()
 
-        for i in range(pars.nb):
-            game = PokeGame([self.get_team_specs(pars.team1), self.get_team_specs(pars.team2)])
-            turn_nb = 1
-            game_finished = False
+        # games reseed the global generators, whose state is restored afterwards so that the randomness of the caller
+        # does not depend on whether games were played in its process
+        with global_rng_state():
+            for i in game_indices:
+                seed = game_seed(master_seed, i)
+                random.seed(seed)
+                np.random.seed(seed)
 
-            # game loop
-            while not game_finished and turn_nb < MAX_ROUNDS:
+                teams_specs = [self.get_team_specs(pars.team1), self.get_team_specs(pars.team2)]
+                p1_victories += self.play_test_game(players, game_type, teams_specs, self.profiler)[0]
 
-                # Some agents require None values to be estimated
-                if isinstance(players[0], PlayerNN) or isinstance(players[0], PlayerGT):
-                    game_p1 = copy.deepcopy(game)
-                    fill_game_with_estimation("p1", game_p1)
-                else:
-                    game_p1 = game
+                if not i % 10:
+                    self.test_progress(i, display)
 
-                if isinstance(players[1], PlayerNN) or isinstance(players[1], PlayerGT):
-                    game_p2 = copy.deepcopy(game)
-                    fill_game_with_estimation("p2", game_p2)
-                else:
-                    game_p2 = game
+        return p1_victories
 
-                of1, of2 = game.game_state.on_field1, game.game_state.on_field2
-                player1_move = players[0].make_move(game_p1) if of1.cur_hp and of2.cur_hp or not of1.cur_hp else None
-                player2_move = players[1].make_move(game_p2) if of1.cur_hp and of2.cur_hp or not of2.cur_hp else None
+    @staticmethod
+    def play_test_game(players: list, game_type: type, teams_specs: list,
+                       profiler: Profiler | None = None) -> tuple[bool, bool]:
+        """
+        Plays a game of test mode
 
-                game.play_round(player1_move, player2_move)
-                game_finished = game.is_end_state(None)
+        :param profiler: If provided, times the rounds, the copies and the estimations of the game (cf. Profiler)
+        :return: Victory of player 1, victory of player 2
+        """
 
-                if not game_finished and of1.cur_hp > 0 and of2.cur_hp > 0:
-                    # turn change once attacks have been applied and fainted Pokemon switched
-                    turn_nb += 1
+        game = game_type(teams_specs)
+        deepcopy, estimation = copy.deepcopy, fill_game_with_estimation
+        if profiler is not None:
+            profiler.instrument_game(game)
+            deepcopy = profiler.timed("deepcopy", deepcopy)
+            estimation = profiler.timed("fill_game_with_estimation", estimation)
+        turn_nb = 1
+        game_finished = False
+
+        # game loop
+        while not game_finished and turn_nb < MAX_ROUNDS:
+
+            # Some agents require None values to be estimated
+            if isinstance(players[0], PlayerNN) or isinstance(players[0], PlayerGT):
+                game_p1 = deepcopy(game)
+                estimation("p1", game_p1)
+            else:
+                game_p1 = game
+
+            if isinstance(players[1], PlayerNN) or isinstance(players[1], PlayerGT):
+                game_p2 = deepcopy(game)
+                estimation("p2", game_p2)
+            else:
+                game_p2 = game
 
-            p1_victories += game.match_result()[0]
+            of1, of2 = game.game_state.on_field1, game.game_state.on_field2
+            player1_move = players[0].make_move(game_p1) if of1.cur_hp and of2.cur_hp or not of1.cur_hp else None
+            player2_move = players[1].make_move(game_p2) if of1.cur_hp and of2.cur_hp or not of2.cur_hp else None
+
+            game.play_round(player1_move, player2_move)
+            game_finished = game.is_end_state(None)
+
+            if not game_finished and of1.cur_hp > 0 and of2.cur_hp > 0:
+                # turn change once attacks have been applied and fainted Pokemon switched
+                turn_nb += 1
+
+        return game.match_result()
+
+    def test_progress(self, n_played: int, display: bool) -> None:
+        """ UI communication of the number of games of test_mode played so far """
+
+        if self.to_ui is not None:
+            self.to_ui.put(n_played)
+        elif display:
+            os.system("clear" if os.name == "posix" else "cls")
+            n_syms = ceil(20 * n_played / self.ge_params.nb)
+            print("Progression ({}): {}".format(n_played, "#" * n_syms + "_" * (20 - n_syms)))
+
+    def batched_game(self, n_games: int) -> BatchedPokeGame:
+        """ Games of the batched test modes, whose teams and random numbers are drawn from the seed of the test
+        parameters (drawn from the random module if None) """
+
+        pars = self.ge_params
+        seed = random.getrandbits(32) if pars.seed is None else pars.seed
+        with global_rng_state():  # cf. play_test_games
+            random.seed(seed)
+            teams_specs = [[self.get_team_specs(pars.team1), self.get_team_specs(pars.team2)] for _ in range(n_games)]
+        return BatchedPokeGame(teams_specs, seed=seed)
+
+    def batched_test_mode(self, display: bool = False) -> float:
+        """
+        Same as test_mode, all the games being played in lockstep with a BatchedPokeGame
+
+        :param display: Indicates whether a display of the progression is required
+        :return: Victory rate of player 1
+        """
+
+        pars = self.ge_params
+        players = self.init_players(pars)
+        if not all(hasattr(p, "make_moves") for p in players):
+            raise ValueError("Batched engine requires agents playing batches of games (random, mdm, bm, ml, rl, ga)")
+
+        game = self.batched_game(pars.nb)
+
+        while not game.finished.all():
+            game.play_round(np.stack([players[0].make_moves(game), players[1].make_moves(game)], axis=1))
 
             # UI communication
-            if not i % 10:
-                if self.to_ui is not None:
-                    self.to_ui.put(i)
-                elif display:
-                    os.system("clear" if os.name == "posix" else "cls")
-                    n_syms = ceil(20 * i / pars.nb)
-                    print("Progression ({}): {}".format(i, "#" * n_syms + "_" * (20 - n_syms)))
+            if self.to_ui is not None:
+                self.to_ui.put(int(game.finished.sum()))
+            elif display:
+                os.system("clear" if os.name == "posix" else "cls")
+                n_syms = ceil(20 * game.finished.sum() / pars.nb)
+                print("Progression ({}): {}".format(game.finished.sum(), "#" * n_syms + "_" * (20 - n_syms)))
+
+        p1_victories = int(game.match_result()[0].sum())
 
         if self.to_ui is not None:
             self.to_ui.put("testing ended")
@@ -302,3 +625,30 @@ class GameEngine:
             print("testing ended\np1 victories: {}".format(p1_victories / pars.nb))
 
         return round(p1_victories / pars.nb, 4)
+
+    def population_test_mode(self) -> np.ndarray:
+        """
+        Victory rates of the individuals of a population of a genetic algorithm, playing as player 1 with the greedy
+        selection of PlayerNN against agent 2. Agent 1 must be "ga" or "ml", the population being the first element of
+        ml1 (stacked weights, cf. PopulationNetwork). Each individual plays nb games, and all the games are played at
+        once with a BatchedPokeGame.
+
+        :return: Victory rate of each individual
+        """
+
+        pars = self.ge_params
+        if pars.agent1type not in ("ga", "ml"):
+            raise ValueError("Population test mode requires a population of ga or ml agents as agent 1")
+
+        population, act_f = pars.ml1[:2]
+        n_indiv = len(population[0])
+        players = [PlayerGAPopulation("p1", population, act_f, np.repeat(np.arange(n_indiv), pars.nb)),
+                   self.init_players(pars, ("p2",))[0]]
+        if not hasattr(players[1], "make_moves"):
+            raise ValueError("Batched engine requires agents playing batches of games (random, mdm, bm, ml, rl, ga)")
+
+        game = self.batched_game(n_indiv * pars.nb)
+        while not game.finished.all():
+            game.play_round(np.stack([players[0].make_moves(game), players[1].make_moves(game)], axis=1))
+
+        return game.match_result()[0].reshape(n_indiv, pars.nb).mean(axis=1)
@@ -27,9 +27,19 @@ class AbstractParams:
 
 class TestParams(AbstractParams):
     def __init__(self, mode, agent1type, agent2type, eps=0.1, ml1=None, ml2=None, team1="random", team2="random",
-                 nb=1000):
+                 nb=1000, engine="object", seed=None, gt_solver="enumeration"):
+        """
+            :param engine: "object" to play with PokeGame, "array" to play with ArrayPokeGame (only for agents not
+                requiring player views), "batched" to play all the games at once with BatchedPokeGame (not for gt
+                agents)
+            :param seed: seed from which the seeds of the games are derived (drawn at random if None)
+            :param gt_solver: algorithm searching the Nash equilibria of the gt agents (cf. PlayerGT)
+        """
         super().__init__(mode, agent1type, agent2type, eps, ml1, ml2, team1, team2)
         self.nb = nb
+        self.engine = engine
+        self.seed = seed
+        self.gt_solver = gt_solver
 
     def set_nb(self, val):
         self.nb = abs(int(val))
@@ -37,18 +47,33 @@ class TestParams(AbstractParams):
 
 class TrainParams(AbstractParams):
     def __init__(self, mode, lr, agent1type='ml', agent2type='ml', eps=0.1, ml1=None, ml2=None, team1="random",
-                 team2="random", nb=1000):
+                 team2="random", nb=1000, replay=0, batch_size=32, train_every=1, gt_solver="enumeration"):
+        """
+            :param replay: capacity of the replay buffer of each network of the rl agents (shared by the agents
+                training the same network object), which then learn from minibatches of batch_size transitions sampled
+                from it every train_every transitions (0 for online updates)
+            :param gt_solver: algorithm searching the Nash equilibria of the gt agents (cf. PlayerGT)
+        """
         super().__init__(mode, agent1type, agent2type, eps, ml1, ml2, team1, team2)
         # train agent
         self.agent1type = agent1type
         self.agent2type = agent2type
         self.nb = nb
         self.lr = lr
+        self.replay = replay
+        self.batch_size = batch_size
+        self.train_every = train_every
+        self.gt_solver = gt_solver
 
     def set_nb(self, val):
         self.nb = abs(int(val))
 
 
 class FightParams(AbstractParams):
-    def __init__(self, mode, agent1type, agent2type, eps=0.1, ml1=None, ml2=None, team1="random", team2="random"):
+    def __init__(self, mode, agent1type, agent2type, eps=0.1, ml1=None, ml2=None, team1="random", team2="random",
+                 gt_solver="enumeration"):
+        """
+            :param gt_solver: algorithm searching the Nash equilibria of the gt agents (cf. PlayerGT)
+        """
         super().__init__(mode, agent1type, agent2type, eps, ml1, ml2, team1, team2)
+        self.gt_solver = gt_solver
@@ -1,8 +1,8 @@
 from copy import deepcopy
 
 from src.game.PokeGame import PokeGame
-from src.game.Pokemon import Move
-from src.game.constants import MIN_HP, MAX_HP, MIN_STAT, MAX_STAT, MIN_POW
+from src.game.Pokemon import MOVE_REGISTRY
+from src.game.constants import MIN_HP, MAX_HP, MIN_STAT, MAX_STAT
 
 
 def fill_game_with_estimation(role: str, game: PokeGame):
@@ -44,13 +44,13 @@ def fill_game_with_estimation(role: str, game: PokeGame):
         # All Pokémon have at least 1 STAB of MIN_POW
         if p.poke_type not in (m.move_type for m in p.moves):
             unknown_idx = [m.move_type for m in p.moves].index(None)
-            p.moves[unknown_idx] = Move("light_" + p.poke_type.lower(), p.poke_type, MIN_POW)
+            p.set_move(unknown_idx, MOVE_REGISTRY["light_" + p.poke_type.lower()])
 
         # Remaining unknown move: consider 1 neutral move
         if "light_notype" not in (m.name for m in p.moves):
             for i, m in enumerate(p.moves):
                 if m.name is None:
-                    p.moves[i] = Move("light_notype", "NOTYPE", MIN_POW)
+                    p.set_move(i, MOVE_REGISTRY["light_notype"])
                     break
 
     # Own Pokémons unknown to opponent are set to default, real stats are provided for Pokémon already seen
@@ -69,13 +69,13 @@ def fill_game_with_estimation(role: str, game: PokeGame):
         # All Pokémon have at least 1 STAB of MIN_POW
         if p.poke_type not in (m.move_type for m in p.moves):
             unknown_idx = [m.move_type for m in p.moves].index(None)
-            p.moves[unknown_idx] = Move("light_" + p.poke_type.lower(), p.poke_type, MIN_POW)
+            p.set_move(unknown_idx, MOVE_REGISTRY["light_" + p.poke_type.lower()])
 
         # Remaining unknown moves: consider 1 neutral move
         if "light_notype" not in (m.name for m in p.moves):
             for i, m in enumerate(p.moves):
                 if m.name is None:
-                    p.moves[i] = Move("light_notype", "NOTYPE", MIN_POW)
+                    p.set_move(i, MOVE_REGISTRY["light_notype"])
                     break
 
     # Team of the opponent is considered our view of it: we're not supposed to know its real choices and configs
@@ -87,3 +87,6 @@ def fill_game_with_estimation(role: str, game: PokeGame):
         opp_view.team1 = deepcopy(own_view.team1)
         opp_view.on_field1 = opp_view.team1[
             [i for i, p in enumerate(opp_view.team1) if p.name == opp_view.on_field1.name][0]]
+
+    own_view.reset_zobrist()
+    opp_view.reset_zobrist()
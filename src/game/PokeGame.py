@@ -1,39 +1,14 @@
 import copy
 import random
+from functools import lru_cache
 from math import floor, ceil
 
-from src.game.Pokemon import Pokemon, Move
-from src.game.constants import (TYPES, TYPES_INDEX, TYPE_CHART, MOVES, MIN_HP, MAX_HP, MIN_STAT, MAX_STAT, MIN_POW,
+from src.game import DamageTable
+from src.game.DamageTable import compute_damage, table_damage, stat_range
+from src.game.Pokemon import Pokemon, Move, Species, intern_move
+from src.game.constants import (TYPES, TYPES_INDEX, TYPE_CHART, MIN_HP, MAX_HP, MIN_STAT, MAX_STAT, MIN_POW,
                                 MAX_POW)
 
-DEF_SPECS = [[((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None), (None, None, None))),
-              ((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None),
-                (None, None, None))),
-              ((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None), (None, None, None)))],
-             [((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None), (None, None, None))),
-              ((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None), (None, None, None))),
-              ((None, None, None, None, None, None),
-               ((None, None, None), (None, None, None), (None, None, None)))]]
-
-
-def gen_default_specs(n_pokemon, n_moves):
-    ret = list()
-    for _ in range(2):  # 2-players game
-        tmp_player = list()
-        for _ in range(n_pokemon):
-            mvs = list()
-            for _ in range(n_moves):
-                mvs.append((None, None, None))
-            tmp_player.append(((None, None, None, None, None, None), tuple(mvs)))
-        ret.append(tmp_player)
-    return ret
-
-
 def gen_random_specs(n_pokemon, n_moves):
     """
         Generate random specs for 1 team for game construction
@@ -78,10 +53,67 @@ def gen_random_specs(n_pokemon, n_moves):
     return out
 
 
+@lru_cache(maxsize=None)
+def damage_distribution(base_pow: int, atk: int, des: int, stab: float, type_aff: float) -> tuple[tuple[int, float]]:
+    """
+        Exact distribution of the damage of a move over the 16 equiprobable values of the random factor of the damage
+        formula. Results are memoized, as the domain of the parameters is small.
+
+        :return: tuple of (damage, probability) pairs sorted by increasing damage
+    """
+
+    counts = dict()
+    for roll in range(85, 101):
+        dmg = table_damage(base_pow, atk, des, stab, type_aff, roll)
+        counts[dmg] = counts.get(dmg, 0) + 1
+
+    return tuple((dmg, n / 16) for dmg, n in sorted(counts.items()))
+
+
+@lru_cache(maxsize=None)
+def zobrist_key(*feature) -> int:
+    """
+        Random 64 bits key of a feature of a game state (e.g. ("cur_hp", team, slot, value)) for Zobrist hashing. Keys
+        are derived from the feature itself rather than drawn from the global random generator, so that they are the
+        same in all runs and processes and hashing does not alter the sequence of random numbers of the game.
+    """
+
+    feature = tuple(int(v) if isinstance(v, float) and v.is_integer() else v for v in feature)
+    return random.Random(repr(feature)).getrandbits(64)
+
+
+@lru_cache(maxsize=4096)
+def species_repr(species: Species) -> tuple[int, tuple[int], tuple[int]]:
+    """
+        Numeric representation of the static part of a Pokémon (type, stats and moves, unknown values being 0). Memoized,
+        as species are shared by the copies of a game and rarely change within a game.
+
+        :return: type index, [atk, des, spe], [move type index, move power] * number of moves
+    """
+
+    if species.name is None:
+        poke_type, stats = 0, (0, 0, 0)
+    else:
+        poke_type = TYPES_INDEX[species.poke_type]
+        stats = tuple(v if v is not None else 0 for v in (species.atk, species.des, species.spe))
+
+    mvs = list()
+    for m in species.moves:
+        if m.name is None:
+            mvs += [0, 0]
+        else:
+            mvs += [TYPES_INDEX[m.move_type], m.base_pow]
+
+    return poke_type, stats, tuple(mvs)
+
+
 class PokeGame:
     class GameStruct:
         """  Contains all information needed to represent a game state """
 
+        # Pokémon attributes part of the hash of a state (besides cur_hp and moves)
+        HASH_FIELDS = ("name", "poke_type", "hp", "atk", "des", "spe")
+
         def __init__(self, teams_specs):
             self.team1 = list()
             self.team2 = list()
@@ -90,11 +122,82 @@ class PokeGame:
                 for p in spec:
                     moves = list()
                     for atk in p[1]:
-                        moves.append(Move(atk[0], atk[1], atk[2]))
+                        moves.append(intern_move(atk[0], atk[1], atk[2]))
                     team.append(Pokemon(p[0][0], p[0][1], p[0][2:6], moves))
 
             self.on_field1 = self.team1[0]
             self.on_field2 = self.team2[0]
+            self._zobrist = None
+
+        @property
+        def zobrist(self) -> int:
+            """
+                Zobrist hash of the state (XOR of the keys of team slots, types, hp, stats, moves and on-field
+                Pokémon). It is computed on first access, then updated incrementally by apply_player_moves. Fields
+                modified by other means require a call to reset_zobrist.
+            """
+
+            if self._zobrist is None:
+                h = 0
+                for t, (team, of) in enumerate(((self.team1, self.on_field1), (self.team2, self.on_field2))):
+                    for i, p in enumerate(team):
+                        h ^= zobrist_key("cur_hp", t, i, p.cur_hp) ^ zobrist_key("move", t, i, tuple(
+                            (m.name, m.move_type, m.base_pow) for m in p.moves))
+                        for field in self.HASH_FIELDS:
+                            h ^= zobrist_key(field, t, i, getattr(p, field))
+                    h ^= zobrist_key("on_field", t, self.slot_of(team, of))
+                self._zobrist = h
+
+            return self._zobrist
+
+        def reset_zobrist(self):
+            self._zobrist = None
+
+        @property
+        def n_moves(self) -> int:
+            """
+                Number of moves of the Pokémon (same for all of them). Actions of the players are integers: move slot of
+                the on-field Pokémon (0 to n_moves - 1) or switch to team slot k (n_moves + k), as in BatchedPokeGame.
+            """
+
+            return len(self.team1[0].moves)
+
+        def is_switch(self, action: int | None) -> bool:
+            return action is not None and action >= len(self.team1[0].moves)
+
+        def zobrist_snapshot(self) -> tuple | None:
+            """ Values needed by update_zobrist (None if the hash is not in use) """
+
+            if self._zobrist is None:
+                return None
+            return (self.on_field1, self.on_field2), ([p.cur_hp for p in self.team1], [p.cur_hp for p in self.team2])
+
+        def update_zobrist(self, snapshot: tuple | None):
+            """ Update the hash with the on-field Pokémon and hp that changed since the snapshot was taken """
+
+            if snapshot is None or self._zobrist is None:
+                return
+
+            h, (pre_ofs, pre_hps) = self._zobrist, snapshot
+            for t, (team, of) in enumerate(((self.team1, self.on_field1), (self.team2, self.on_field2))):
+                pre_of = pre_ofs[t]
+                if of is not pre_of:
+                    h ^= zobrist_key("on_field", t, self.slot_of(team, pre_of)) ^ zobrist_key(
+                        "on_field", t, self.slot_of(team, of))
+                for i, (p, pre_hp) in enumerate(zip(team, pre_hps[t])):
+                    if p.cur_hp != pre_hp:
+                        h ^= zobrist_key("cur_hp", t, i, pre_hp) ^ zobrist_key("cur_hp", t, i, p.cur_hp)
+            self._zobrist = h
+
+        @staticmethod
+        def slot_of(team: list[Pokemon], poke: Pokemon) -> int:
+            for i, p in enumerate(team):
+                if p is poke:
+                    return i
+            return [p.name for p in team].index(poke.name)
+
+        def __hash__(self):
+            return self.zobrist
 
         def __eq__(self, other):
             """ Consider Pokémon and attacks must be in same order """
@@ -112,29 +215,14 @@ class PokeGame:
             return test
 
         def __copy__(self):
-            cp = PokeGame.GameStruct(gen_default_specs(len(self.team1), len(self.team1[0].moves)))
-            #cp = PokeGame.GameStruct(DEF_SPECS)
-
-            # copy atomic elements from original object
-            for p1_from, p2_from, p1_to, p2_to in zip(self.team1, self.team2, cp.team1, cp.team2):
-                p1_to.name, p2_to.name = p1_from.name, p2_from.name
-                p1_to.poke_type, p2_to.poke_type = p1_from.poke_type, p2_from.poke_type
-                p1_to.cur_hp, p2_to.cur_hp = p1_from.cur_hp, p2_from.cur_hp
-                p1_to.hp, p2_to.hp = p1_from.hp, p2_from.hp
-                p1_to.atk, p2_to.atk = p1_from.atk, p2_from.atk
-                p1_to.des, p2_to.des = p1_from.des, p2_from.des
-                p1_to.spe, p2_to.spe = p1_from.spe, p2_from.spe
-
-                for m1_from, m2_from, m1_to, m2_to in zip(p1_from.moves, p2_from.moves, p1_to.moves, p2_to.moves):
-                    m1_to.name, m2_to.name = m1_from.name, m2_from.name
-                    m1_to.move_type, m2_to.move_type = m1_from.move_type, m2_from.move_type
-                    m1_to.base_pow, m2_to.base_pow = m1_from.base_pow, m2_from.base_pow
-
-            for p1, p2 in zip(cp.team1, cp.team2):
-                if p1.name == self.on_field1.name:
-                    cp.on_field1 = p1
-                if p2.name == self.on_field2.name:
-                    cp.on_field2 = p2
+            """ Only the current hp of the Pokémon is copied, their species (static data) being shared """
+
+            cp = PokeGame.GameStruct.__new__(PokeGame.GameStruct)
+            cp.team1 = [p.__copy__() for p in self.team1]
+            cp.team2 = [p.__copy__() for p in self.team2]
+            cp.on_field1 = cp.team1[self.slot_of(self.team1, self.on_field1)]
+            cp.on_field2 = cp.team2[self.slot_of(self.team2, self.on_field2)]
+            cp._zobrist = self._zobrist
 
             return cp
 
@@ -162,6 +250,10 @@ class PokeGame:
             [teams_specs[0]] + [unknown_specs * len(teams_specs[1])])
         self.player2_view: PokeGame.GameStruct = PokeGame.GameStruct(
             [unknown_specs * len(teams_specs[0])] + [teams_specs[1]])
+        # species are built once per game: players' views of their own team share the ones of the complete state
+        for p_view, p in zip(self.player1_view.team1 + self.player2_view.team2,
+                             self.game_state.team1 + self.game_state.team2):
+            p_view.species = p.species
 
         # Players witness name, type and hp of first opponent Pokémon (+ know they have a light power STAB)
         p2_lead_view, p2_lead_src = self.player1_view.team2[0], self.game_state.on_field2
@@ -187,8 +279,6 @@ class PokeGame:
         """
 
         cp = obj.__new__(type(obj))
-        cp.__init__(gen_default_specs(len(obj.game_state.team1), len(obj.game_state.team1[0].moves)))
-        #cp = PokeGame(DEF_SPECS)
         cp.game_state = copy.copy(obj.game_state)
         cp.player1_view = copy.copy(obj.player1_view)
         cp.player2_view = copy.copy(obj.player2_view)
@@ -223,19 +313,11 @@ class PokeGame:
         num_state = list()
         for t, of in zip([state.team1, state.team2], [state.on_field1, state.on_field2]):
             for p in [of] + [p for p in t if p.name != of.name]:
-                mvs = list()
-                for m in p.moves:
-                    if m.name is None:
-                        mvs += [None, None]
-                    else:
-                        mvs += [TYPES_INDEX[m.move_type], m.base_pow]
+                poke_type, stats, mvs = species_repr(p.species)
+                cur_hp = p.cur_hp if p.species.name is not None and p.cur_hp is not None else 0
+                num_state += [poke_type, cur_hp, *stats, *mvs]
 
-                if p.name is None:
-                    num_state += [None, None, None, None, None] + mvs
-                else:
-                    num_state += [TYPES_INDEX[p.poke_type], p.cur_hp, p.atk, p.des, p.spe] + mvs
-
-        return [i if i is not None else 0 for i in num_state]
+        return num_state
 
     def get_cur_state(self) -> GameStruct:
         """
@@ -253,14 +335,14 @@ class PokeGame:
 
         return copy.deepcopy(self.player1_view) if player == "p1" else copy.deepcopy(self.player2_view)
 
-    def get_moves_from_state(self, player: str, state: GameStruct) -> list[str | None]:
+    def get_moves_from_state(self, player: str, state: GameStruct) -> list[int | None]:
         """
         Return possible moves for the specified player from the specified state (allows to retrieve possible moves
         for a player from a state that is not self.game_state)
 
         :param player: "p1" or "p2" to indicate which player moves must be listed
         :param state: GameStruct object where moves must be searched
-        :return: List of string containing name of moves playable.
+        :return: List of actions playable (cf. GameStruct.n_moves for the encoding).
         """
 
         team, on_field, opp_on_field = (state.team1, state.on_field1, state.on_field2) if player == "p1" else (
@@ -270,12 +352,13 @@ class PokeGame:
             # opponent faint but player not: only opponent moves (choosing replacement)
             return [None]
 
-        switches = ["switch " + p.name for p in team if p.cur_hp > 0 and p.name != on_field.name]
+        n_moves = len(on_field.moves)
+        switches = [n_moves + k for k, p in enumerate(team) if p.cur_hp > 0 and p.name != on_field.name]
 
         if not on_field.is_alive():
             moves = switches
         else:
-            moves = [m.name for m in on_field.moves if m.name is not None] + switches
+            moves = [i for i, m in enumerate(on_field.moves) if m.name is not None] + switches
         return moves
 
     def is_end_state(self, state: GameStruct = None) -> bool:
@@ -305,13 +388,13 @@ class PokeGame:
     def swap_states(self, game_state: GameStruct):
         self.game_state = game_state
 
-    def play_round(self, p1_move: str | None, p2_move: str | None, force_dmg: float = 0.0, force_order: bool = None):
+    def play_round(self, p1_move: int | None, p2_move: int | None, force_dmg: float = 0.0, force_order: bool = None):
         """
         Call functions related to move application (apply_player_moves & get_info_from_state), change inner and return
         information about what happened (whether any side fainted & who moved).
 
-        :param p1_move: name of move selected by player 1
-        :param p2_move: name of move selected by player 2
+        :param p1_move: action selected by player 1
+        :param p2_move: action selected by player 2
         :param force_dmg: parameter for apply_player_moves
         :param force_order: parameter for apply_player_moves
         :return: Python dict indicating which side has played a move and which side has fainted
@@ -324,54 +407,52 @@ class PokeGame:
                                                      self.game_state.on_field1.spe)
         pre_of2_name, pre_of2_cur_hp, pre_of2_spe = (self.game_state.on_field2.name, self.game_state.on_field2.cur_hp,
                                                      self.game_state.on_field2.spe)
+        p1_switch, p2_switch = self.game_state.is_switch(p1_move), self.game_state.is_switch(p2_move)
 
         # apply moves
         # (move order is determined here to keep track of who moved first)
         order = random.choice([True, False]) if force_order is None else force_order
 
         # post faint switch or same priority level moves
-        if (None in (p1_move, p2_move) or "switch" not in p1_move and "switch" not in p2_move or "switch" in p1_move and
-                "switch" in p2_move):
+        if None in (p1_move, p2_move) or p1_switch == p2_switch:
             self.apply_player_moves(self.game_state, p1_move, p2_move, force_dmg=force_dmg, force_order=force_order)
 
         # attack and switch ("pre" values of the side switching must be updated to those of the switched pokémon)
-        elif "switch" in p1_move and "switch" not in p2_move or "switch" not in p1_move and "switch" in p2_move:
-            if "switch" in p1_move:
-                self.apply_player_moves(self.game_state, p1_move, None, force_dmg=force_dmg, force_order=None)
-                p1v_pre_of1, p2v_pre_of1 = self.player1_view.on_field1, self.player2_view.on_field1
-                pre_of1_name, pre_of1_cur_hp, pre_of1_spe = (self.game_state.on_field1.name,
-                                                             self.game_state.on_field1.cur_hp,
-                                                             self.game_state.on_field1.spe)
-                self.apply_player_moves(self.game_state, None, p2_move, force_dmg=force_dmg, force_order=None)
-            else:
-                self.apply_player_moves(self.game_state, None, p2_move, force_dmg=force_dmg, force_order=None)
-                p2v_pre_of1, p2v_pre_of2 = self.player2_view.on_field1, self.player2_view.on_field2
-                pre_of2_name, pre_of2_cur_hp, pre_of2_spe = (self.game_state.on_field2.name,
-                                                             self.game_state.on_field2.cur_hp,
-                                                             self.game_state.on_field2.spe)
-                self.apply_player_moves(self.game_state, p1_move, None, force_dmg=force_dmg, force_order=None)
+        elif p1_switch:
+            self.apply_player_moves(self.game_state, p1_move, None, force_dmg=force_dmg, force_order=None)
+            p1v_pre_of1, p2v_pre_of1 = self.player1_view.on_field1, self.player2_view.on_field1
+            pre_of1_name, pre_of1_cur_hp, pre_of1_spe = (self.game_state.on_field1.name,
+                                                         self.game_state.on_field1.cur_hp,
+                                                         self.game_state.on_field1.spe)
+            self.apply_player_moves(self.game_state, None, p2_move, force_dmg=force_dmg, force_order=None)
+        else:
+            self.apply_player_moves(self.game_state, None, p2_move, force_dmg=force_dmg, force_order=None)
+            p2v_pre_of1, p2v_pre_of2 = self.player2_view.on_field1, self.player2_view.on_field2
+            pre_of2_name, pre_of2_cur_hp, pre_of2_spe = (self.game_state.on_field2.name,
+                                                         self.game_state.on_field2.cur_hp,
+                                                         self.game_state.on_field2.spe)
+            self.apply_player_moves(self.game_state, p1_move, None, force_dmg=force_dmg, force_order=None)
 
         # test if any side has fainted & which side moved (opponent lost hp or player switched) & who moved first
         p1_moved = False
         if p1_move is not None:
-            p1_moved |= p1_move is not None and "switch" not in p1_move and \
+            p1_moved |= not p1_switch and \
                         (self.game_state.on_field1.cur_hp > 0 or
                          self.game_state.on_field1.spe > self.game_state.on_field2.spe or
                          self.game_state.on_field1.spe == self.game_state.on_field2.spe and order)
-            p1_moved |= p2_move is None or "switch" in p1_move or "switch" in p2_move
+            p1_moved |= p2_move is None or p1_switch or p2_switch
 
         p2_moved = False
         if p2_move is not None:
-            p2_moved |= p2_move is not None and "switch" not in p2_move and \
+            p2_moved |= not p2_switch and \
                         (self.game_state.on_field2.cur_hp > 0 or
                          self.game_state.on_field2.spe > self.game_state.on_field1.spe or
                          self.game_state.on_field1.spe == self.game_state.on_field2.spe and not order)
-            p2_moved |= p1_move is None or "switch" in p1_move or "switch" in p2_move
+            p2_moved |= p1_move is None or p1_switch or p2_switch
 
         p1_first, p2_first = False, False
         # As switch and attacks have different priorities, no first mover will be considered in case of mix choice
-        if None not in (p1_move, p2_move) and (
-                "switch" in p1_move and "switch" in p2_move or "switch" not in p1_move and "switch" not in p2_move):
+        if None not in (p1_move, p2_move) and p1_switch == p2_switch:
             p1_first = pre_of1_spe > pre_of2_spe
             p1_first |= pre_of1_spe == pre_of2_spe and order
             p2_first = not p1_first
@@ -388,11 +469,13 @@ class PokeGame:
                                       (pre_of2_name, pre_of2_cur_hp, p1v_pre_of2.spe))
             self.statistic_estimation("p2", ret, p2_move, p1_move, (pre_of2_name, pre_of2_cur_hp, p2v_pre_of2.spe),
                                       (pre_of1_name, pre_of1_cur_hp, p2v_pre_of1.spe))
+        self.player1_view.reset_zobrist()
+        self.player2_view.reset_zobrist()
 
         return ret
 
     @staticmethod
-    def damage_formula(move: Move, attacker: Pokemon, target: Pokemon, force_dmg: float = 0.0):
+    def damage_formula(move: Move, attacker: Pokemon, target: Pokemon, force_dmg: float | str = 0.0):
         """
         Compute the amount of damage caused by the move used in specified conditions.
 
@@ -400,28 +483,60 @@ class PokeGame:
         :param attacker: Pokémon object corresponding to the Pokémon using the move
         :param target: Pokémon object corresponding to the Pokémon receiving the move
         :param force_dmg: if between 0.85 and 1: used as substitution of random parameter (force value of multiplier),
-            otherwise: generate random number.
-        :return: Number of damage caused, as an integer
+            if "expected": expected damage over all values of the random parameter, otherwise: generate random number.
+        :return: Number of damage caused, as an integer (float in "expected" mode)
         """
 
         if move is None:
             return 0
 
-        # base damage
-        dmg = (floor(floor((2 * 100 / 5 + 2) * move.base_pow * attacker.atk / target.des) / 50) + 2)
+        if force_dmg == "expected":
+            return PokeGame.expected_damage(move, attacker, target)
 
         # modifiers
-        rd = force_dmg if 0.85 <= force_dmg <= 1 else random.randint(85, 100) / 100
+        roll = round(force_dmg * 100) if 0.85 <= force_dmg <= 1 else random.randint(85, 100)
         stab = 1.5 if move.move_type == attacker.poke_type else 1
         type_aff = TYPE_CHART[move.move_type][target.poke_type]
-        dmg *= rd * stab * type_aff
-        if 0 < dmg < 1:
-            dmg = 1
 
-        return floor(dmg)
+        if roll / 100 != force_dmg and 0.85 <= force_dmg <= 1:
+            # forced multiplier is not one of the rolls of the table
+            return compute_damage(move.base_pow, attacker.atk, target.des, stab, type_aff, force_dmg)
+
+        return table_damage(move.base_pow, attacker.atk, target.des, stab, type_aff, roll)
+
+    @staticmethod
+    def damage_distribution(move: Move, attacker: Pokemon, target: Pokemon) -> tuple[tuple[int, float]]:
+        """
+        Compute the exact distribution of the damage caused by the move used in specified conditions (see
+        damage_formula for the parameters).
+
+        :return: tuple of (damage, probability) pairs sorted by increasing damage
+        """
+
+        stab = 1.5 if move.move_type == attacker.poke_type else 1
+        return damage_distribution(move.base_pow, attacker.atk, target.des, stab,
+                                   TYPE_CHART[move.move_type][target.poke_type])
+
+    @staticmethod
+    def expected_damage(move: Move, attacker: Pokemon, target: Pokemon) -> float:
+        """ Expected value of the damage caused by the move used in specified conditions """
+
+        return sum(dmg * prob for dmg, prob in PokeGame.damage_distribution(move, attacker, target))
+
+    @staticmethod
+    def ko_probability(move: Move, attacker: Pokemon, target: Pokemon, target_hp: int = None) -> float:
+        """
+        Probability that the move used in specified conditions knocks out the target.
 
-    def apply_player_moves(self, game_state: GameStruct, p1_move: str | None, p2_move: str | None,
-                           force_dmg: float = 0.0,
+        :param target_hp: hp of the target to consider (default: target.cur_hp)
+        :return: probability of the damage being at least target_hp
+        """
+
+        target_hp = target.cur_hp if target_hp is None else target_hp
+        return sum(prob for dmg, prob in PokeGame.damage_distribution(move, attacker, target) if dmg >= target_hp)
+
+    def apply_player_moves(self, game_state: GameStruct, p1_move: int | None, p2_move: int | None,
+                           force_dmg: float | str = 0.0,
                            force_order: bool = None):
         """
         Execute player choices with regard to game rules to the game_state passed as parameter. This function applies
@@ -430,34 +545,38 @@ class PokeGame:
 
         :param game_state: GameState object on which to apply the moves (NB: in general, used with the "complete"
             game_state, not a player view)
-        :param p1_move: name of attack or 'switch {name}'
+        :param p1_move: move slot or switch action (cf. GameStruct.n_moves)
         :param p2_move: same
-        :param force_dmg: if float between 0.85 and 1, will be used to force damage random factor
+        :param force_dmg: if float between 0.85 and 1, will be used to force damage random factor, if "expected",
+            expected damage are applied
         :param force_order: if both players attack and have same speed, force_order=True will make p1 move first, False
             will make p2 move first, None will leave the order be determined randomly
         :return: provided game_state with players action applied
         """
 
+        snapshot = game_state.zobrist_snapshot()
+        n_moves = len(game_state.team1[0].moves)
+        p1_switch = p1_move is not None and p1_move >= n_moves
+        p2_switch = p2_move is not None and p2_move >= n_moves
+
         # both switch
-        if p1_move is not None and "switch" in p1_move and p2_move is not None and "switch" in p2_move:
-            game_state.on_field1 = game_state.team1[[n.name for n in game_state.team1].index(p1_move.split(" ")[1])]
-            game_state.on_field2 = game_state.team2[[n.name for n in game_state.team2].index(p2_move.split(" ")[1])]
+        if p1_switch and p2_switch:
+            game_state.on_field1 = game_state.team1[p1_move - n_moves]
+            game_state.on_field2 = game_state.team2[p2_move - n_moves]
 
         # p1 switch
-        elif p1_move is not None and "switch" in p1_move:
-            game_state.on_field1 = game_state.team1[[n.name for n in game_state.team1].index(p1_move.split(" ")[1])]
+        elif p1_switch:
+            game_state.on_field1 = game_state.team1[p1_move - n_moves]
             if p2_move is not None:
                 game_state.on_field1.cur_hp = max(0, game_state.on_field1.cur_hp - self.damage_formula(
-                    game_state.on_field2.move_from_name(p2_move), game_state.on_field2, game_state.on_field1,
-                    force_dmg))
+                    game_state.on_field2.moves[p2_move], game_state.on_field2, game_state.on_field1, force_dmg))
 
         # p2 switch
-        elif p2_move is not None and "switch" in p2_move:
-            game_state.on_field2 = game_state.team2[[n.name for n in game_state.team2].index(p2_move.split(" ")[1])]
+        elif p2_switch:
+            game_state.on_field2 = game_state.team2[p2_move - n_moves]
             if p1_move is not None:
                 game_state.on_field2.cur_hp = max(0, game_state.on_field2.cur_hp - self.damage_formula(
-                    game_state.on_field1.move_from_name(p1_move), game_state.on_field1, game_state.on_field2,
-                    force_dmg))
+                    game_state.on_field1.moves[p1_move], game_state.on_field1, game_state.on_field2, force_dmg))
 
         # both attack (nb: should never be both None at same time)
         elif None not in (p1_move, p2_move):
@@ -474,20 +593,60 @@ class PokeGame:
                     attack_order.reverse()
 
             attack_order[1][0].cur_hp = max(0, attack_order[1][0].cur_hp - self.damage_formula(
-                attack_order[0][0].move_from_name(attack_order[0][1]), attack_order[0][0], attack_order[1][0],
-                force_dmg))
+                attack_order[0][0].moves[attack_order[0][1]], attack_order[0][0], attack_order[1][0], force_dmg))
             # second attacker must be alive to attack
             if attack_order[1][0].is_alive():
                 attack_order[0][0].cur_hp = max(0, attack_order[0][0].cur_hp - self.damage_formula(
-                    attack_order[1][0].move_from_name(attack_order[1][1]), attack_order[1][0], attack_order[0][0],
-                    force_dmg))
+                    attack_order[1][0].moves[attack_order[1][1]], attack_order[1][0], attack_order[0][0], force_dmg))
 
         # p1/p2 attacks after a switch of the other
         else:
             attacker, target = tuple([game_state.on_field1, game_state.on_field2][::(-1) ** (p1_move is None)])
-            move = attacker.move_from_name(p1_move if p1_move is not None else p2_move)
+            move = attacker.moves[p1_move if p1_move is not None else p2_move]
             target.cur_hp = max(0, target.cur_hp - self.damage_formula(move, attacker, target, force_dmg))
 
+        game_state.update_zobrist(snapshot)
+
+        return game_state
+
+    def apply_player_moves_undoable(self, game_state: GameStruct, p1_move: int | None, p2_move: int | None,
+                                    force_dmg: float | str = 0.0, force_order: bool = None) -> tuple:
+        """
+        Same as apply_player_moves, but returns an undo record allowing to restore game_state in place with
+        undo_player_moves. This allows search algorithms to explore several actions on the same object, without
+        copying it. Records must be undone in reverse order of application.
+
+        :return: undo record: (on-field Pokémon before the moves, on-field Pokémon after the switches, hp of the latter
+            before the moves, hash of the state before the moves)
+        """
+
+        pre_of1, pre_of2 = game_state.on_field1, game_state.on_field2
+        n_moves = len(game_state.team1[0].moves)
+
+        # only the Pokémon on field once switches are performed can lose hp
+        post_of1 = pre_of1 if p1_move is None or p1_move < n_moves else game_state.team1[p1_move - n_moves]
+        post_of2 = pre_of2 if p2_move is None or p2_move < n_moves else game_state.team2[p2_move - n_moves]
+
+        undo_record = pre_of1, pre_of2, post_of1, post_of2, post_of1.cur_hp, post_of2.cur_hp, game_state._zobrist
+        self.apply_player_moves(game_state, p1_move, p2_move, force_dmg, force_order)
+
+        return undo_record
+
+    @staticmethod
+    def undo_player_moves(game_state: GameStruct, undo_record: tuple) -> GameStruct:
+        """
+        Restore game_state as it was before the call to apply_player_moves_undoable that returned undo_record
+
+        :param game_state: GameStruct object on which the moves were applied
+        :param undo_record: record returned by apply_player_moves_undoable
+        :return: provided game_state, restored
+        """
+
+        pre_of1, pre_of2, post_of1, post_of2, hp1, hp2, zobrist = undo_record
+        post_of1.cur_hp, post_of2.cur_hp = hp1, hp2
+        game_state.on_field1, game_state.on_field2 = pre_of1, pre_of2
+        game_state._zobrist = zobrist
+
         return game_state
 
     def directly_available_info(self, player: str, opponent_move: str, turn_res: dict):
@@ -496,7 +655,7 @@ class PokeGame:
         opponent, type and hp of Pokémon switched).
 
         :param player: "p1" or "p2", indicating whether information is searched for player1 or player2
-        :param opponent_move: Name of move performed by opponent player
+        :param opponent_move: action performed by opponent player
         :param turn_res: "ret" object from "play_move" function
         :return: None but update internal state
         """
@@ -530,11 +689,12 @@ class PokeGame:
                                                                            real_other.cur_hp, real_other.hp)
 
         # Attack used
-        if opponent_move is not None and opponent_move not in [m.name for m in other_of.moves] and\
-                "switch" not in opponent_move and turn_res["p2_moved" if player == "p1" else "p1_moved"]:  # opponent used previously unseen attack
-            unknown_move_index = [m.move_type for m in other_of.moves].index(None)
-            move = Move(opponent_move, *MOVES[opponent_move])
-            other_of.moves[unknown_move_index] = move
+        if opponent_move is not None and not self.game_state.is_switch(opponent_move) and \
+                turn_res["p2_moved" if player == "p1" else "p1_moved"]:
+            move = real_other.moves[opponent_move]
+            if move.name not in [m.name for m in other_of.moves]:  # opponent used previously unseen attack
+                unknown_move_index = [m.move_type for m in other_of.moves].index(None)
+                other_of.set_move(unknown_move_index, move)
 
     @staticmethod
     def reverse_attack_calculator(move: Move, attacker: Pokemon, target: Pokemon, hp_loss: int):
@@ -558,6 +718,11 @@ class PokeGame:
             # no info from no hp_loss (plus, it would trigger a zero division)
             return None, None
 
+        # exact range from the precomputed tables if hp_loss can be produced by the damage formula
+        rng = stat_range(DamageTable.REVERSE_ATK_TABLE, move.base_pow, target.des, stab, type_aff, hp_loss)
+        if rng is not None:
+            return rng
+
         lo_num, lo_den = (50 * target.des * ceil(hp_loss / (1 * stab * type_aff) - 2)), (42 * move.base_pow)
         hi_num, hi_den = (50 * target.des * ceil((hp_loss + 1) / (0.85 * stab * type_aff) - 2)), (42 * move.base_pow)
         if 0 in (lo_den, hi_den):
@@ -587,6 +752,10 @@ class PokeGame:
             # no info from no hp_loss (plus, it would trigger a zero division)
             return None, None
 
+        rng = stat_range(DamageTable.REVERSE_DES_TABLE, move.base_pow, attacker.atk, stab, type_aff, hp_loss)
+        if rng is not None:
+            return rng
+
         lo_num, lo_den = (42 * move.base_pow * attacker.atk), (50 * ceil((hp_loss + 1) / (0.85 * stab * type_aff) - 2))
         hi_num, hi_den = (42 * move.base_pow * attacker.atk), (50 * ceil(hp_loss / (1 * stab * type_aff) - 2))
         if 0 in (lo_den, hi_den):
@@ -598,22 +767,22 @@ class PokeGame:
         return lo, hi
 
     @staticmethod
-    def estimate_speed(player_first: bool, own_move: str, opp_move: str, own_spe: int, opp_spe: int):
+    def estimate_speed(player_first: bool, own_move: int, opp_move: int, own_spe: int, opp_spe: int, n_moves: int):
         """
         From the observation of the order of action, make an estimation of the speed that the opponent should have.
         The estimation is an upper estimation.
 
         :param player_first: boolean value indicating whether player moved first.
-        :param own_move: name of move chosen by player
-        :param opp_move: name of move chosen by the opponent
+        :param own_move: action chosen by player
+        :param opp_move: action chosen by the opponent
         :param own_spe: speed player's Pokémon that was on field at the moment of the action
         :param opp_spe: same for opponent (player estimation)
+        :param n_moves: number of moves of the Pokémon (cf. GameStruct.n_moves)
         :return: estimation of the speed statistic of opp_of
         """
 
         est = opp_spe
-        if None not in (own_move, opp_move) and (
-                "switch" in own_move and "switch" in opp_move or "switch" not in own_move and "switch" not in opp_move):
+        if None not in (own_move, opp_move) and (own_move >= n_moves) == (opp_move >= n_moves):
             # switches and normal attacks have different level of priority and cannot be compared
             if player_first:
                 est = own_spe - 1 if opp_spe is None else min(opp_spe, own_spe - 1)
@@ -622,7 +791,7 @@ class PokeGame:
 
         return est
 
-    def statistic_estimation(self, player: str | None, turn_res: dict, own_move: str, opp_move: str,
+    def statistic_estimation(self, player: str | None, turn_res: dict, own_move: int, opp_move: int,
                              pre_own_of: tuple[str, int, int],
                              pre_opp_of: tuple[str, int, int]):
         """
@@ -632,8 +801,8 @@ class PokeGame:
 
         :param player: "p1" or "p2" indicating which player view is being estimated
         :param turn_res: "ret" object from "play_move" function
-        :param own_move: name of move performed by player
-        :param opp_move: name of move performed by opponent
+        :param own_move: action performed by player
+        :param opp_move: action performed by opponent
         :param pre_own_of: (p.name, p.cur_hp, p.spe) of the on field Pokémon of the player at the beginning of the round
         :param pre_opp_of: Same for opponent
         :return: None but update player view
@@ -643,6 +812,11 @@ class PokeGame:
         view = self.player1_view if player == "p1" else self.player2_view
         own_of, opp_of = (view.on_field1, view.on_field2) if player == "p1" else (view.on_field2, view.on_field1)
         own_team, opp_team = (view.team1, view.team2) if player == "p1" else (view.team2, view.team1)
+        # attackers are still on field, their moves are read in the complete state
+        real_own_of, real_opp_of = (self.game_state.on_field1, self.game_state.on_field2) if player == "p1" else (
+            self.game_state.on_field2, self.game_state.on_field1)
+        n_moves = self.game_state.n_moves
+        own_switch, opp_switch = own_move >= n_moves, opp_move >= n_moves
 
         own_moved, own_fainted, own_first = ("p1_moved", "p1_fainted", "p1_first") if player == "p1" else (
             "p2_moved", "p2_fainted", "p2_first")
@@ -652,9 +826,9 @@ class PokeGame:
         opp_moved, opp_fainted, opp_first = turn_res[opp_moved], turn_res[opp_fainted], turn_res[opp_first]
 
         # opponent attack
-        if opp_moved and "switch" not in opp_move:
+        if opp_moved and not opp_switch:
             hp_loss = pre_own_of[1] - own_of.cur_hp
-            move = Move(opp_move, *MOVES[opp_move])
+            move = real_opp_of.moves[opp_move]
 
             # evaluate min and max possible value of stat landing the attack
             min_est, max_est = self.reverse_attack_calculator(move, opp_of, own_of, hp_loss)
@@ -663,9 +837,9 @@ class PokeGame:
                     opp_of.atk = max(max_est, opp_of.atk) if opp_of.atk is not None else max_est
 
         # opponent defense
-        if own_moved and "switch" not in own_move:
+        if own_moved and not own_switch:
             hp_loss = pre_opp_of[1] - opp_of.cur_hp
-            move = Move(own_move, *MOVES[own_move])
+            move = real_own_of.moves[own_move]
 
             min_est, max_est = self.reverse_defense_calculator(move, own_of, opp_of, hp_loss)
             if max_est is not None:
@@ -673,11 +847,11 @@ class PokeGame:
                     opp_of.des = max(max_est, opp_of.des) if opp_of.des is not None else max_est
 
         # opponent speed
-        if "switch" in own_move and "switch" in opp_move:
+        if own_switch and opp_switch:
             # if both sides switched, estimation is made for Pokémon withdrawn from field
             opp_old_of = opp_team[[i for i, p in enumerate(opp_team) if p.name == pre_opp_of[0]][0]]
-            max_est = self.estimate_speed(own_first, own_move, opp_move, pre_own_of[2], pre_opp_of[2])
+            max_est = self.estimate_speed(own_first, own_move, opp_move, pre_own_of[2], pre_opp_of[2], n_moves)
             opp_old_of.spe = max_est
-        elif "switch" not in own_move and "switch" not in opp_move:
-            max_est = self.estimate_speed(own_first, own_move, opp_move, own_of.spe, opp_of.spe)
+        elif not own_switch and not opp_switch:
+            max_est = self.estimate_speed(own_first, own_move, opp_move, own_of.spe, opp_of.spe, n_moves)
             opp_of.spe = max_est
@@ -1,44 +1,71 @@
-import copy
+from typing import NamedTuple
+
+from src.game.constants import MOVES
+
+
+class Species(NamedTuple):
+    """ Static data of a Pokémon, shared by all the copies of the Pokémon (and of the game states containing it) """
+
+    name: str
+    poke_type: str
+    hp: int
+    atk: int
+    des: int
+    spe: int
+    moves: tuple
+
+
+def _species_field(index: int) -> property:
+    """ Attribute of a Pokémon stored in its species. Setting it (e.g. when a player view learns or estimates it)
+    replaces the species of this Pokémon only, the copies keep the former one. """
+
+    def fget(self):
+        return self.species[index]
+
+    def fset(self, value):
+        fields = list(self.species)
+        fields[index] = value
+        self.species = Species._make(fields)
+
+    return property(fget, fset)
 
 
 class Pokemon:
-    def __init__(self, name, poke_type, stats, moves):
-        self.name = name  # names must be unique inside a team
+    """ Battle state of a Pokémon: its current hp, the only field changing during a game, and its species """
 
-        # off-game parameters
-        self.poke_type = poke_type
-        self.cur_hp = stats[0]
-        self.hp = stats[0]
-        self.atk = stats[1]
-        self.des = stats[2]
-        self.spe = stats[3]
+    __slots__ = ("species", "cur_hp")
 
-        # moves
-        self.moves = moves
+    name = _species_field(0)  # names must be unique inside a team
+    poke_type = _species_field(1)
+    hp = _species_field(2)
+    atk = _species_field(3)
+    des = _species_field(4)
+    spe = _species_field(5)
+    moves = _species_field(6)
+
+    def __init__(self, name, poke_type, stats, moves):
+        self.species = Species(name, poke_type, stats[0], stats[1], stats[2], stats[3], tuple(moves))
+        self.cur_hp = stats[0]
 
     def is_alive(self):
         return self.cur_hp > 0
 
-    def move_from_name(self, move_name):
-        """ Returns a reference to the move object whose name is passed as parameter """
+    def set_move(self, idx: int, move):
+        """ Put move in slot idx without affecting the copies sharing the species of this Pokémon """
 
-        return None if move_name is None else self.moves[[m.name for m in self.moves].index(move_name)]
+        self.moves = self.moves[:idx] + (move,) + self.moves[idx + 1:]
 
     def __eq__(self, other):
         """ NB: must not have same current hp """
 
-        test = self.name == other.name and self.poke_type == other.poke_type
-        test &= (self.hp, self.atk, self.des, self.spe) == (
-            other.hp, other.atk, other.des, other.spe)
+        test = self.species[:6] == other.species[:6]
         for ms, mo in zip(self.moves, other.moves):
             test &= ms == mo
         return test
 
     def __copy__(self):
-        cp_stats = [self.hp, self.atk, self.des, self.spe]
-        cp_moves = [copy.deepcopy(m) for m in self.moves]
-        cp = Pokemon(self.name, self.poke_type, cp_stats, cp_moves)
-        cp.cur_hp = self.cur_hp
+        cp = Pokemon.__new__(Pokemon)
+        cp.species, cp.cur_hp = self.species, self.cur_hp
         return cp
 
     def __deepcopy__(self, memodict={}):
@@ -54,22 +81,52 @@ class Pokemon:
 
 
 class Move:
+    """ Immutable: moves are interned (cf. intern_move) and shared between Pokémon and copies of game states """
+
+    __slots__ = ("name", "move_type", "base_pow", "_hash")
+
     def __init__(self, name: str = None, move_type: str = None, base_pow: int = None):
-        self.name = name
-        self.move_type = move_type
-        self.base_pow = base_pow
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "move_type", move_type)
+        object.__setattr__(self, "base_pow", base_pow)
+        object.__setattr__(self, "_hash", hash((name, move_type, base_pow)))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Move objects are immutable")
 
     def __eq__(self, other):
         return self.name == other.name and self.move_type == other.move_type and self.base_pow == other.base_pow
 
+    def __hash__(self):
+        return self._hash
+
     def __copy__(self):
-        return Move(self.name, self.move_type, self.base_pow)
+        return self
 
     def __deepcopy__(self, memodict={}):
-        return self.__copy__()
+        return self
+
+    def __reduce__(self):
+        return intern_move, (self.name, self.move_type, self.base_pow)
 
     def __str__(self):
         return "|{}, {}, {}|".format(self.name, self.move_type, self.base_pow)
 
     def __repr__(self):
         return "|{}, {}, {}|".format(self.name, self.move_type, self.base_pow)
+
+
+# Flyweights of the moves of the game, created once
+MOVE_REGISTRY = {name: Move(name, move_type, base_pow) for name, (move_type, base_pow) in MOVES.items()}
+UNKNOWN_MOVE = Move(None, None, None)
+
+
+def intern_move(name: str = None, move_type: str = None, base_pow: int = None) -> Move:
+    """ Returns the shared instance of the move (new object only for moves that are not part of constants.MOVES) """
+
+    if name is None and move_type is None and base_pow is None:
+        return UNKNOWN_MOVE
+    move = MOVE_REGISTRY.get(name)
+    if move is not None and move.move_type == move_type and move.base_pow == base_pow:
+        return move
+    return Move(name, move_type, base_pow)
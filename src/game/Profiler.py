@@ -0,0 +1,84 @@
+import json
+from collections import defaultdict
+from time import perf_counter_ns
+
+import numpy as np
+
+
+class Profiler:
+    """
+        Timers (monotonic clock) and call counters of the phases of the game loops of GameEngine. Functions are
+        instrumented by replacing them with timed wrappers once per game or per run, so that nothing is done on the hot
+        path when no profiler is provided. Phases are named "phase/agent type" for agents, and "play_round/sub-phase" for
+        the parts of play_round (their time is also part of the time of play_round).
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        self.timings = defaultdict(list)  # {phase: [duration (ns) of each call]}
+
+    def timed(self, phase: str, f):
+        """ Returns f recording the duration of its calls under phase """
+
+        timings = self.timings[phase]
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                timings.append(perf_counter_ns() - start)
+
+        return wrapper
+
+    def instrument_players(self, players: list) -> None:
+        """ Time the moves (and the learning, if any) of the agents """
+
+        for p in players:
+            if p is not None:
+                p.make_move = self.timed("make_move/" + type(p).__name__, p.make_move)
+                if hasattr(p, "backpropagation"):
+                    p.backpropagation = self.timed("backpropagation/" + type(p).__name__, p.backpropagation)
+
+    def instrument_game(self, game) -> None:
+        """ Time the rounds of the game, and the update of the player views when the game maintains them """
+
+        for sub_phase in ("directly_available_info", "statistic_estimation"):
+            if hasattr(game, sub_phase):
+                setattr(game, sub_phase, self.timed("play_round/" + sub_phase, getattr(game, sub_phase)))
+        game.play_round = self.timed("play_round", game.play_round)
+
+    def merge(self, timings: dict) -> None:
+        """ Add the timings of another profiler (e.g., of a worker process) """
+
+        for phase, durations in timings.items():
+            self.timings[phase] += durations
+
+    def report(self) -> dict:
+        """
+        :return: {phase: {"calls", "total_ms", "mean_us", "p50_us", "p90_us", "p99_us"}}, phases sorted by decreasing
+            total time
+        """
+
+        out = dict()
+        for phase, durations in sorted(self.timings.items(), key=lambda x: -sum(x[1])):
+            if durations:
+                durations = np.array(durations)
+                out[phase] = {"calls": len(durations), "total_ms": durations.sum() / 1e6,
+                              "mean_us": durations.mean() / 1e3}
+                for q, v in zip(self.PERCENTILES, np.percentile(durations, self.PERCENTILES)):
+                    out[phase]["p{}_us".format(q)] = v / 1e3
+        return out
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def __str__(self):
+        out = "{:<45}{:>10}{:>12}{:>12}".format("phase", "calls", "total (ms)", "mean (us)")
+        out += "".join("{:>12}".format("p{} (us)".format(q)) for q in self.PERCENTILES)
+        for phase, stats in self.report().items():
+            out += "\n{:<45}{:>10}{:>12.1f}{:>12.1f}".format(phase, stats["calls"], stats["total_ms"], stats["mean_us"])
+            out += "".join("{:>12.1f}".format(stats["p{}_us".format(q)]) for q in self.PERCENTILES)
+        return out
@@ -4,22 +4,31 @@ sys.path.append(os.getcwd() + '/..')
 
 import warnings
 import copy
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue
 import unittest, random
+from unittest.mock import patch
 
 import numpy as np
 from parameterized import parameterized
 
 from src.agents.PlayerBM import PlayerBM
-from src.agents.PlayerGA import PlayerGA
+from src.agents.PlayerGA import PlayerGA, island_neighbors, pack_network, unpack_network
 from src.agents.PlayerGT import PlayerGT
 from src.agents.PlayerHybrid import PlayerHybrid
 from src.agents.PlayerMDM import PlayerMDM
 from src.agents.PlayerNN import PlayerNN
 from src.agents.PlayerRandom import PlayerRandom
-from src.agents.nn_utils import initialize_nn
+from src.agents.Network import Network, PopulationNetwork
+from src.agents.nn_utils import initialize_nn, initialize_population, init_mutation_nn, sigmoid, sigmoid_gradient
 from src.agents.PlayerRL import PlayerRL
+from src.agents.ReplayBuffer import ReplayBuffer
+from src.agents.TranspositionTable import TranspositionTable
+from src.agents.nash_solvers import is_equilibrium, small_game, solve, support_enumeration
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TrainParams
 from src.game.GameEstimation import fill_game_with_estimation
-from src.game.PokeGame import PokeGame
+from src.game.PokeGame import PokeGame, gen_random_specs
 from src.game.constants import MIN_POW
 
 
@@ -54,6 +63,28 @@ team_specs_for_game2 = [[(("p1", "FIRE", 100, 100, 100, 100),
                           (("light_bug", "BUG", 50), ("light_normal", "NORMAL", 50), ("light_dark", "DARK", 50)))]]
 
 
+def weights_fitness(network, scale):
+    """ Deterministic fitness (can be sent to worker processes) """
+
+    return scale / (1 + np.exp(-float(sum(w.sum() for w in network))))
+
+
+def failing_fitness(network, exit_code):
+    """ Fitness failing in some of the islands of an island model (raising, or exiting if exit_code is not None) """
+
+    if np.random.random() < 0.3:
+        if exit_code is not None:
+            os._exit(exit_code)
+        raise ValueError("fitness failed")
+    return weights_fitness(network, 1.0)
+
+
+def binomial_fitness(network, n_games):
+    """ Victories in n_games of an agent whose victory rate is the first weight of the output layer """
+
+    return np.random.binomial(n_games, float(network[-1][0]))
+
+
 class MyTestCase(unittest.TestCase):
     """"""
 
@@ -65,7 +96,8 @@ class MyTestCase(unittest.TestCase):
         ("normal", [N_INPUT, 10, 1], [(10, N_INPUT), (10,)]),
         ("xavier", [N_INPUT, 12, 1], [(12, N_INPUT), (12,)]),
         ("normalized-xavier", [N_INPUT, 20, 1], [(20, N_INPUT), (20,)]),
-        ("He", [15, 20, 1], [(20, 15), (20,)])
+        ("He", [15, 20, 1], [(20, 15), (20,)]),
+        ("xavier", [N_INPUT, 30, 20, 1], [(30, N_INPUT), (20, 30), (20,)])
     ])
     def test_init_NN(self, init_mode, shape_in, expected_shape):
         net = initialize_nn(shape_in, init_mode)
@@ -103,6 +135,116 @@ class MyTestCase(unittest.TestCase):
 
         self.assertTrue(sentinel, msg="Failed backpropagation test")
 
+    def test_rl_training_target(self):
+        """ Estimation of the next state is the one of the network before the update """
+
+        np.random.seed(7)
+        network = initialize_nn([N_INPUT, 20, 1], "xavier")
+        ref = Network([np.copy(w) for w in network], "sigmoid")
+        pstate, nstate = np.random.randint(0, 2, (2, N_INPUT))
+
+        player_rl = PlayerRL("p1", "train", network, "SARSA", "sigmoid", 0.1, 0.3)
+        player_rl.cur_state = pstate
+        player_rl.backpropagation(nstate, False, None)
+        activations = ref.forward([pstate])
+        ref.backward(activations, activations[-1] - ref.predict([nstate]), 0.3)
+        self.assertTrue(all(np.allclose(w, w_ref) for w, w_ref in zip(network, ref.weights)))
+
+    def test_replay_buffer(self):
+        buffer = ReplayBuffer(3, 4)
+        for i in range(5):
+            buffer.add([i] * 4, [i + 1] * 4, i == 4, 1 if i == 4 else None)
+
+        self.assertEqual(3, len(buffer))
+        self.assertListEqual([3, 4, 2], buffer.states[:, 0].tolist())  # oldest transitions replaced
+        self.assertListEqual([0, 1, 0], buffer.rewards.tolist())
+        states, next_states, terminal, rewards = buffer.sample(20)
+        self.assertTrue(set(states[:, 0]) <= {2, 3, 4} and (next_states == states + 1).all())
+        self.assertTrue((terminal == (states[:, 0] == 4)).all() and (rewards == terminal).all())
+
+    def test_rl_replay_training(self):
+        np.random.seed(8)
+        random.seed(8)
+        network = initialize_nn([N_INPUT, 20, 1], "xavier")
+        init = [np.copy(w) for w in network]
+        pars = TrainParams("train", 0.01, "rl", "rl", 0.1, (network, "sigmoid", "SARSA"), (network, "sigmoid", "SARSA"),
+                           nb=10, replay=100, batch_size=8, train_every=2)
+        players = GameEngine.init_players(pars)
+        self.assertIs(players[0].replay, players[1].replay)
+
+        GameEngine(pars).train_mode()
+        self.assertFalse(all(np.allclose(w, w_init) for w, w_init in zip(network, init)))
+
+    def test_rl_replay_training_networks(self):
+        """ Agents training different networks (possibly of different input sizes) have their own buffers """
+
+        np.random.seed(8)
+        random.seed(8)
+        network1, network2 = initialize_nn([N_INPUT, 20, 1], "xavier"), initialize_nn([N_INPUT, 10, 1], "xavier")
+        pars = TrainParams("train", 0.01, "rl", "rl", 0.1, (network1, "sigmoid", "SARSA"),
+                           (network2, "sigmoid", "SARSA"), nb=1, replay=100)
+        players = GameEngine.init_players(pars)
+        self.assertIsNot(players[0].replay, players[1].replay)
+
+        pars.ml2 = (initialize_nn([N_INPUT + 1, 10, 1], "xavier"), "sigmoid", "SARSA")
+        replays = [p.replay for p in GameEngine.init_players(pars)]
+        self.assertListEqual([N_INPUT, N_INPUT + 1], [r.states.shape[1] for r in replays])
+
+    def test_network_backward(self):
+        """ Update of a 1-hidden layer network is the one of the SARSA formula, stored float64 networks are converted """
+
+        np.random.seed(5)
+        weights = [np.random.normal(0, 0.1, (8, 5)), np.random.normal(0, 0.1, 8)]
+        w_int, w_out = np.copy(weights[0]), np.copy(weights[1])
+        net = Network(weights, "sigmoid")
+        state, lr, target = np.random.randint(0, 3, 5), 0.3, 0.75
+
+        p_int = sigmoid(w_int.dot(state))
+        p_out = sigmoid(p_int.dot(w_out))
+        delta, grad_out = p_out - target, sigmoid_gradient(p_out)
+        w_int -= lr * delta * np.outer(grad_out * w_out * sigmoid_gradient(p_int), state)
+        w_out -= lr * delta * grad_out * p_int
+
+        activations = net.forward([state])
+        self.assertAlmostEqual(p_out, activations[-1][0], places=5)
+        net.backward(activations, activations[-1] - target, lr)
+        self.assertTrue(all(w.dtype == np.float32 for w in weights))
+        self.assertTrue(np.allclose(w_int, weights[0], atol=1e-5) and np.allclose(w_out, weights[1], atol=1e-5))
+
+    @parameterized.expand([
+        ("sigmoid", ),
+        ("hyperbolic tangent", ),
+        ("ReLU", )
+    ])
+    def test_network_deep_training(self, act_f):
+        np.random.seed(6)
+        net = Network(initialize_nn([N_INPUT, 30, 20, 10, 1], "xavier"), act_f)
+        states = np.random.randint(0, 2, (16, N_INPUT))
+        targets = np.random.randint(0, 2, 16)
+
+        loss = np.mean((net.predict(states) - targets) ** 2)
+        for _ in range(50):
+            activations = net.forward(states)
+            net.backward(activations, activations[-1] - targets, 0.5)
+        self.assertLess(np.mean((net.predict(states) - targets) ** 2), loss)
+
+    @parameterized.expand([
+        ("sigmoid", [N_INPUT, 10, 1]),
+        ("ReLU", [N_INPUT, 12, 8, 1])
+    ])
+    def test_population_network(self, act_f, shape):
+        np.random.seed(10)
+        population = PopulationNetwork(initialize_population(4, shape, "xavier"), act_f)
+        states, individuals = np.random.randint(0, 3, (30, N_INPUT)), np.random.randint(0, 3, 30)  # one unused
+
+        exp = [Network(population.individual(i), act_f).predict([s])[0] for s, i in zip(states, individuals)]
+        self.assertTrue(np.allclose(exp, population.predict(states, individuals), atol=1e-6))
+        self.assertEqual(0, len(population.predict(np.empty((0, N_INPUT)), np.empty(0, dtype=int))))
+
+    def test_mutation_population(self):
+        mutation = init_mutation_nn([N_INPUT, 10, 5, 1], 0, 0.1, 7)
+        self.assertListEqual([(7, 10, N_INPUT), (7, 5, 10), (7, 5)], [w.shape for w in mutation])
+
     def test_ga_training(self):
         error, e = False, str()
         agent = PlayerGA("p1", initialize_nn([66, 132, 1], "normal"), "sigmoid")
@@ -114,6 +256,121 @@ class MyTestCase(unittest.TestCase):
 
         self.assertFalse(error, msg="GA training failed")
 
+    def test_ga_race(self):
+        np.random.seed(11)
+        rates = np.linspace(0.1, 0.8, 8)
+        population = [np.zeros((8, 1, 1)), rates[:, None]]
+        wins, games = np.zeros(8), np.zeros(8, dtype=int)
+        agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+
+        elite = agent.race(population, wins, games, 2, binomial_fitness, tuple(), 20, 640)
+        self.assertSetEqual({6, 7}, set(elite.tolist()))
+        self.assertTrue((games >= 20).all())
+        self.assertLess(games.sum(), 8 * 640 / 2)  # worst individuals eliminated early
+
+        # individuals carried over keep their games, and do not play again once they have enough
+        wins, games = np.zeros(8), np.zeros(8, dtype=int)
+        wins[7], games[7] = 512, 640
+        elite = agent.race(population, wins, games, 2, binomial_fitness, tuple(), 20, 640)
+        self.assertEqual((512, 640), (wins[7], games[7]))
+        self.assertEqual(7, elite[0])
+
+    @parameterized.expand([
+        (0, 10),
+        (10, 0),
+        (20, 10)
+    ])
+    def test_ga_race_games(self, min_games, max_games):
+        population = [np.zeros((4, 1, 1)), np.full((4, 1), 0.5)]
+        agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+        with self.assertRaises(ValueError):
+            agent.race(population, np.zeros(4), np.zeros(4, dtype=int), 2, binomial_fitness, tuple(), min_games,
+                       max_games)
+
+    def test_ga_training_racing(self):
+        np.random.seed(12)
+        agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+        network, score = agent.evolution(6, "normal", [N_INPUT, 10, 1], 3, 1 / 3,
+                                         lambda net, n: np.random.binomial(n, 0.5), tuple(), racing=(10, 80))
+        self.assertTrue(0 <= score <= 1)
+        self.assertListEqual([(10, N_INPUT), (10, )], [w.shape for w in network])
+
+    @parameterized.expand([
+        (None, weights_fitness, (1.0, )),
+        ((4, 8), lambda net, n: np.random.binomial(n, 0.5), ())
+    ])
+    def test_ga_migration_elite(self, racing, fitness_f, fitness_f_args):
+        """ Individuals sent to migrate are the elite, with their fitness and games """
+
+        sizes = list()
+
+        def migrate(population, scores, wins, games, *_):
+            sizes.append((len(population[0]), len(scores), len(wins), len(games)))
+            return population, scores, wins, games
+
+        np.random.seed(2)
+        random.seed(2)
+        with patch.object(PlayerGA, "migrate", side_effect=migrate):
+            PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid").evolution(
+                6, "normal", [N_INPUT, 10, 1], 4, 1 / 3, fitness_f, fitness_f_args, racing=racing,
+                migration=(1, 1, None, [], 0))
+        self.assertListEqual([(2, 2, 2, 2)] * 4, sizes)
+
+    def test_ga_migrate(self):
+        population = [np.arange(3, dtype=float)[:, None, None], np.arange(3, dtype=float)[:, None]]
+        scores, wins, games = np.array([0.9, 0.5, 0.1]), np.zeros(3), np.zeros(3, dtype=int)
+        inbox, outbox = Queue(), Queue()
+        inbox.put([(*pack_network([np.full((1, 1), 7.), np.full(1, 7.)]), 0.6, 6, 10)])
+
+        population, scores, wins, games = PlayerGA.migrate(population, scores, wins, games, 2, inbox, [outbox], 1)
+        self.assertListEqual([0.9, 0.6, 0.5], scores.tolist())  # worst individual replaced by the migrant
+        self.assertListEqual([0, 7, 1], population[1][:, 0].tolist())
+        self.assertListEqual([0, 10, 0], games.tolist())
+        self.assertListEqual([0.9, 0.5], [m[2] for m in outbox.get()])
+
+    def test_ga_islands(self):
+        agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+        network, score = agent.island_evolution(3, 1, 1, 4, "normal", [N_INPUT, 10, 1], 3, 1 / 2, weights_fitness,
+                                                (1.0, ), topology="complete", seed=13)
+        self.assertAlmostEqual(weights_fitness(network, 1.0), score)
+        self.assertListEqual([(10, N_INPUT), (10, )], [w.shape for w in agent.network])
+        self.assertListEqual([[1, 2], [0, 2], [0, 1]], island_neighbors(3, "complete"))
+        self.assertListEqual([[1], [2], [0]], island_neighbors(3, "ring"))
+
+    @parameterized.expand([
+        (None, ValueError),
+        (3, RuntimeError)
+    ])
+    def test_ga_islands_failure(self, exit_code, exp_error):
+        """ An island failing stops the island model instead of leaving the other ones waiting for its migrants """
+
+        agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+        with self.assertRaises(exp_error):
+            agent.island_evolution(3, 1, 1, 4, "normal", [N_INPUT, 10, 1], 20, 1 / 2, failing_fitness, (exit_code, ),
+                                   seed=13)
+
+    def test_pack_network(self):
+        network = initialize_nn([N_INPUT, 30, 20, 1], "xavier")
+        flat, shapes = pack_network(network)
+        self.assertEqual(1, flat.ndim)
+        self.assertTrue(all((w == w2).all() for w, w2 in zip(network, unpack_network(flat, shapes))))
+
+    def test_ga_training_executor(self):
+        """ Fitness evaluations run by worker processes give the evolution of the sequential ones """
+
+        res = list()
+        for executor in (None, ProcessPoolExecutor(2)):
+            random.seed(9)
+            np.random.seed(9)
+            agent = PlayerGA("p1", initialize_nn([N_INPUT, 10, 1], "normal"), "sigmoid")
+            res.append(agent.evolution(6, "normal", [N_INPUT, 10, 1], 3, 1 / 3, weights_fitness, (0.5, ),
+                                       executor=executor))
+            if executor is not None:
+                executor.shutdown()
+
+        self.assertEqual(res[0][1], res[1][1])
+        self.assertTrue(all((w == w2).all() for w, w2 in zip(res[0][0], res[1][0])))
+
     """
         Player GT operations tests
     """
@@ -136,7 +393,7 @@ class MyTestCase(unittest.TestCase):
             (("light_water", "WATER", MIN_POW), ("light_notype", "NOTYPE", MIN_POW))),
            (("d2", "NOTYPE", 175, 100, 100, 100),
             (("light_notype", "NOTYPE", MIN_POW), (None, None, None)))]]),
-        (["light_psychic"], ["light_steel"],
+        ([0], [0],  # light_psychic, light_steel
          [[(("p1", "FIRE", 100, 100, 100, 100),
             (("light_psychic", "PSYCHIC", 50), ("light_fire", "FIRE", 50))),
            (("p2", "ELECTRIC", 100, 80, 100, 100),
@@ -178,17 +435,21 @@ class MyTestCase(unittest.TestCase):
                          msg="exp: {},\nact: {}".format(exp_p1, a1.game.player1_view))
 
     @parameterized.expand([
+        # p1 actions: light_psychic, light_fire, light_bug, switch p2, switch p3
+        # p2 actions (estimated in p1 view): light_water, light_notype, switch d2, switch d3
         ("p1",
-         {'light_psychic': {'light_water': (-3.333, 2.322), 'light_notype': (-0.228, 0.0), 'switch d2': (0.456, -0.456), 'switch d3': (0.456, -0.456)},
-          'light_fire': {'light_water': (-3.333, 2.433), 'light_notype': (-0.339, 0.111), 'switch d2': (0.689, -0.689), 'switch d3': (0.689, -0.689)},
-          'light_bug': {'light_water': (-3.333, 2.322), 'light_notype': (-0.228, 0.0), 'switch d2': (0.456, -0.456), 'switch d3': (0.456, -0.456)},
-          'switch p2': {'light_water': (-1.033, 0.689), 'light_notype': (-0.683, 0.456), 'switch d2': (0.0, 0.0), 'switch d3': (0.0, 0.0)},
-          'switch p3': {'light_water': (-0.517, 0.689), 'light_notype': (-0.683, 0.456), 'switch d2': (0.0, 0.0), 'switch d3': (0.0, 0.0)}}),
+         {0: {0: (-3.333, 2.322), 1: (-0.228, 0.0), 4: (0.456, -0.456), 5: (0.456, -0.456)},
+          1: {0: (-3.333, 2.433), 1: (-0.339, 0.111), 4: (0.689, -0.689), 5: (0.689, -0.689)},
+          2: {0: (-3.333, 2.322), 1: (-0.228, 0.0), 4: (0.456, -0.456), 5: (0.456, -0.456)},
+          4: {0: (-1.033, 0.689), 1: (-0.683, 0.456), 4: (0.0, 0.0), 5: (0.0, 0.0)},
+          5: {0: (-0.517, 0.689), 1: (-0.683, 0.456), 4: (0.0, 0.0), 5: (0.0, 0.0)}}),
+        # p1 actions (estimated in p2 view): light_fire, light_notype, switch p2, switch p3
+        # p2 actions: light_steel, light_water, light_fairy, switch d2, switch d3
         ("p2",
-         {'light_fire': {'light_steel': (-0.111, -0.294), 'light_water': (-2.433, 2.778), 'light_fairy': (-0.111, -0.294), 'switch d2': (0.689, -0.517), 'switch d3': (0.689, -3.333)},
-          'light_notype': {'light_steel': (0.0, -0.461), 'light_water': (-2.322, 2.778), 'light_fairy': (0.0, -0.461), 'switch d2': (0.456, -0.683), 'switch d3': (0.456, -0.683)},
-          'switch p2': {'light_steel': (-0.456, 0.456), 'light_water': (-0.689, 0.689), 'light_fairy': (-0.456, 0.456), 'switch d2': (0.0, 0.0), 'switch d3': (0.0, 0.0)},
-          'switch p3': {'light_steel': (-0.456, 0.456), 'light_water': (-0.689, 0.689), 'light_fairy': (-0.456, 0.456), 'switch d2': (0.0, 0.0), 'switch d3': (0.0, 0.0)}})
+         {0: {0: (-0.111, -0.294), 1: (-2.433, 2.778), 2: (-0.111, -0.294), 4: (0.689, -0.517), 5: (0.689, -3.333)},
+          1: {0: (0.0, -0.461), 1: (-2.322, 2.778), 2: (0.0, -0.461), 4: (0.456, -0.683), 5: (0.456, -0.683)},
+          4: {0: (-0.456, 0.456), 1: (-0.689, 0.689), 2: (-0.456, 0.456), 4: (0.0, 0.0), 5: (0.0, 0.0)},
+          5: {0: (-0.456, 0.456), 1: (-0.689, 0.689), 2: (-0.456, 0.456), 4: (0.0, 0.0), 5: (0.0, 0.0)}})
     ])
     def test_gt_build_payoff_matrix(self, test_player, exp_mat):
         game = PokeGame(team_specs_for_game2)
@@ -215,12 +476,48 @@ class MyTestCase(unittest.TestCase):
 
         self.assertDictEqual(exp_mat, test_mat)
 
+    @parameterized.expand([
+        ("p1", 0.95),
+        ("p2", 0.85),
+        ("p1", "expected"),
+        ("p2", "expected")
+    ])
+    def test_gt_payoff_arrays(self, role, force_dmg):
+        """ Payoffs computed with broadcasting are the ones of the moves applied to the views """
+
+        random.seed(14)
+        for _ in range(20):
+            game = PokeGame([gen_random_specs(4, 3), gen_random_specs(4, 3)])
+            for _ in range(random.randint(0, 3)):
+                if not game.is_end_state(None):
+                    game.play_round(random.choice(game.get_moves_from_state("p1", game.game_state)),
+                                    random.choice(game.get_moves_from_state("p2", game.game_state)))
+            if game.is_end_state(None):
+                continue
+
+            gt = PlayerGT(role, force_dmg)
+            gt.game = copy.deepcopy(game)
+            fill_game_with_estimation(role, gt.game)
+            p1_view, p2_view = gt.game.player1_view, gt.game.player2_view
+            p1_ops = [m for m in gt.game.get_moves_from_state("p1", p1_view) if m is not None]
+            p2_ops = [m for m in gt.game.get_moves_from_state("p2", p2_view) if m is not None]
+            own_view, opp_view, ops = (p1_view, p2_view, p1_ops) if role == "p1" else (p2_view, p1_view, p2_ops)
+            side = 1 if role == "p1" else 2
+            for_opp = {m: gt.translate_action(m, getattr(own_view, "team{}".format(side)),
+                                              getattr(own_view, "on_field{}".format(side)),
+                                              getattr(opp_view, "team{}".format(side)),
+                                              getattr(opp_view, "on_field{}".format(side))) for m in ops}
+
+            exp = gt.simulated_payoff_arrays(p1_ops, p2_ops, for_opp, role != "p1")
+            act = gt.payoff_arrays(p1_ops, p2_ops, for_opp, role != "p1")
+            self.assertTrue(all(np.allclose(e, a) for e, a in zip(exp, act)))
+
     @parameterized.expand([
         ({"a1": {"b1": (1, 1), "b2": (0, 0)}, "a2": {"b1": (0, 0), "b2": (1, 1)}},
          {"a1": {"b1": (1, 1), "b2": (0, 0)}, "a2": {"b1": (0, 0), "b2": (1, 1)}}),
         ({"a1": {"b1": (0, 0), "b2": (1, 1)}, "a2": {"b1": (1, 1), "b2": (2, 2)}},
          {"a2": {"b2": (2, 2)}}),
-        (None, {'switch p3': {'light_water': (-0.517, 0.689)}})
+        (None, {5: {0: (-0.517, 0.689)}})  # switch p3, light_water
     ])
     def test_remove_strictly_dominated_strategies(self, init, exp):
         game = PokeGame(team_specs_for_game2)
@@ -265,8 +562,58 @@ class MyTestCase(unittest.TestCase):
         self.assertTrue(test_payoffs and test_prob, msg="exp: {}\nact: {}".format(exp, act))
 
     @parameterized.expand([
-        ("p1", "switch p3"),
-        ("p2", "light_water")
+        ((1, 4),),
+        ((4, 1),),
+        ((2, 2),)
+    ])
+    def test_small_game_solver(self, shape):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            p1_poffs, p2_poffs = rng.integers(-3, 4, shape), rng.integers(-3, 4, shape)
+            exp = support_enumeration(p1_poffs, p2_poffs)
+            act = small_game(p1_poffs, p2_poffs)
+            if act is None:  # degenerate 2x2 game
+                continue
+            self.assertEqual(len(exp), len(act))
+            for (e1, e2), (a1, a2) in zip(sorted(exp, key=str), sorted(act, key=str)):
+                np.testing.assert_allclose(e1, a1)
+                np.testing.assert_allclose(e2, a2)
+
+    def test_small_game_constant_margin(self):
+        """ Strategies dominating by a constant margin (null denominators of the mixed equilibrium) """
+
+        p1_poffs, p2_poffs = np.array([[3, 2], [1, 0]]), np.array([[1, 0], [3, 2]])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            act = small_game(p1_poffs, p2_poffs)
+        self.assertEqual(1, len(act))
+        np.testing.assert_array_equal([1, 0], act[0][0])
+        np.testing.assert_array_equal([1, 0], act[0][1])
+
+    @parameterized.expand([
+        ("enumeration",),
+        ("lemke-howson",),
+        ("lp",)
+    ])
+    def test_nash_solvers(self, method):
+        rng = np.random.default_rng(0)
+        for n_lin, n_col in [(3, 3), (4, 5), (6, 6)]:
+            p1_poffs = rng.uniform(-1, 1, (n_lin, n_col))
+            p2_poffs = -p1_poffs
+            neq = solve(p1_poffs, p2_poffs, method)
+            if method != "enumeration":  # nashpy's support enumeration may miss the equilibria of some games
+                self.assertTrue(neq)
+            for p1_strategy, p2_strategy in neq:
+                self.assertTrue(is_equilibrium(p1_poffs, p2_poffs, p1_strategy, p2_strategy))
+
+            if method != "lp":  # the LP solves the zero-sum approximation of the game
+                p2_poffs = rng.uniform(-1, 1, (n_lin, n_col))
+                for p1_strategy, p2_strategy in solve(p1_poffs, p2_poffs, method):
+                    self.assertTrue(is_equilibrium(p1_poffs, p2_poffs, p1_strategy, p2_strategy))
+
+    @parameterized.expand([
+        ("p1", 5),  # switch p3
+        ("p2", 1)  # light_water
     ])
     def test_regular_move(self, role, exp):
         agent = PlayerGT(role)
@@ -275,8 +622,30 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(exp, act)
 
     @parameterized.expand([
-        ("p1", "switch p2"),
-        ("p2", "switch d2")
+        ("p1",),
+        ("p2",)
+    ])
+    def test_regular_move_expected_damage(self, role):
+        agent = PlayerGT(role, "expected")
+        agent.game = PokeGame(team_specs_for_game2)
+        act = agent.regular_move()
+        self.assertIn(act, agent.game.get_moves_from_state(role, agent.game.game_state))
+
+    @parameterized.expand([
+        ("p1", "lemke-howson"),
+        ("p2", "lemke-howson"),
+        ("p1", "lp"),
+        ("p2", "lp")
+    ])
+    def test_regular_move_solver(self, role, solver):
+        agent = PlayerGT(role, solver=solver)
+        agent.game = PokeGame(team_specs_for_game2)
+        act = agent.regular_move()
+        self.assertIn(act, agent.game.get_moves_from_state(role, agent.game.game_state))
+
+    @parameterized.expand([
+        ("p1", 4),  # switch p2
+        ("p2", 4)  # switch d2
     ])
     def test_post_faint_move(self, role, exp):
         agent = PlayerGT(role)
@@ -337,9 +706,9 @@ class MyTestCase(unittest.TestCase):
         self.assertTrue(sentinel)
 
     @parameterized.expand([
-        ("p1", "light_psychic", False),
-        ("p2", "light_water", False),
-        ("p2", "switch d2", True)
+        ("p1", 0, False),  # light_psychic
+        ("p2", 1, False),  # light_water
+        ("p2", 3, True)  # switch d2
     ])
     def test_makemove_mdm(self, test_player, exp_move, is_ko):
         game = PokeGame(team_specs_for_game)
@@ -355,10 +724,10 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(exp_move, test)
 
     @parameterized.expand([
-        ("p1", False, "light_psychic"),
-        ("p2", False, "light_water"),
-        ("p1", True, "switch p2"),
-        ("p2", True, "light_water")
+        ("p1", False, 0),  # light_psychic
+        ("p2", False, 1),  # light_water
+        ("p1", True, 3),  # switch p2
+        ("p2", True, 1)  # light_water
     ])
     def test_makemove_bm(self, test_player, full_view, exp_move):
         game = PokeGame(team_specs_for_game)
@@ -373,8 +742,8 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(exp_move, test)
 
     @parameterized.expand([
-        ("p1", "switch p3"),
-        ("p2", "light_water")
+        ("p1", 5),  # switch p3
+        ("p2", 1)  # light_water
     ])
     def test_make_move_gt(self, player, exp):
         agent = PlayerGT(player)
@@ -407,6 +776,35 @@ class MyTestCase(unittest.TestCase):
             error = True
         self.assertFalse(error, msg="Failed GA make move")
 
+    @parameterized.expand([
+        ("p1", ),
+        ("p2", )
+    ])
+    def test_nn_evaluate_options(self, role):
+        """ Evaluations of all the options at once are the ones of forward_pass on each reached state """
+
+        agent = PlayerNN(role, initialize_nn([66, 20, 1], "xavier"), "sigmoid")
+        game = PokeGame(team_specs_for_game2)
+        fill_game_with_estimation(role, game)
+        view = game.get_player_view(role)
+        pl, opp = ("p1", "p2") if role == "p1" else ("p2", "p1")
+        own_options, opp_options = game.get_moves_from_state(pl, view), game.get_moves_from_state(opp, view)
+
+        random.seed(8)
+        exp = list()
+        for pmv in own_options:
+            exp.append(list())
+            for omv in opp_options:
+                state = copy.deepcopy(view)
+                game.apply_player_moves(state, *((pmv, omv) if role == "p1" else (omv, pmv)))
+                exp[-1].append(agent.forward_pass(game.get_numeric_repr(state)))
+
+        random.seed(8)
+        p = agent.evaluate_options(game, view, own_options, opp_options)
+        self.assertTrue(np.allclose(exp, p))
+        random.seed(8)
+        self.assertEqual(own_options[int(np.argmax(np.min(exp, axis=1)))], agent.move_selector(game))
+
     def test_make_move_hybrid(self):
         error, e = False, str()
         agent = PlayerHybrid("p1", initialize_nn([66, 132, 1], "normal"), "sigmoid")
@@ -416,6 +814,85 @@ class MyTestCase(unittest.TestCase):
             error = True
         self.assertFalse(error, msg="Failed hybrid make move: {}".format(e))
 
+    """
+        Transposition table tests
+    """
+
+    def test_transposition_table(self):
+        tt = TranspositionTable(2)
+        tt.put("a", 1)
+        tt.put("b", 2)
+        self.assertEqual(1, tt.get("a"))
+        tt.put("c", 3)  # "b" least recently used
+
+        self.assertNotIn("b", tt)
+        self.assertEqual(2, len(tt))
+        self.assertEqual((1, 3), (tt.get("a"), tt.get("c")))
+        self.assertIsNone(tt.get("b"))
+        self.assertEqual((3, 1), (tt.hits, tt.misses))
+
+    def test_transposition_table_invalidate(self):
+        tt = TranspositionTable(3)
+        tt.put("a", 1, tag="x")
+        tt.put("b", 2)
+        tt.put("c", 3, tag="x")
+        tt.put("d", 4, tag="y")  # "a" least recently used
+        tt.invalidate("x")
+
+        self.assertEqual(["b", "d"], list(tt.entries))
+        tt.invalidate("y")
+        self.assertEqual(["b"], list(tt.entries))
+        self.assertFalse(tt.tags)
+
+    def test_transposition_table_rl_update(self):
+        """ Weight updates of rl agents only invalidate the entries of their network """
+
+        network, tt = initialize_nn([66, 20, 1], "normal"), TranspositionTable()
+        game = PokeGame(team_specs_for_game2)
+        fill_game_with_estimation("p1", game)
+        agent = PlayerRL("p1", "train", network, "SARSA", "sigmoid", 0.0, 0.01, tt)
+        tt.put("other", 1)
+
+        agent.make_move(game)
+        self.assertGreater(len(tt), 1)
+        agent.backpropagation(game.get_numeric_repr(player="p1"), False, None)
+        self.assertEqual(["other"], list(tt.entries))
+
+    @parameterized.expand([
+        ("p1", ),
+        ("p2", )
+    ])
+    def test_transposition_table_gt(self, role):
+        game, tt = PokeGame(team_specs_for_game2), TranspositionTable()
+        fill_game_with_estimation(role, game)
+        exp, gt = PlayerGT(role), PlayerGT(role, tt=tt)
+        exp.game, gt.game = copy.deepcopy(game), copy.deepcopy(game)
+        exp.build_payoff_matrix()
+
+        for _ in range(2):
+            gt.build_payoff_matrix()
+            self.assertDictEqual(exp.payoff_mat, gt.payoff_mat)
+        self.assertEqual((1, 1), (tt.hits, tt.misses))
+
+    def test_transposition_table_nn(self):
+        network, tt = initialize_nn([66, 20, 1], "normal"), TranspositionTable()
+        game = PokeGame(team_specs_for_game2)
+        fill_game_with_estimation("p1", game)
+        exp, agent = PlayerNN("p1", network, "sigmoid"), PlayerNN("p1", network, "sigmoid", tt)
+
+        for _ in range(2):
+            random.seed(4)
+            exp_move = exp.make_move(game)
+            random.seed(4)
+            self.assertEqual(exp_move, agent.make_move(game))
+        self.assertGreater(tt.hits, 0)
+
+        # entries of other networks are not used
+        agent.network = initialize_nn([66, 20, 1], "normal")
+        hits = tt.hits
+        agent.make_move(game)
+        self.assertEqual(hits, tt.hits)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,129 @@
+import sys, os
+
+sys.path.append(os.getcwd() + '/..')
+
+import copy
+import random
+import unittest
+
+from parameterized import parameterized
+
+from src.game.ArrayPokeGame import ArrayPokeGame
+from src.game.PokeGame import PokeGame, gen_random_specs
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TestParams
+
+random.seed(19)
+
+"""
+ *
+ *    Utils
+ *
+"""
+
+team_specs_for_game = [[(("p1", "FIRE", 100, 100, 100, 100),
+                         (("light_psychic", "PSYCHIC", 50), ("heavy_fire", "FIRE", 100))),
+                        (("p2", "ELECTRIC", 100, 80, 100, 100),
+                         (("light_grass", "GRASS", 50), ("heavy_electric", "ELECTRIC", 100)))],
+                       [(("d1", "WATER", 100, 100, 100, 99),
+                         (("light_steel", "STEEL", 50), ("heavy_water", "WATER", 100))),
+                        (("d2", "DRAGON", 100, 80, 100, 101),
+                         (("light_bug", "BUG", 50), ("heavy_dragon", "DRAGON", 100)))]]
+
+"""
+ *
+ *    Tests
+ *
+"""
+
+
+class TestCaseArrayPokeGame(unittest.TestCase):
+
+    def test_numeric_repr(self):
+        self.assertListEqual(PokeGame(team_specs_for_game).get_numeric_repr(),
+                             ArrayPokeGame(team_specs_for_game).get_numeric_repr())
+
+    @parameterized.expand([
+        (False, False, "p1"),
+        (True, False, "p1"),
+        (False, True, "p2"),
+        (True, True, "p2")
+    ])
+    def test_get_moves_from_state(self, fainted, opp_fainted, player):
+        game, arr_game = PokeGame(team_specs_for_game), ArrayPokeGame(team_specs_for_game)
+        for g in (game, arr_game):
+            own_of, opp_of = [g.game_state.on_field1, g.game_state.on_field2][::(-1) ** (player == "p2")]
+            if fainted:
+                own_of.cur_hp = 0
+            if opp_fainted:
+                opp_of.cur_hp = 0
+
+        self.assertListEqual(game.get_moves_from_state(player, game.game_state),
+                             arr_game.get_moves_from_state(player, arr_game.game_state))
+
+    def test_play_round_full_game(self):
+        # light_psychic, heavy_fire, switch p2, heavy_electric, None, heavy_electric...
+        p1_moves = [0, 1, 3, 1, None, 1, 1, 1]
+        # light_steel, heavy_water, None, light_steel, switch d2, light_bug, light_bug, heavy_dragon
+        p2_moves = [0, 1, None, 0, 3, 0, 0, 1]
+        game, arr_game = PokeGame(team_specs_for_game), ArrayPokeGame(team_specs_for_game)
+
+        for p1_move, p2_move in zip(p1_moves, p2_moves):
+            exp = game.play_round(p1_move, p2_move, 0.85, True)
+            act = arr_game.play_round(p1_move, p2_move, 0.85, True)
+            self.assertEqual(exp, act)
+            self.assertListEqual(game.get_numeric_repr(), arr_game.get_numeric_repr())
+
+        self.assertEqual(game.match_result(), arr_game.match_result())
+        self.assertEqual(game.is_end_state(), arr_game.is_end_state())
+
+    def test_random_games(self):
+        """ Same seed must produce the same games with both engines """
+
+        for _ in range(20):
+            ts = [gen_random_specs(3, 3), gen_random_specs(3, 3)]
+            seed = random.random()
+            reprs = list()
+            for game in (PokeGame(ts), ArrayPokeGame(ts)):
+                random.seed(seed)
+                reprs.append(list())
+                while not game.is_end_state():
+                    of1, of2 = game.game_state.on_field1, game.game_state.on_field2
+                    m1 = random.choice(game.get_moves_from_state("p1", game.game_state)) if of1.cur_hp and \
+                        of2.cur_hp or not of1.cur_hp else None
+                    m2 = random.choice(game.get_moves_from_state("p2", game.game_state)) if of1.cur_hp and \
+                        of2.cur_hp or not of2.cur_hp else None
+                    game.play_round(m1, m2)
+                    reprs[-1].append(game.get_numeric_repr())
+            self.assertListEqual(reprs[0], reprs[1])
+
+    def test_copy_game(self):
+        game = ArrayPokeGame(team_specs_for_game)
+        exp, game_cp = copy.deepcopy(game), copy.deepcopy(game)
+        game.play_round(1, 3, 0.85, True)  # heavy_fire, switch d2
+
+        self.assertEqual(exp, game_cp)
+        self.assertNotEqual(game, game_cp)
+
+    def test_player_view_hides_moves(self):
+        game = ArrayPokeGame(team_specs_for_game)
+        game.play_round(0, 0, 0.85, True)  # light_psychic, light_steel
+        view = game.get_player_view("p1")
+
+        self.assertListEqual(["light_steel", None], [m.name for m in view.on_field2.moves])
+        self.assertListEqual(["light_psychic", "heavy_fire"], [m.name for m in view.on_field1.moves])
+
+    @parameterized.expand([
+        ("random", "random"),
+        ("mdm", "bm")
+    ])
+    def test_test_mode_engines(self, agent1, agent2):
+        res = list()
+        for engine in ("object", "array"):
+            random.seed(5)
+            res.append(GameEngine(TestParams("test", agent1, agent2, nb=20, engine=engine)).test_mode())
+        self.assertEqual(res[0], res[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+import sys, os
+
+sys.path.append(os.getcwd() + '/..')
+
+import random
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+
+from src.agents.PlayerGA import PlayerGA
+from src.agents.PlayerNN import PlayerNN
+from src.agents.nn_utils import initialize_nn, initialize_population
+from src.game.BatchedPokeGame import BatchedPokeGame, NO_ACTION
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TestParams
+from src.game.PokeGame import PokeGame, gen_random_specs
+from src.game.Pokemon import Move
+from src.game.constants import TYPES_INDEX, MIN_POW
+
+random.seed(19)
+
+"""
+ *
+ *    Utils
+ *
+"""
+
+team_specs_for_game = [[(("p1", "FIRE", 100, 100, 100, 100),
+                         (("light_psychic", "PSYCHIC", 50), ("heavy_fire", "FIRE", 100))),
+                        (("p2", "ELECTRIC", 100, 80, 100, 100),
+                         (("light_grass", "GRASS", 50), ("heavy_electric", "ELECTRIC", 100)))],
+                       [(("d1", "WATER", 100, 100, 100, 99),
+                         (("light_steel", "STEEL", 50), ("heavy_water", "WATER", 100))),
+                        (("d2", "DRAGON", 100, 80, 100, 101),
+                         (("light_bug", "BUG", 50), ("heavy_dragon", "DRAGON", 100)))]]
+
+
+def moves_to_actions(game: PokeGame, p1_move: str | None, p2_move: str | None) -> list[int | None]:
+    """ Converts names of attacks or 'switch {name}' in actions (same encoding in both engines, None for no action) """
+
+    actions = list()
+    for move, team, of in zip((p1_move, p2_move), (game.game_state.team1, game.game_state.team2),
+                              (game.game_state.on_field1, game.game_state.on_field2)):
+        if move is None:
+            actions.append(None)
+        elif "switch" in move:
+            actions.append(len(of.moves) + [p.name for p in team].index(move.split(" ")[1]))
+        else:
+            actions.append([m.name for m in of.moves].index(move))
+    return actions
+
+
+"""
+ *
+ *    Tests
+ *
+"""
+
+
+class TestCaseBatchedPokeGame(unittest.TestCase):
+
+    def test_numeric_repr(self):
+        specs = [[gen_random_specs(3, 3), gen_random_specs(3, 3)] for _ in range(5)]
+        batch = BatchedPokeGame(specs)
+        self.assertListEqual([PokeGame(s).get_numeric_repr() for s in specs], batch.get_numeric_repr().tolist())
+
+        # on field Pokémon first
+        game, batch = PokeGame(team_specs_for_game), BatchedPokeGame([team_specs_for_game])
+        game.apply_player_moves(game.game_state, 3, 3)  # switch p2, switch d2
+        batch.game_state.on_field[0] = [1, 1]
+        self.assertListEqual(game.get_numeric_repr(), batch.get_numeric_repr()[0].tolist())
+
+    @parameterized.expand([
+        (False, False, "p1"),
+        (True, False, "p1"),
+        (False, True, "p2"),
+        (True, True, "p2")
+    ])
+    def test_legal_actions(self, fainted, opp_fainted, player):
+        game, batch = PokeGame(team_specs_for_game), BatchedPokeGame([team_specs_for_game])
+        side = 0 if player == "p1" else 1
+        if fainted:
+            [game.game_state.on_field1, game.game_state.on_field2][side].cur_hp = 0
+            batch.game_state.cur_hp[0, side, 0] = 0
+        if opp_fainted:
+            [game.game_state.on_field1, game.game_state.on_field2][1 - side].cur_hp = 0
+            batch.game_state.cur_hp[0, 1 - side, 0] = 0
+
+        exp = sorted(NO_ACTION if m is None else m for m in game.get_moves_from_state(player, game.game_state))
+        columns = np.flatnonzero(batch.legal_actions(side)[0])
+        self.assertListEqual(exp, sorted(batch.action_codes(columns, batch.n_actions).tolist()))
+
+    def test_play_round(self):
+        p1_moves = ["light_psychic", "heavy_fire", "switch p2", "heavy_electric"]
+        p2_moves = ["light_steel", "heavy_water", None, "light_steel"]
+        game, batch = PokeGame(team_specs_for_game), BatchedPokeGame([team_specs_for_game] * 50)
+
+        for p1_move, p2_move in zip(p1_moves, p2_moves):
+            actions = moves_to_actions(game, p1_move, p2_move)
+            pre_hp = batch.game_state.cur_hp.copy()
+            game.play_round(*actions, 0.85, True)
+            batch.play_round(np.array([[NO_ACTION if a is None else a for a in actions]] * len(batch)))
+
+            # hp loss of each game is one of the possible damage values of the move (if attacker has not fainted)
+            gs = game.game_state
+            for side, of, opp_of, move in ((0, gs.on_field1, gs.on_field2, p1_move),
+                                           (1, gs.on_field2, gs.on_field1, p2_move)):
+                if move is not None and "switch" not in move:
+                    dist = PokeGame.damage_distribution(Move(move, *[(m.move_type, m.base_pow) for m in of.moves
+                                                                     if m.name == move][0]), of, opp_of)
+                    slot, atk_slot = batch.game_state.on_field[0, 1 - side], batch.game_state.on_field[0, side]
+                    alive = batch.game_state.cur_hp[:, side, atk_slot] > 0
+                    hp_loss = pre_hp[alive, 1 - side, slot] - batch.game_state.cur_hp[alive, 1 - side, slot]
+                    for loss, hp in zip(hp_loss, pre_hp[alive, 1 - side, slot]):
+                        self.assertIn(loss, {min(d, hp) for d, _ in dist})
+
+        self.assertListEqual([1, 0], batch.game_state.on_field[0].tolist())
+        self.assertTrue(batch.game_state.revealed[:, 0, 0, :2].all())
+        self.assertTrue((batch.turns <= 4).all())
+
+    def test_speed_order(self):
+        """ Faster Pokémon knocks out the slower one, which does not attack """
+
+        specs = [[(("p1", "FIRE", 10, 140, 60, 100), (("heavy_fire", "FIRE", 100), ("light_psychic", "PSYCHIC", 50)))],
+                 [(("d1", "GRASS", 10, 140, 60, 90), (("heavy_grass", "GRASS", 100), ("light_steel", "STEEL", 50)))]]
+        batch = BatchedPokeGame([specs] * 10)
+        batch.play_round(np.zeros((10, 2), dtype=int))
+
+        self.assertTrue((batch.game_state.cur_hp[:, 0, 0] == 10).all())
+        self.assertTrue((batch.game_state.cur_hp[:, 1, 0] == 0).all())
+        self.assertTrue(batch.finished.all())
+        self.assertListEqual([True] * 10, batch.match_result()[0].tolist())
+
+    def test_player_view(self):
+        batch = BatchedPokeGame([team_specs_for_game])
+        batch.play_round(np.array([[0, 0]]))
+        view = batch.get_player_view(0)
+
+        # seen opponent and revealed move unchanged, unknown slot completed with STAB
+        self.assertEqual(TYPES_INDEX["WATER"], view.poke_type[0, 1, 0])
+        self.assertListEqual([TYPES_INDEX["STEEL"], TYPES_INDEX["WATER"]], view.move_type[0, 1, 0].tolist())
+        self.assertListEqual([MIN_POW, MIN_POW], view.move_pow[0, 1, 0].tolist())
+        # unseen opponent
+        self.assertEqual(TYPES_INDEX["NOTYPE"], view.poke_type[0, 1, 1])
+        self.assertListEqual([TYPES_INDEX["NOTYPE"], 0], view.move_type[0, 1, 1].tolist())
+        self.assertListEqual([MIN_POW, 0], view.move_pow[0, 1, 1].tolist())
+        # own team unchanged
+        self.assertTrue((view.move_pow[0, 0] == batch.game_state.move_pow[0, 0]).all())
+
+    def test_nn_make_moves(self):
+        np.random.seed(2)
+        player = PlayerNN("p2", initialize_nn([66, 10, 1], "xavier"), "sigmoid")
+        batch = BatchedPokeGame([[gen_random_specs(3, 3), gen_random_specs(3, 3)] for _ in range(30)])
+        batch.game_state.cur_hp[:10, 0, 0] = 0  # opponent must switch
+        batch.game_state.cur_hp[10:20, 1, 0] = 0  # player must switch
+
+        actions = player.make_moves(batch)
+        legal = batch.legal_actions(1)
+        self.assertTrue((actions[:10] == NO_ACTION).all())
+        self.assertTrue(all(legal[i, a] for i, a in enumerate(actions[10:], 10)))
+        self.assertTrue((actions[10:20] >= batch.game_state.n_moves).all())
+
+    @parameterized.expand([
+        ("random", "random"),
+        ("mdm", "random"),
+        ("bm", "mdm"),
+        ("random", "ml")
+    ])
+    def test_test_mode_batched(self, agent1, agent2):
+        np.random.seed(3)
+        ml = (initialize_nn([66, 10, 1], "xavier"), "sigmoid", "SARSA")
+        res = GameEngine(TestParams("test", agent1, agent2, ml1=ml, ml2=ml, nb=300, engine="batched")).test_mode()
+
+        self.assertTrue(0 <= res <= 1)
+        if agent1 == "mdm":
+            self.assertGreater(res, 0.75)
+
+    def test_test_mode_batched_seed(self):
+        """ Batched test mode is reproducible from the seed of the test parameters """
+
+        res = list()
+        for s in (5, 6, 5):
+            random.seed(s)  # state of the global generator is irrelevant
+            res.append(GameEngine(TestParams("test", "random", "random", nb=200, engine="batched", seed=9)).test_mode())
+        self.assertEqual(res[0], res[1])
+        self.assertEqual(res[0], res[2])
+
+    def test_population_test_mode(self):
+        """ Individuals playing the same games as a batched test mode of each of them """
+
+        np.random.seed(4)
+        population = initialize_population(3, [66, 10, 1], "xavier")
+        random.seed(5)
+        res = GameEngine(TestParams("test", "ga", "mdm", ml1=(population, "sigmoid"), nb=200)).population_test_mode()
+
+        self.assertEqual((3, ), res.shape)
+        self.assertTrue(((0 <= res) & (res <= 1)).all())
+        self.assertLess(res.max(), 0.5)  # untrained networks against mdm
+
+    def test_population_test_mode_agent1(self):
+        np.random.seed(4)
+        population = initialize_population(3, [66, 10, 1], "xavier")
+        random.seed(5)
+        exp = GameEngine(TestParams("test", "ga", "mdm", ml1=(population, "sigmoid"), nb=20)).population_test_mode()
+        random.seed(5)
+        res = GameEngine(TestParams("test", "ml", "mdm", ml1=(population, "sigmoid", "SARSA"), nb=20)
+                         ).population_test_mode()
+        np.testing.assert_array_equal(exp, res)
+
+        with self.assertRaises(ValueError):
+            GameEngine(TestParams("test", "mdm", "random", ml1=(population, "sigmoid"), nb=20)).population_test_mode()
+
+    def test_ga_evolution_population(self):
+        np.random.seed(6)
+        random.seed(6)
+
+        def fitness(population, act_f):
+            return GameEngine(TestParams("test", "ga", "random", ml1=(population, act_f), nb=20)).population_test_mode()
+
+        network, score = PlayerGA("p1", initialize_nn([66, 10, 1], "xavier"), "sigmoid").evolution(
+            6, "xavier", [66, 10, 1], 3, 1 / 3, fitness, ("sigmoid", ), population_fitness=True)
+        self.assertListEqual([(10, 66), (10, )], [w.shape for w in network])
+        self.assertTrue(0 <= score <= 1)
+
+    def test_test_mode_batched_gt(self):
+        with self.assertRaises(ValueError):
+            GameEngine(TestParams("test", "gt", "random", nb=10, engine="batched")).test_mode()
+
+
+if __name__ == '__main__':
+    unittest.main()
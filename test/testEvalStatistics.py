@@ -0,0 +1,55 @@
+import sys, os
+
+sys.path.append(os.getcwd() + '/..')
+
+import unittest
+
+from parameterized import parameterized
+
+from src.game.EvalStatistics import wilson_interval, hoeffding_interval, sequential_stop
+
+"""
+ *
+ *    Tests
+ *
+"""
+
+
+class TestCaseEvalStatistics(unittest.TestCase):
+
+    @parameterized.expand([
+        (50, 100, (0.4038, 0.5962)),
+        (0, 10, (0.0, 0.2775)),
+        (10, 10, (0.7225, 1.0))
+    ])
+    def test_wilson_interval(self, wins, n, exp):
+        self.assertEqual(exp, tuple(round(b, 4) for b in wilson_interval(wins, n, 0.95)))
+
+    def test_hoeffding_interval(self):
+        low, high = hoeffding_interval(50, 100, 0.95)
+        w_low, w_high = wilson_interval(50, 100, 0.95)
+
+        self.assertAlmostEqual(0.5, (low + high) / 2)
+        self.assertTrue(low < w_low and w_high < high)
+
+    @parameterized.expand([
+        (50, 100, "wilson", None, False),
+        (500, 1000, "wilson", None, True),  # interval narrower than precision
+        (95, 100, "wilson", 0.5, True),  # interval excludes threshold
+        (95, 100, "hoeffding", None, False),
+        (20, 20, "sprt", 0.5, True),
+        (10, 20, "sprt", 0.5, False)
+    ])
+    def test_sequential_stop(self, wins, n, method, threshold, exp):
+        self.assertEqual(exp, sequential_stop(wins, n, method, 0.05, 0.95, threshold))
+
+    def test_sequential_stop_checks(self):
+        """ Intervals of evaluations checked several times are widened """
+
+        self.assertTrue(sequential_stop(60, 100, "wilson", 0.05, 0.95, 0.5))
+        self.assertFalse(sequential_stop(60, 100, "wilson", 0.05, 0.95, 0.5, n_checks=10))
+        self.assertTrue(sequential_stop(70, 100, "wilson", 0.05, 0.95, 0.5, n_checks=10))
+
+
+if __name__ == '__main__':
+    unittest.main()
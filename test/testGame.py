@@ -4,11 +4,14 @@ sys.path.append(os.getcwd() + '/..')
 
 import copy
 import random
+import tempfile
 import unittest
 
 from parameterized import parameterized
+from src.game import DamageTable
 from src.game.PokeGame import PokeGame
 from src.game.Pokemon import Pokemon, Move
+from src.game.constants import MIN_STAT, MAX_STAT
 
 random.seed(19)
 
@@ -53,6 +56,18 @@ team_specs_for_game4 = [[(("p1", "FAIRY", 100, 100, 100, 100),
                           (("light_poison", "POISON", 50), ("heavy_dark", "DARK", 100)))]]
 
 
+def to_action(state: PokeGame.GameStruct, player: str, move: str | None) -> int | None:
+    """ Action of player corresponding to the name of an attack or 'switch {name}' in state """
+
+    if move is None:
+        return None
+
+    team, of = (state.team1, state.on_field1) if player == "p1" else (state.team2, state.on_field2)
+    if "switch" in move:
+        return len(of.moves) + [p.name for p in team].index(move.split(" ")[1])
+    return [m.name for m in of.moves].index(move)
+
+
 def gen_move_list_1():
     return [Move("light_psychic", "PSYCHIC", 50), Move("heavy_fire", "FIRE", 100)]
 
@@ -151,14 +166,14 @@ class TestCasePokeGame(unittest.TestCase):
         self.assertEqual(game.get_player_view("p2"), exp)
 
     @parameterized.expand([
-        (False, False, ["light_steel", "heavy_water", "switch d2"], "p2"),
-        (True, False, ["switch d2"], "p2"),
-        (False, False, ["light_psychic", "heavy_fire", "switch p2"], "p1"),
-        (True, False, ["switch p2"], "p1"),
+        (False, False, [0, 1, 3], "p2"),
+        (True, False, [3], "p2"),
+        (False, False, [0, 1, 3], "p1"),
+        (True, False, [3], "p1"),
         (False, True, [None], "p1"),
-        (True, True, ["switch p2"], "p1"),
+        (True, True, [3], "p1"),
         (False, True, [None], "p2"),
-        (True, True, ["switch d2"], "p2")
+        (True, True, [3], "p2")
     ])
     def test_get_moves_from_state(self, fainted, opp_fainted, expected_output, player):
         game = PokeGame(team_specs_for_game)
@@ -194,6 +209,57 @@ class TestCasePokeGame(unittest.TestCase):
         dmg = PokeGame.damage_formula(move, attacker, target, 0.85)
         self.assertEqual(dmg, expect_dmg)
 
+    @parameterized.expand([
+        (Move("light_fire", "FIRE", 50), Pokemon("p1", "FIRE", [100] * 4, [None]),
+         Pokemon("p2", "NORMAL", [100] * 4, [None])),
+        (Move("heavy_fire", "FIRE", 100), Pokemon("p1", "STEEL", [100, 140, 60, 100], [None]),
+         Pokemon("p2", "GRASS", [100, 60, 60, 100], [None])),
+        (Move("light_normal", "NORMAL", 50), Pokemon("p1", "STEEL", [100, 60, 60, 100], [None]),
+         Pokemon("p2", "ROCK", [100, 60, 140, 100], [None])),
+        (Move("light_normal", "NORMAL", 50), Pokemon("p1", "NORMAL", [100] * 4, [None]),
+         Pokemon("p2", "GHOST", [100] * 4, [None]))
+    ])
+    def test_damage_distribution(self, move, attacker, target):
+        rolls = [PokeGame.damage_formula(move, attacker, target, r / 100) for r in range(85, 101)]
+        exp = [(d, rolls.count(d) / 16) for d in sorted(set(rolls))]
+
+        self.assertListEqual(exp, list(PokeGame.damage_distribution(move, attacker, target)))
+        self.assertAlmostEqual(sum(rolls) / 16, PokeGame.expected_damage(move, attacker, target))
+        self.assertAlmostEqual(len([d for d in rolls if d >= rolls[8]]) / 16,
+                               PokeGame.ko_probability(move, attacker, target, rolls[8]))
+
+    def test_damage_table(self):
+        rng = random.Random(4)  # own generator, other tests depend on the state of the global one
+        for _ in range(2000):
+            params = (rng.choice(DamageTable.POWS), rng.randint(MIN_STAT, MAX_STAT), rng.randint(MIN_STAT, MAX_STAT),
+                      rng.choice(DamageTable.STABS), rng.choice(DamageTable.TYPE_AFFS))
+            roll = rng.choice(DamageTable.ROLLS)
+            dmg = DamageTable.compute_damage(*params, roll / 100)
+            self.assertEqual(dmg, DamageTable.table_damage(*params, roll))
+
+            # reverse tables: the actual statistic is inside the range producing the damage
+            if params[4]:
+                lo, hi = DamageTable.stat_range(DamageTable.REVERSE_ATK_TABLE, params[0], params[2], *params[3:], dmg)
+                self.assertTrue(lo <= params[1] <= hi)
+                lo, hi = DamageTable.stat_range(DamageTable.REVERSE_DES_TABLE, *params[:2], *params[3:], dmg)
+                self.assertTrue(lo <= params[2] <= hi)
+
+        # out of the domain of the table
+        self.assertEqual(DamageTable.compute_damage(75, 100, 100, 1, 1, 0.9),
+                         DamageTable.table_damage(75, 100, 100, 1, 1, 90))
+        for params in ((100, 100.0, 100, 1, 1), (100, 100, 99.5, 1.5, 2)):  # non-integer statistics
+            self.assertEqual(DamageTable.compute_damage(*params, 0.9), DamageTable.table_damage(*params, 90))
+
+    def test_damage_table_storage(self):
+        self.assertTrue(os.path.isabs(DamageTable.DAMAGE_TABLE_PATH))  # independent from the working directory
+        table = DamageTable.DAMAGE_TABLE
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "damage-table.npy")
+            DamageTable.save_damage_table(path)
+            DamageTable.load_damage_table(path)
+            self.assertTrue((table == DamageTable.DAMAGE_TABLE).all())
+            DamageTable.DAMAGE_TABLE = table
+
     @parameterized.expand([
         ("light_psychic", "light_steel", "p1", "d1"),
         ("switch p2", "light_steel", "p2", "d1"),
@@ -206,7 +272,8 @@ class TestCasePokeGame(unittest.TestCase):
     def test_apply_player_moves(self, player1_move, player2_move, exp_field1_name, exp_field2_name):
         game = PokeGame(team_specs_for_game)
         gs = game.game_state
-        game.apply_player_moves(gs, player1_move, player2_move, force_dmg=0.0, force_order=True)
+        game.apply_player_moves(gs, to_action(gs, "p1", player1_move), to_action(gs, "p2", player2_move),
+                                force_dmg=0.0, force_order=True)
 
         test_p1 = True
         if player1_move is not None and "switch" not in player1_move:  # p1 attacked
@@ -222,6 +289,68 @@ class TestCasePokeGame(unittest.TestCase):
 
         self.assertTrue(test_p1 and test_p2)
 
+    @parameterized.expand([
+        ("light_psychic", "light_steel"),
+        ("switch p2", "light_steel"),
+        ("light_psychic", "switch d2"),
+        ("switch p2", "switch d2"),
+        ("switch p2", None),
+        (None, "switch d2"),
+        ("heavy_fire", "heavy_water"),
+        (None, "light_steel")
+    ])
+    def test_undo_player_moves(self, player1_move, player2_move):
+        game = PokeGame(team_specs_for_game)
+        gs, exp = game.game_state, copy.deepcopy(game.game_state)
+        player1_move, player2_move = to_action(gs, "p1", player1_move), to_action(gs, "p2", player2_move)
+        applied = game.apply_player_moves(copy.deepcopy(gs), player1_move, player2_move, 0.85, True)
+
+        undo = game.apply_player_moves_undoable(gs, player1_move, player2_move, 0.85, True)
+        self.assertEqual(applied, gs)
+
+        game.undo_player_moves(gs, undo)
+        self.assertEqual(exp, gs)
+        self.assertIs(gs.on_field1, gs.team1[0])
+        self.assertIs(gs.on_field2, gs.team2[0])
+
+    @parameterized.expand([
+        ("light_psychic", "light_steel"),
+        ("switch p2", "light_steel"),
+        ("light_psychic", "switch d2"),
+        ("switch p2", "switch d2"),
+        ("switch p2", None),
+        (None, "switch d2"),
+        ("heavy_fire", "heavy_water"),
+        (None, "light_steel")
+    ])
+    def test_zobrist_hash(self, player1_move, player2_move):
+        game = PokeGame(team_specs_for_game)
+        gs = game.game_state
+        player1_move, player2_move = to_action(gs, "p1", player1_move), to_action(gs, "p2", player2_move)
+        pre_hash = gs.zobrist
+        self.assertEqual(pre_hash, hash(copy.deepcopy(gs)))
+
+        undo = game.apply_player_moves_undoable(gs, player1_move, player2_move, 0.85, True)
+        incremental = gs.zobrist
+        gs.reset_zobrist()
+        self.assertEqual(gs.zobrist, incremental)  # same as complete computation
+        self.assertNotEqual(pre_hash, incremental)
+
+        game.undo_player_moves(gs, undo)
+        self.assertEqual(pre_hash, gs.zobrist)
+
+    def test_zobrist_hash_transposition(self):
+        """ Both sides switching back and forth reach the same state """
+
+        game = PokeGame(team_specs_for_game)
+        gs = game.game_state
+        pre_hash = gs.zobrist
+        game.apply_player_moves(gs, 3, 3)  # switch p2, switch d2
+        game.apply_player_moves(gs, 2, 2)  # switch p1, switch d1
+
+        self.assertEqual(pre_hash, gs.zobrist)
+        self.assertNotEqual(pre_hash, game.player1_view.zobrist)
+
     @parameterized.expand([
         (["switch p2"], ["switch d2"], {'p1_moved': True, 'p1_fainted': False, 'p1_first': True,
                                         'p2_moved': True, "p2_fainted": False, "p2_first": False}),
@@ -242,7 +371,8 @@ class TestCasePokeGame(unittest.TestCase):
         game = PokeGame(team_specs_for_game2)
         res = None
         for p1_move, p2_move in zip(p1_moves, p2_moves):
-            res = game.play_round(p1_move, p2_move)
+            gs = game.game_state
+            res = game.play_round(to_action(gs, "p1", p1_move), to_action(gs, "p2", p2_move))
 
         self.assertEqual(exp_out, res)
 
@@ -308,7 +438,7 @@ class TestCasePokeGame(unittest.TestCase):
         # actual values
         g = PokeGame(team_specs)
         for m1, m2 in zip(p1_moves, p2_moves):
-            g.play_round(m1, m2, 0.85, True)
+            g.play_round(to_action(g.game_state, "p1", m1), to_action(g.game_state, "p2", m2), 0.85, True)
 
         # expected values
 
@@ -347,7 +477,8 @@ class TestCasePokeGame(unittest.TestCase):
                     "heavy_dragon"]
 
         for p1_move, p2_move in zip(p1_moves, p2_moves):
-            game.play_round(p1_move, p2_move, 0.85, True)
+            gs = game.game_state
+            game.play_round(to_action(gs, "p1", p1_move), to_action(gs, "p2", p2_move), 0.85, True)
 
         # expected values
 
@@ -431,10 +562,8 @@ class TestCasePokeGame(unittest.TestCase):
                     p.des = 99
                     p.spe = 97
 
-                    for m in p.moves:
-                        m.name = "light_dark"
-                        m.move_type = "DARK"
-                        m.base_pow = 55
+                    for i in range(len(p.moves)):
+                        p.set_move(i, Move("light_dark", "DARK", 55))
 
         self.assertEqual(exp, game_cp)
 
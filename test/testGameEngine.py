@@ -0,0 +1,103 @@
+import sys, os
+
+sys.path.append(os.getcwd() + '/..')
+
+import random
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from parameterized import parameterized
+
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TestParams
+
+"""
+ *
+ *    Tests
+ *
+"""
+
+
+class TestCaseGameEngine(unittest.TestCase):
+
+    @parameterized.expand([
+        ("random", "mdm", "object"),
+        ("bm", "random", "array")
+    ])
+    def test_test_mode_workers(self, agent1, agent2, engine):
+        """ Results only depend on the seed of the test, not on the number of processes """
+
+        res = [GameEngine(TestParams("test", agent1, agent2, nb=40, engine=engine, seed=7)).test_mode(workers=w)
+               for w in (1, 3, 1)]
+        self.assertEqual(res[0], res[1])
+        self.assertEqual(res[0], res[2])
+
+    @parameterized.expand([(1,), (2,)])
+    def test_test_mode_rng_state(self, workers):
+        """ The global generators of the caller are left as they were, whatever the number of processes """
+
+        random.seed(8)
+        np.random.seed(8)
+        exp = random.random(), np.random.random()
+
+        random.seed(8)
+        np.random.seed(8)
+        GameEngine(TestParams("test", "random", "mdm", nb=10, seed=1)).test_mode(workers=workers)
+        self.assertEqual(exp, (random.random(), np.random.random()))
+
+    @parameterized.expand([
+        ("wilson", None, 0.1),
+        ("hoeffding", None, 0.1),
+        ("sprt", 0.5, 0.1)
+    ])
+    def test_sequential_test_mode(self, method, threshold, precision):
+        pars = TestParams("test", "mdm", "random", nb=1000, seed=3)
+        res, (low, high), n_played = GameEngine(pars).sequential_test_mode(precision, 0.95, method, threshold, chunk=20)
+
+        self.assertLess(n_played, 1000)
+        self.assertFalse(n_played % 20)
+        self.assertTrue(low <= res <= high)
+        if method != "sprt":
+            self.assertLessEqual(high - low, 2 * precision)
+        # same games as test_mode
+        pars.nb = n_played
+        self.assertEqual(res, GameEngine(pars).test_mode())
+
+    def test_sequential_test_mode_players(self):
+        """ Players are built once for all the chunks """
+
+        pars = TestParams("test", "mdm", "random", nb=100, seed=3)
+        with patch.object(GameEngine, "init_players", wraps=GameEngine.init_players) as init_players:
+            GameEngine(pars).sequential_test_mode(0.01, chunk=20)
+        self.assertEqual(1, init_players.call_count)
+
+    def test_paired_test_mode(self):
+        pars = TestParams("test", "mdm", "random", nb=60, seed=11)
+        diff, std_err, n = GameEngine(pars).paired_test_mode(TestParams("test", "mdm", "random"))
+        self.assertEqual((0.0, 0.0, 60), (diff, std_err, n))
+
+        diff, std_err, n = GameEngine(pars).paired_test_mode(TestParams("test", "random", "random"))
+        self.assertGreater(diff - 2 * std_err, 0)
+
+    @parameterized.expand([
+        ("paired_test_mode", (TestParams("test", "random", "random"),)),
+        ("sequential_test_mode", ())
+    ])
+    def test_unsupported_engine(self, mode, args):
+        ge = GameEngine(TestParams("test", "mdm", "random", nb=10, engine="batched", seed=1))
+        with self.assertRaises(ValueError):
+            getattr(ge, mode)(*args)
+
+    @parameterized.expand([
+        ("lp", ),
+        ("lemke-howson", )
+    ])
+    def test_init_players_gt_solver(self, solver):
+        players = GameEngine.init_players(TestParams("test", "gt", "gt", gt_solver=solver))
+        self.assertEqual([solver, solver], [p.solver for p in players])
+        self.assertEqual("enumeration", GameEngine.init_players(TestParams("test", "gt", "random"))[0].solver)
+
+
+if __name__ == '__main__':
+    unittest.main()
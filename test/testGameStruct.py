@@ -118,10 +118,8 @@ class TestCaseGameStruct(unittest.TestCase):
                 p.des = round(p.cur_hp * 0.95, 0)
                 p.spe = round(p.cur_hp * 0.95, 0)
 
-                for m in p.moves:
-                    m.name = "light_dark"
-                    m.move_type = "DARK"
-                    m.base_pow = 55
+                for i in range(len(p.moves)):
+                    p.set_move(i, Move("light_dark", "DARK", 55))
 
         self.assertEqual(exp, gs_cp)
 
@@ -43,6 +43,19 @@ team_specs3 = [[(("p1z", "FIRE", 100, 100, 100, 100),
                [(("d1", "ICE", 100, 80, 100, 95),
                  (("light_steel", "STEEL", 50), ("heavy_electric", "ELECTRIC", 100)))]]
 
+
+def to_action(state: PokeGame.GameStruct, player: str, move: str | None) -> int | None:
+    """ Action of player corresponding to the name of an attack or 'switch {name}' in state """
+
+    if move is None:
+        return None
+
+    team, of = (state.team1, state.on_field1) if player == "p1" else (state.team2, state.on_field2)
+    if "switch" in move:
+        return len(of.moves) + [p.name for p in team].index(move.split(" ")[1])
+    return [m.name for m in of.moves].index(move)
+
+
 dummy_poke1 = Pokemon("p1", "GROUND", (100, 100, 100, 100),
                       (Move("heavy_ground", "GROUND", 100), Move("light_flying", "FLYING", 50)))
 dummy_poke2 = Pokemon("p2", "DARK", (90, 110, 90, 110),
@@ -236,7 +249,9 @@ class MyTestCase(unittest.TestCase):
             fill_game_with_estimation(test_player, game)
 
         for player1_move, player2_move in zip(player1_moves, player2_moves):
-            game.apply_player_moves(game.game_state, player1_move, player2_move, 0.85, True)
+            p1_action, p2_action = to_action(game.game_state, "p1", player1_move), to_action(game.game_state, "p2",
+                                                                                           player2_move)
+            game.apply_player_moves(game.game_state, p1_action, p2_action, 0.85, True)
 
             p1_moved = (player1_move is not None and "switch" in player1_move) or (
                     player2_move is not None and "switch" in player2_move) or \
@@ -249,7 +264,7 @@ class MyTestCase(unittest.TestCase):
                        (player2_move is not None and "switch" not in player2_move and
                         (
                                     game.game_state.on_field2.cur_hp > 0 or game.game_state.on_field2.spe > game.game_state.on_field1.spe))
-            game.directly_available_info(test_player, player2_move if test_player == "p1" else player1_move,
+            game.directly_available_info(test_player, p2_action if test_player == "p1" else p1_action,
                                          {"p1_moved": p1_moved, "p2_moved": p2_moved})
 
         exp_view = PokeGame.GameStruct(exp_specs)
@@ -390,8 +405,10 @@ class MyTestCase(unittest.TestCase):
         for player1_move, player2_move in zip(player1_moves, player2_moves):
             p1_first = game.game_state.on_field1.spe > game.game_state.on_field2.spe
             p2_first = not p1_first
+            p1_action, p2_action = to_action(game.game_state, "p1", player1_move), to_action(game.game_state, "p2",
+                                                                                           player2_move)
 
-            game.apply_player_moves(game.game_state, player1_move, player2_move, 0.85)
+            game.apply_player_moves(game.game_state, p1_action, p2_action, 0.85)
             p1_moved = (player1_move is not None and "switch" in player1_move) or (
                     player2_move is not None and "switch" in player2_move) or \
                        (player1_move is not None and "switch" not in player1_move and
@@ -403,8 +420,8 @@ class MyTestCase(unittest.TestCase):
                        (player2_move is not None and "switch" not in player2_move and
                         (
                                 game.game_state.on_field2.cur_hp > 0 or game.game_state.on_field2.spe > game.game_state.on_field1.spe))
-            game.directly_available_info("p1", player1_move, {"p1_moved": p1_moved, "p2_moved": p2_moved})
-            game.directly_available_info("p2", player2_move, {"p1_moved": p1_moved, "p2_moved": p2_moved})
+            game.directly_available_info("p1", p1_action, {"p1_moved": p1_moved, "p2_moved": p2_moved})
+            game.directly_available_info("p2", p2_action, {"p1_moved": p1_moved, "p2_moved": p2_moved})
 
             if "switch" in player1_move and "switch" in player2_move:
                 p1view_pkmn1 = game.player1_view.team1[0]
@@ -415,10 +432,11 @@ class MyTestCase(unittest.TestCase):
                 p1view_pkmn1, p1view_pkmn2 = game.player1_view.on_field1, game.player1_view.on_field2
                 p2view_pkmn1, p2view_pkmn2 = game.player2_view.on_field1, game.player2_view.on_field2
 
-            p1view_pkmn2.spe = PokeGame.estimate_speed(p1_first, player1_move, player2_move, p1view_pkmn1.spe,
-                                                       p1view_pkmn2.spe)
-            p2view_pkmn1.spe = PokeGame.estimate_speed(p2_first, player2_move, player1_move, p2view_pkmn2.spe,
-                                                       p2view_pkmn1.spe)
+            n_moves = game.game_state.n_moves
+            p1view_pkmn2.spe = PokeGame.estimate_speed(p1_first, p1_action, p2_action, p1view_pkmn1.spe,
+                                                       p1view_pkmn2.spe, n_moves)
+            p2view_pkmn1.spe = PokeGame.estimate_speed(p2_first, p2_action, p1_action, p2view_pkmn2.spe,
+                                                       p2view_pkmn1.spe, n_moves)
 
         self.assertTrue((p1view_pkmn2.spe is None and p2_spe_exp is None or p1view_pkmn2.spe == p2_spe_exp) and
                         (p2view_pkmn1.spe is None and p1_spe_exp is None or p2view_pkmn1.spe == p1_spe_exp))
@@ -466,8 +484,10 @@ class MyTestCase(unittest.TestCase):
 
             pre_of1_stats = (pre_of1_re_ref.name, pre_of1_re_ref.cur_hp, pre_of1_re_ref.spe)
             pre_of2_stats = (pre_of2_re_ref.name, pre_of2_re_ref.cur_hp, pre_of2_re_ref.spe)
+            p1_action, p2_action = to_action(game.game_state, "p1", player1_move), to_action(game.game_state, "p2",
+                                                                                           player2_move)
 
-            game.apply_player_moves(game.game_state, player1_move, player2_move, 0.9, True)
+            game.apply_player_moves(game.game_state, p1_action, p2_action, 0.9, True)
 
             ret = {'p1_moved': "switch" in player1_move or "switch" in player2_move or
                                pre_of2_stats[1] != game.game_state.on_field2.cur_hp,
@@ -478,12 +498,12 @@ class MyTestCase(unittest.TestCase):
                    'p2_fainted': not game.game_state.on_field2.is_alive(),
                    'p2_first': pre_of1_re_ref.spe < pre_of2_re_ref.spe}
 
-            game.directly_available_info("p1", player1_move, ret)
-            game.directly_available_info("p2", player2_move, ret)
+            game.directly_available_info("p1", p1_action, ret)
+            game.directly_available_info("p2", p2_action, ret)
             pre_stats = [pre_of1_stats, pre_of2_stats][::(-1) ** (test_player == "p2")]
 
-            game.statistic_estimation(test_player, ret, player1_move if test_player == "p1" else player2_move,
-                                      player2_move if test_player == "p1" else player1_move, pre_stats[0], pre_stats[1])
+            game.statistic_estimation(test_player, ret, p1_action if test_player == "p1" else p2_action,
+                                      p2_action if test_player == "p1" else p1_action, pre_stats[0], pre_stats[1])
 
         test_pkmn = pre_of2_pl_ref if test_player == "p1" else pre_of1_pl_ref
         real_pkmn = pre_of2_re_ref if test_player == "p1" else pre_of1_re_ref
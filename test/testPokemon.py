@@ -8,7 +8,7 @@ import unittest
 
 from parameterized import parameterized
 
-from src.game.Pokemon import Pokemon, Move
+from src.game.Pokemon import Pokemon, Move, intern_move, MOVE_REGISTRY, UNKNOWN_MOVE
 
 random.seed(19)
 
@@ -80,6 +80,16 @@ class TestCasePokemon(unittest.TestCase):
 
         self.assertEqual(test, exp)
 
+    def test_intern_move(self):
+        m = intern_move("light_fire", "FIRE", 50)
+
+        self.assertIs(MOVE_REGISTRY["light_fire"], m)
+        self.assertIs(UNKNOWN_MOVE, intern_move(None, None, None))
+        self.assertIs(m, copy.deepcopy(m))
+        self.assertIsNot(m, intern_move("light_fire", "FIRE", 60))  # not part of the moves of the game
+        with self.assertRaises(AttributeError):
+            m.base_pow = 60
+
     def test_create_Pokemon(self):
         moves = [Move("heavy_fire", "FIRE", 100), Move("light_grass", "GRASS", 50)]
         p = Pokemon("p", "FIRE", (100, 100, 100, 100), moves)
@@ -103,8 +113,8 @@ class TestCasePokemon(unittest.TestCase):
 
         # change values of original Pokémon
         p.name, p.atk, p.des, p.spe, p.poke_type = "m", 120, 80, 110, "DRAGON"
-        p.moves[0].name, p.moves[0].poke_type, p.moves[0].base_pow = "heavy_dragon", "DRAGON", 120
-        p.moves[1].name, p.moves[1].poke_type, p.moves[1].base_pow = "light_dragon", "DRAGON", 50
+        p.set_move(0, Move("heavy_dragon", "DRAGON", 120))
+        p.set_move(1, Move("light_dragon", "DRAGON", 50))
 
         # values that should be retrieved in copied object
         test = [p_cp.name, p_cp.poke_type, p_cp.cur_hp, p_cp.hp, p_cp.atk, p_cp.des, p_cp.spe,
@@ -114,6 +124,26 @@ class TestCasePokemon(unittest.TestCase):
 
         self.assertEqual(test, exp)
 
+    def test_copy_Pokemon_shares_moves(self):
+        p = Pokemon("p", "FIRE", (100, 100, 100, 100), [Move("heavy_fire", "FIRE", 100), Move(None, None, None)])
+        p_cp = copy.copy(p)
+        self.assertIs(p.moves, p_cp.moves)
+
+        # moves are copied on write
+        p_cp.set_move(1, Move("light_grass", "GRASS", 50))
+        self.assertEqual([None, "light_grass"], [p.moves[1].name, p_cp.moves[1].name])
+        self.assertIs(p.moves[0], p_cp.moves[0])
+
+    def test_copy_Pokemon_shares_species(self):
+        p = Pokemon("p", "FIRE", (100, 100, 100, 100), [Move("heavy_fire", "FIRE", 100)])
+        p_cp = copy.copy(p)
+        self.assertIs(p.species, p_cp.species)
+
+        # only the current hp belongs to the copy, static data is replaced when modified
+        p_cp.cur_hp, p_cp.atk = 50, 120
+        self.assertEqual([100, 100, 50, 120], [p.cur_hp, p.atk, p_cp.cur_hp, p_cp.atk])
+        self.assertEqual(p.species._replace(atk=120), p_cp.species)
+
     @parameterized.expand([
         (["p", "FIRE", 100, 100, 100, 100, 100, "heavy_fire", "FIRE", 100, "light_grass", "GRASS", 50],
          ["p", "FIRE", 100, 100, 100, 100, 100, "heavy_fire", "FIRE", 100, "light_grass", "GRASS", 50], True),
@@ -0,0 +1,42 @@
+import sys, os
+
+sys.path.append(os.getcwd() + '/..')
+
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+
+from src.agents.nn_utils import initialize_nn
+from src.game.GameEngine import GameEngine
+from src.game.GameEngineParams import TestParams
+from src.game.Profiler import Profiler
+
+"""
+ *
+ *    Tests
+ *
+"""
+
+
+class TestCaseProfiler(unittest.TestCase):
+
+    @parameterized.expand([(1,), (2,)])
+    def test_test_mode_profiler(self, workers):
+        np.random.seed(4)
+        ml = (initialize_nn([66, 10, 1], "xavier"), "sigmoid", "SARSA")
+        pars = TestParams("test", "ml", "mdm", ml1=ml, nb=10, seed=2)
+        profiler = Profiler()
+        res = GameEngine(pars, profiler=profiler).test_mode(workers=workers)
+        report = profiler.report()
+
+        self.assertEqual(res, GameEngine(pars).test_mode())
+        self.assertTrue({"make_move/PlayerNN", "make_move/PlayerMDM", "deepcopy", "fill_game_with_estimation",
+                         "play_round", "play_round/directly_available_info"} <= set(report))
+        self.assertEqual(report["deepcopy"]["calls"], report["fill_game_with_estimation"]["calls"])
+        self.assertLessEqual(report["play_round"]["p50_us"], report["play_round"]["p99_us"])
+
+
+
+if __name__ == '__main__':
+    unittest.main()